@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for method dispatch through pymongoshell.MongoClient.
+
+Every shell call such as ``c.find_one(...)`` first resolves ``find_one``
+through ``MongoClient.__getattr__``. This measures the cost of that
+resolution with the dispatch cache warm (the normal case) and with the
+cache cleared before every lookup (the behaviour before the cache existed).
+
+No server is required, pymongo connects lazily and we never issue a
+request.
+"""
+
+import argparse
+import timeit
+
+from pymongoshell.mongoclient import MongoClient
+
+
+def lookup_uncached(client, name):
+    client._dispatch_cache.clear()
+    return getattr(client, name)
+
+
+def lookup_cached(client, name):
+    return getattr(client, name)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000,
+                        help="lookups per repeat [default: %(default)s]")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of repeats, best is reported [default: %(default)s]")
+    parser.add_argument("--method", default="find_one",
+                        help="collection method to resolve [default: %(default)s]")
+    args = parser.parse_args()
+
+    c = MongoClient(banner=False)
+
+    results = {}
+    for label, func in [("uncached", lookup_uncached), ("cached", lookup_cached)]:
+        timings = timeit.repeat(lambda: func(c, args.method),
+                                number=args.number, repeat=args.repeat)
+        results[label] = min(timings) / args.number * 1e9
+        print(f"{label:<10}: {results[label]:10.1f} ns per lookup")
+
+    print(f"speedup   : {results['uncached'] / results['cached']:10.1f}x")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing pager output to a transcript file.
+
+Compares the old behaviour of the Pager, which reopened the output file
+for every call and flushed after every line, against OutputSink with
+each flush policy, in the foreground and on a background thread.
+
+Output is written to bench_output.txt in the current directory.
+"""
+
+import argparse
+import os
+import time
+
+from pymongoshell.sink import OutputSink, FLUSH_POLICIES
+
+
+def old_behaviour(filename, lines, calls):
+    for _ in range(calls):
+        f = open(filename, "a+")
+        try:
+            for l in lines:
+                f.write(f"{l}\n")
+                f.flush()
+        finally:
+            f.close()
+
+
+def sink_behaviour(filename, lines, calls, **kwargs):
+    sink = OutputSink(filename, mode="a", **kwargs)
+    for _ in range(calls):
+        for l in lines:
+            sink.write(f"{l}\n")
+        sink.end_call()
+    sink.close()
+
+
+def run(label, func, filename, total_lines):
+    if os.path.exists(filename):
+        os.unlink(filename)
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}: {total_lines / elapsed:12.0f} lines/s")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10000,
+                        help="lines written per call [default: %(default)s]")
+    parser.add_argument("--calls", type=int, default=20,
+                        help="number of pager calls [default: %(default)s]")
+    parser.add_argument("--output", default="bench_output.txt",
+                        help="file to write [default: %(default)s]")
+    args = parser.parse_args()
+
+    lines = [f"{{'_id': {i}, 'name': 'document number {i}'}}" for i in range(args.lines)]
+    total = args.lines * args.calls
+
+    run("reopen + flush per line", lambda: old_behaviour(args.output, lines, args.calls),
+        args.output, total)
+    for policy in FLUSH_POLICIES:
+        for background in [False, True]:
+            label = f"sink {policy}{' background' if background else ''}"
+            run(label,
+                lambda: sink_behaviour(args.output, lines, args.calls,
+                                       flush_policy=policy, background=background),
+                args.output, total)
+    os.unlink(args.output)
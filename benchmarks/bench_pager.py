@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the pager and rendering hot paths.
+
+Everything runs against synthetic documents and fake cursors so no
+server is needed. Screen output is discarded and the pagination prompt
+is answered automatically.
+
+Results are printed as a table and can be saved as JSON with --json.
+Pass an earlier JSON file with --compare to see the ratio of each
+benchmark against it, e.g. to compare two releases:
+
+    python -m benchmarks.bench_pager --json bench_1.2.1.json
+    python -m benchmarks.bench_pager --compare bench_1.2.1.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from unittest import mock
+
+from bson import ObjectId, Decimal128
+
+from pymongoshell.pager import Pager
+from pymongoshell.version import VERSION
+
+TERMINAL_COLS = 100
+TERMINAL_LINES = 40
+
+
+def make_doc(i):
+    return {"_id": ObjectId(),
+            "name": f"customer {i}",
+            "created": datetime.datetime(2020, 1, 1, 12, i % 60),
+            "balance": Decimal128("1234.50"),
+            "tags": ["retail", "priority", "newsletter"],
+            "address": {"street": f"{i} Main Street",
+                        "city": "Dublin",
+                        "geo": {"type": "Point", "coordinates": [-6.26, 53.35]}},
+            "orders": [{"sku": f"sku-{j}", "qty": j, "price": Decimal128("9.99")}
+                       for j in range(5)]}
+
+
+class FakeCursor:
+    """
+    Iterates a list of documents like a pymongo cursor.
+    """
+
+    def __init__(self, docs):
+        self._docs = docs
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def close(self):
+        pass
+
+
+class Suite:
+
+    def __init__(self, size: int):
+        self.size = size
+        self.docs = [make_doc(i) for i in range(size)]
+        pager = Pager()
+        self.lines = list(pager.cursor_to_lines(self.docs))
+        self.long_line = "x" * (size * 100)
+        fd, self.output_filename = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+
+    def cleanup(self):
+        if os.path.exists(self.output_filename):
+            os.unlink(self.output_filename)
+
+    def paginate(self, paginate, output_file):
+        # Output goes to /dev/null, which isn't a terminal, so the paginated
+        # cases have to ask for pagination or they'd measure write_stream.
+        pager = Pager(paginate=paginate, interactive=True if paginate else None)
+        if output_file:
+            # Truncating a file that was just written can force a flush to
+            # disk on some filesystems, start from a new file each time.
+            if os.path.exists(self.output_filename):
+                os.unlink(self.output_filename)
+            pager.output_file = self.output_filename
+        pager.paginate_lines(self.lines,
+                             default_terminal_cols=TERMINAL_COLS,
+                             default_terminal_lines=TERMINAL_LINES)
+        pager.close()
+
+    def benchmarks(self):
+        """
+        name -> (function, number of items processed per call)
+        """
+        pager = Pager()
+        return {
+            "paginate_lines[paginated]": (lambda: self.paginate(True, False), len(self.lines)),
+            "paginate_lines[paginated,file]": (lambda: self.paginate(True, True), len(self.lines)),
+            "paginate_lines[plain]": (lambda: self.paginate(False, False), len(self.lines)),
+            "paginate_lines[plain,file]": (lambda: self.paginate(False, True), len(self.lines)),
+            "make_page": (lambda: pager.make_page(self.lines, TERMINAL_COLS, len(self.lines) + 1),
+                          len(self.lines)),
+            "line_to_box": (lambda: pager.line_to_box(self.long_line, TERMINAL_COLS),
+                            len(self.long_line)),
+            "make_numbers_column": (lambda: Pager.make_numbers_column(1, TERMINAL_COLS, TERMINAL_LINES),
+                                    TERMINAL_LINES),
+            "dict_to_lines": (lambda: [list(pager.dict_to_lines(d)) for d in self.docs],
+                              len(self.docs)),
+            "cursor_to_lines": (lambda: list(pager.cursor_to_lines(FakeCursor(self.docs))),
+                                len(self.docs)),
+        }
+
+
+def run(size: int, repeat: int, selected=None):
+    suite = Suite(size)
+    results = {}
+    try:
+        with open(os.devnull, "w") as devnull, \
+                mock.patch("builtins.input", return_value=""), \
+                redirect_stdout(devnull):
+            for name, (func, items) in suite.benchmarks().items():
+                if selected and not any(s in name for s in selected):
+                    continue
+                best = min(timeit.repeat(func, number=1, repeat=repeat))
+                results[name] = {"seconds": best,
+                                 "items": items,
+                                 "items_per_second": items / best}
+    finally:
+        suite.cleanup()
+    return results
+
+
+def report(results, baseline=None):
+    for name, r in results.items():
+        line = f"{name:<34}: {r['seconds'] * 1000:10.2f} ms {r['items_per_second']:14.0f} items/s"
+        if baseline and name in baseline:
+            ratio = baseline[name]["seconds"] / r["seconds"]
+            line = f"{line}   {ratio:5.2f}x vs baseline"
+        print(line)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=2000,
+                        help="number of synthetic documents [default: %(default)s]")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of repeats, best is reported [default: %(default)s]")
+    parser.add_argument("--json", default=None,
+                        help="write results to this JSON file")
+    parser.add_argument("--compare", default=None,
+                        help="JSON file from an earlier run to compare against")
+    parser.add_argument("benchmark", nargs="*",
+                        help="only run benchmarks whose names contain these strings")
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat, args.benchmark)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"version": VERSION,
+                       "python": sys.version.split()[0],
+                       "platform": platform.platform(),
+                       "date": datetime.datetime.utcnow().isoformat(),
+                       "size": args.size,
+                       "repeat": args.repeat,
+                       "results": results}, f, indent=2)
+        print(f"results written to '{args.json}'")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark rendering documents into pager lines with pprint.pformat
+against pymongoshell.render.DocRenderer.
+"""
+
+import argparse
+import datetime
+import pprint
+import timeit
+
+from bson import ObjectId, Decimal128
+
+from pymongoshell.render import DocRenderer
+
+
+def make_doc(i, nested=True):
+    doc = {"_id": ObjectId(),
+           "name": f"customer {i}",
+           "created": datetime.datetime(2020, 1, 1),
+           "balance": Decimal128("1234.50"),
+           "tags": ["retail", "priority", "newsletter"]}
+    if nested:
+        doc["address"] = {"street": "1 Main Street",
+                          "city": "Dublin",
+                          "geo": {"type": "Point", "coordinates": [-6.26, 53.35]}}
+        doc["orders"] = [{"when": datetime.datetime(2019, 1, i % 28 + 1),
+                          "items": [{"sku": f"sku-{j}", "qty": j, "price": Decimal128("9.99")}
+                                    for j in range(5)]}
+                         for _ in range(5)]
+    return doc
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=1000,
+                        help="documents to render [default: %(default)s]")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of repeats, best is reported [default: %(default)s]")
+    args = parser.parse_args()
+
+    renderer = DocRenderer()
+    for label, nested in [("flat docs", False), ("nested docs", True)]:
+        docs = [make_doc(i, nested) for i in range(args.docs)]
+        old = min(timeit.repeat(lambda: [pprint.pformat(d).splitlines() for d in docs],
+                                number=1, repeat=args.repeat))
+        new = min(timeit.repeat(lambda: [list(renderer.lines(d)) for d in docs],
+                                number=1, repeat=args.repeat))
+        print(f"{label:<12}: pformat {args.docs / old:10.0f} docs/s  "
+              f"DocRenderer {args.docs / new:10.0f} docs/s  speedup {old / new:4.1f}x")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark how long it takes before the shell is usable: importing the
+package and creating a MongoClient.
+
+Imports are timed in a fresh interpreter each time, less the time the
+interpreter takes to start. Constructing a client needs no server as
+nothing is sent to it until the first operation, a mongodb+srv:// URI
+is included to show that no DNS lookup is done up front.
+
+Each figure is compared with a budget, --check exits with status 1 if
+any of them is over:
+
+    python -m benchmarks.bench_startup --check
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import timeit
+
+# Budgets in milliseconds
+IMPORT_BUDGET_MS = 30.0
+CONSTRUCT_BUDGET_MS = 20.0
+
+URIS = {"construct[mongodb]": "mongodb://localhost:27017/demo.zipcodes",
+        "construct[mongodb+srv]": "mongodb+srv://cluster0.example.invalid/demo.zipcodes"}
+
+
+def time_subprocess(code: str, repeat: int) -> float:
+    """
+    Best wall clock time in seconds to run code in a new interpreter.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_import(statement: str, repeat: int) -> float:
+    baseline = time_subprocess("pass", repeat)
+    return max(time_subprocess(statement, repeat) - baseline, 0.0)
+
+
+def time_construct(uri: str, repeat: int) -> float:
+    from pymongoshell.mongoclient import MongoClient
+
+    def construct():
+        MongoClient(banner=False, host=uri).close()
+
+    construct()  # first call pays for one off imports inside pymongo
+    return min(timeit.repeat(construct, number=1, repeat=repeat))
+
+
+def run(repeat: int):
+    """
+    name -> {"seconds": ..., "budget": ...}, budget is None if there isn't one.
+    """
+    results = {"import pymongoshell": {"seconds": time_import("import pymongoshell", repeat),
+                                       "budget": IMPORT_BUDGET_MS / 1000},
+               "import pymongoshell.MongoClient": {
+                   "seconds": time_import("import pymongoshell; pymongoshell.MongoClient", repeat),
+                   "budget": None}}
+    for name, uri in URIS.items():
+        results[name] = {"seconds": time_construct(uri, repeat),
+                         "budget": CONSTRUCT_BUDGET_MS / 1000}
+    return results
+
+
+def over_budget(results):
+    return [name for name, r in results.items()
+            if r["budget"] is not None and r["seconds"] > r["budget"]]
+
+
+def report(results):
+    for name, r in results.items():
+        line = f"{name:<34}: {r['seconds'] * 1000:10.2f} ms"
+        if r["budget"] is not None:
+            status = "ok" if r["seconds"] <= r["budget"] else "OVER BUDGET"
+            line = f"{line}   budget {r['budget'] * 1000:6.1f} ms  {status}"
+        print(line)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of repeats, best is reported [default: %(default)s]")
+    parser.add_argument("--json", default=None,
+                        help="write results to this JSON file")
+    parser.add_argument("--check", action="store_true", default=False,
+                        help="exit with status 1 if anything is over budget")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0],
+                       "repeat": args.repeat,
+                       "results": results}, f, indent=2)
+        print(f"results written to '{args.json}'")
+
+    if args.check and over_budget(results):
+        sys.exit(1)
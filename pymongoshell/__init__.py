@@ -42,4 +42,24 @@ Follow me on twitter `@jdrumgoole <https://twitter.com/jdrumgoole>`_. for
 updates on this package.
 """
 
-from pymongoshell.mongoclient import MongoClient
+import importlib
+
+__all__ = ["MongoClient", "AsyncMongoClient"]
+
+# pymongo takes most of the time needed to import the package so the
+# client classes are only imported when they are first used.
+_LAZY_ATTRIBUTES = {"MongoClient": "pymongoshell.mongoclient",
+                    "AsyncMongoClient": "pymongoshell.asyncclient"}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module 'pymongoshell' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,256 @@
+"""
+AsyncMongoClient
+====================================
+A `MongoClient` proxy for use from `asyncio` code or an async aware
+REPL (`python -m asyncio`, IPython). Collection methods are intercepted
+exactly as in `MongoClient` but run on a thread pool, so several
+queries, counts or collStats can be in flight at once.
+
+Each call returns an `AsyncResult` straight away. The result is
+rendered by the pager when it is awaited (or `result()` is called) so
+output from concurrent operations never interleaves and the pagination
+prompt always runs in the caller's thread.
+
+Each operation is recorded in `last_op` and `op_stats` (and shown by
+`timing`) once it is rendered. `call_time` is measured on the worker
+thread and `render_time` covers fetching the first batch on the worker
+and rendering the rest. Reads and writes go through the `result_cache`
+as they do in `MongoClient`.
+
+    >>> c = AsyncMongoClient()
+    >>> a = c.find({"state": "NY"})
+    >>> b = c.count_documents({"state": "CA"})
+    >>> await asyncio.gather(a, b)
+
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+import pymongo
+
+from pymongoshell.errorhandling import handle_exceptions, MongoDBShellError
+from pymongoshell.opstats import OpRecord, affected_count
+from pymongoshell.mongoclient import MongoClient, CURSOR_TYPES
+
+ASYNC_WORKERS = 8
+
+
+class StartedCursor:
+    """
+    A cursor whose first batch was fetched on a worker thread, so
+    awaiting a find waits for the server rather than returning an
+    idle cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._head = list(itertools.islice(cursor, 1))
+
+    @property
+    def cursor(self):
+        return self._cursor
+
+    def __iter__(self):
+        head, self._head = self._head, []
+        yield from head
+        yield from self._cursor
+
+    def close(self):
+        self._cursor.close()
+
+
+class AsyncResult:
+    """
+    The pending result of an operation started by `AsyncMongoClient`.
+    Awaiting it (or calling `result()`) waits for the operation, renders
+    its result the first time and returns the value. Errors are reported
+    as `MongoClient` reports them and give a result of None.
+    """
+
+    def __init__(self, client: "AsyncMongoClient", name: str, future: concurrent.futures.Future,
+                 args=(), kwargs=None, op: OpRecord = None):
+        self._client = client
+        self._name = name
+        self._future = future
+        self._op = op
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._collected = False
+        self._value = None
+
+    @property
+    def name(self):
+        return self._name
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> bool:
+        return self._future.cancel()
+
+    def _collect(self):
+        if not self._collected:
+            self._collected = True
+
+            def finish(*args, **kwargs):
+                return self._client.render_future(self._future, self._op)
+
+            finish.__name__ = self._name
+            self._value = handle_exceptions(self._name)(finish)(*self._args, **self._kwargs)
+        return self._value
+
+    def result(self, timeout: float = None):
+        """
+        Block until the operation finishes, for use outside an event loop.
+        """
+        done, _ = concurrent.futures.wait([self._future], timeout=timeout)
+        if not done:
+            raise concurrent.futures.TimeoutError(f"{self._name} still running after {timeout} seconds")
+        return self._collect()
+
+    async def _wait(self):
+        try:
+            await asyncio.wrap_future(self._future)
+        except Exception:
+            pass  # reported by _collect()
+        return self._collect()
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    def __repr__(self):
+        state = "done" if self._future.done() else "running"
+        return f"<AsyncResult {self._name} {state}>"
+
+
+class AsyncMongoClient(MongoClient):
+    """
+    `MongoClient` whose collection methods, `count_documents`, `coll_stats`
+    and `dbstats` run on a thread pool and return an `AsyncResult`.
+
+    :param workers: the number of operations that can run at once
+    :param args, kwargs: passed through to `MongoClient`
+    """
+
+    def __init__(self, *args, workers: int = ASYNC_WORKERS, **kwargs):
+        object.__setattr__(self, "_executor",
+                           ThreadPoolExecutor(max_workers=workers,
+                                              thread_name_prefix="pymongoshell-async"))
+        object.__setattr__(self, "_render_lock", threading.Lock())
+        super().__init__(*args, **kwargs)
+
+    def _run(self, op: OpRecord, func, args, kwargs):
+        result = self._call(op, func, args, kwargs)
+        if type(result) in [pymongo.command_cursor.CommandCursor, pymongo.cursor.Cursor]:
+            listener = self._wire_stats
+            if listener is not None:
+                server_before = listener.thread_server_time()
+            start = time.perf_counter()
+            result = StartedCursor(result)
+            op.render_time = time.perf_counter() - start
+            if listener is not None:
+                op.server_time = op.server_time + (listener.thread_server_time() - server_before) / 1_000_000
+        return result
+
+    def submit(self, name: str, func, *args, **kwargs) -> AsyncResult:
+        """
+        Run func(*args, **kwargs) on the thread pool.
+        """
+        op = OpRecord(name, self.collection_name)
+        future = self._executor.submit(self._run, op, func, args, kwargs)
+        return AsyncResult(self, name, future, args, kwargs, op)
+
+    def render_future(self, future: concurrent.futures.Future, op: OpRecord = None):
+        """
+        Render the outcome of a finished operation, raising its exception
+        if it failed, and record it in `op_stats`.
+        """
+        if op is None:
+            op = OpRecord("unknown", self.collection_name)
+        op.error = True
+        try:
+            result = future.result()
+        except BaseException:
+            self.record_op(op)
+            raise
+        with self._render_lock:
+            pager = self._pager
+            docs_before = pager.docs_rendered
+            bytes_before = pager.bytes_rendered
+            listener = self._wire_stats
+            if listener is not None:
+                server_before = listener.thread_server_time()
+            start = time.perf_counter()
+            try:
+                if type(result) is StartedCursor:
+                    try:
+                        self._pager.print_cursor(result)
+                    finally:
+                        self._result = result.cursor
+                    result = result.cursor
+                    op.docs = pager.docs_rendered - docs_before
+                else:
+                    self.process_result(result, elapsed=op.call_time)
+                    if type(result) in CURSOR_TYPES:
+                        op.docs = pager.docs_rendered - docs_before
+                    else:
+                        op.docs = affected_count(result)
+                op.error = False
+            finally:
+                op.render_time = op.render_time + time.perf_counter() - start
+                op.bytes_rendered = pager.bytes_rendered - bytes_before
+                if listener is not None:
+                    op.server_time = (op.server_time or 0) + \
+                        (listener.thread_server_time() - server_before) / 1_000_000
+                self.record_op(op)
+        return result
+
+    def interceptor(self, func):
+        assert callable(func)
+
+        @wraps(func)
+        def inner_func(*args, **kwargs):
+            return self.submit(func.__name__, func, *args, **kwargs)
+
+        return inner_func
+
+    def count_documents(self, filter=None, *args, **kwargs) -> AsyncResult:
+        return self.submit("count_documents", self._collection.count_documents,
+                           filter or {}, *args, **kwargs)
+
+    def coll_stats(self, scale=1024, verbose=False) -> AsyncResult:
+        database = self._database
+        collection_name = self._collection_name
+
+        def coll_stats():
+            # The same check as MongoClient.coll_stats, made on the worker thread.
+            if collection_name not in database.list_collection_names():
+                raise MongoDBShellError(f"'{collection_name}' is not a valid collection")
+            return database.command({"collStats": collection_name,
+                                     "scale": scale,
+                                     "verbose": verbose})
+
+        return self.submit("coll_stats", coll_stats)
+
+    def dbstats(self) -> AsyncResult:
+        return self.submit("dbstats", self._database.command, "dbstats")
+
+    def close(self):
+        """
+        Wait for running operations, release the thread pool and then
+        the pymongo client.
+        """
+        self._executor.shutdown(wait=True)
+        super().close()
+
+    def __repr__(self):
+        return f"pymongoshell.AsyncMongoClient(banner={self._banner},\n" \
+               f"                              database_name='{self._database_name}',\n" \
+               f"                              collection_name='{self._collection_name}',\n" \
+               f"                              host= '{self._mongodb_uri}')"
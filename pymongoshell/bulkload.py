@@ -0,0 +1,206 @@
+"""
+BulkLoader
+====================================
+Stream documents into a collection with unordered `insert_many` calls
+running on several threads at once.
+
+Documents can come from any iterable (e.g. a generator) or from a
+file. Files ending in `.bson` are read as concatenated BSON documents
+(the format written by `mongodump`), anything else is read as JSON
+Lines in MongoDB extended JSON, one document per line. Either may be
+gzip compressed with a further `.gz` extension, as `export` writes them.
+
+Only `workers * 2` batches are ever held in memory. Reading stops
+while the workers catch up, so loading a file of any size uses
+constant memory.
+
+If the server can't be reached the load stops at the first batch that
+fails for that reason and the partial result is returned, rather than
+reading the rest of the source and timing out on every batch.
+
+"""
+
+import gzip
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bson
+from bson import json_util
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+from pymongoshell.errorhandling import truncate
+
+BULK_LOAD_BATCH_SIZE = 1000
+BULK_LOAD_WORKERS = 4
+
+
+def read_documents(source):
+    """
+    Generator yielding the documents in source.
+
+    :param source: an iterable of documents or the name of a .bson or
+    JSON Lines file, gzip compressed if the name ends in .gz
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = os.fspath(source)
+        opener = open
+        if name.endswith(".gz"):
+            name = name[:-len(".gz")]
+            opener = gzip.open
+        if name.endswith(".bson"):
+            with opener(source, "rb") as f:
+                yield from bson.decode_file_iter(f)
+        else:
+            with opener(source, "rt") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json_util.loads(line)
+    else:
+        yield from source
+
+
+def batches(docs, batch_size: int):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BatchError:
+    """
+    What went wrong with one batch.
+    """
+
+    def __init__(self, batch_number: int, batch_size: int, error_count: int, message: str):
+        self.batch_number = batch_number
+        self.batch_size = batch_size
+        self.error_count = error_count
+        self.message = message
+
+    def __str__(self):
+        return f"batch {self.batch_number}: {self.error_count} of {self.batch_size} " \
+               f"documents failed, first error: {self.message}"
+
+    def __repr__(self):
+        return f"BatchError({self.batch_number}, {self.batch_size}, {self.error_count}, {self.message!r})"
+
+
+class BulkLoadResult:
+    """
+    The outcome of a bulk load. The inserted ids are deliberately not kept.
+    """
+
+    def __init__(self):
+        self.inserted_count = 0
+        self.batch_count = 0      # batches sent to the server
+        self.skipped_batches = 0  # batches read but not sent as the load was aborted
+        self.errors = []
+        self.elapsed = 0.0
+        self.aborted = None  # why the load stopped early, None if it didn't
+
+    @property
+    def error_count(self):
+        return sum(e.error_count for e in self.errors)
+
+    @property
+    def docs_per_second(self):
+        if self.elapsed > 0:
+            return self.inserted_count / self.elapsed
+        else:
+            return 0.0
+
+    def __repr__(self):
+        return f"BulkLoadResult(inserted_count={self.inserted_count}, " \
+               f"batch_count={self.batch_count}, skipped_batches={self.skipped_batches}, " \
+               f"error_count={self.error_count}, " \
+               f"elapsed={self.elapsed:.3f}, aborted={self.aborted!r})"
+
+
+class BulkLoader:
+    """
+    Load documents into collection using `workers` threads each running
+    unordered `insert_many` calls of up to `batch_size` documents.
+    """
+
+    def __init__(self, collection,
+                 batch_size: int = BULK_LOAD_BATCH_SIZE,
+                 workers: int = BULK_LOAD_WORKERS):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1 not {batch_size}")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1 not {workers}")
+        self._collection = collection
+        self._batch_size = batch_size
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+
+    def _insert(self, result: BulkLoadResult, batch_number: int, batch: list):
+        with self._lock:
+            if self._abort.is_set():  # queued before the load was aborted
+                result.skipped_batches = result.skipped_batches + 1
+                return
+            result.batch_count = result.batch_count + 1
+        try:
+            inserted = len(self._collection.insert_many(batch, ordered=False).inserted_ids)
+            error = None
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            write_errors = e.details.get("writeErrors", [])
+            message = write_errors[0].get("errmsg", "") if write_errors else str(e)
+            error = BatchError(batch_number, len(batch), len(batch) - inserted, message)
+        except ConnectionFailure as e:
+            # Includes ServerSelectionTimeoutError, every other batch would fail the same way.
+            with self._lock:
+                if result.aborted is None:
+                    result.aborted = truncate(str(e), 200)
+            self._abort.set()
+            return
+        except Exception as e:  # e.g. a document that can't be encoded as BSON
+            inserted = 0
+            error = BatchError(batch_number, len(batch), len(batch), str(e))
+
+        with self._lock:
+            result.inserted_count = result.inserted_count + inserted
+            if error:
+                result.errors.append(error)
+
+    def load(self, source) -> BulkLoadResult:
+        """
+        Insert every document from source.
+
+        :param source: an iterable of documents or a .bson or JSON Lines filename
+        :return: a BulkLoadResult, `aborted` is set if the server couldn't be reached
+        """
+        result = BulkLoadResult()
+        self._abort.clear()
+        # Backpressure: at most two batches per worker read but not yet inserted
+        slots = threading.BoundedSemaphore(self._workers * 2)
+
+        def run(batch_number, batch):
+            try:
+                self._insert(result, batch_number, batch)
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self._workers,
+                                thread_name_prefix="pymongoshell-bulkload") as executor:
+            for batch_number, batch in enumerate(batches(read_documents(source), self._batch_size), 1):
+                slots.acquire()
+                if self._abort.is_set():
+                    slots.release()
+                    with self._lock:
+                        result.skipped_batches = result.skipped_batches + 1
+                    break
+                executor.submit(run, batch_number, batch)
+        result.elapsed = time.perf_counter() - start
+        result.errors.sort(key=lambda e: e.batch_number)
+        return result
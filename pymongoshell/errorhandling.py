@@ -1,5 +1,5 @@
 import sys
-import pprint
+import reprlib
 
 
 from pymongo.errors import OperationFailure, ServerSelectionTimeoutError, \
@@ -50,24 +50,53 @@ def print_to_err(*args, **kwargs):
 # decorator to handle exceptions
 #
 
-def args_to_string(*args, **kwargs):
-    args_list = ""
-    for i, arg in enumerate(args):
-        if callable(arg):
-            args_list = f"{args_list}{arg}" #{arg.__name__} ()"
-        else:
-            args_list = f"{args_list}{arg}"
-        if len(args) > 1 and (i+1) < len(args):
-            args_list = f"{args_list}, "
+# Limits applied when rendering call arguments and error details for
+# error messages. Large payloads (e.g. insert_many of a big list) are
+# truncated rather than dumped to stderr in full.
+MAX_ARG_LEVEL = 3
+MAX_ARG_ELEMENTS = 10
+MAX_ARG_STRING = 80
+MAX_CONTEXT_LENGTH = 1000
+
+_arg_repr = reprlib.Repr()
+_arg_repr.maxlevel = MAX_ARG_LEVEL
+_arg_repr.maxdict = MAX_ARG_ELEMENTS
+_arg_repr.maxlist = MAX_ARG_ELEMENTS
+_arg_repr.maxtuple = MAX_ARG_ELEMENTS
+_arg_repr.maxset = MAX_ARG_ELEMENTS
+_arg_repr.maxfrozenset = MAX_ARG_ELEMENTS
+_arg_repr.maxdeque = MAX_ARG_ELEMENTS
+_arg_repr.maxarray = MAX_ARG_ELEMENTS
+_arg_repr.maxstring = MAX_ARG_STRING
+_arg_repr.maxother = MAX_ARG_STRING
+
+
+def truncate(s: str, max_length: int = MAX_CONTEXT_LENGTH) -> str:
+    """
+    Cut a string down to max_length characters, marking the cut with '...'
+    """
+    if len(s) > max_length:
+        return f"{s[:max_length - 3]}..."
+    return s
+
+
+def bounded_repr(obj) -> str:
+    """
+    A repr of obj limited in depth, element count and string length.
+    """
+    return truncate(_arg_repr.repr(obj))
 
-    kwarg_list = ",".join([f"'{x}'={y}" for x, y in kwargs.items()])
+
+def args_to_string(*args, **kwargs):
+    args_list = ", ".join([bounded_repr(x) for x in args])
+    kwarg_list = ",".join([f"'{x}'={bounded_repr(y)}" for x, y in kwargs.items()])
 
     if args_list and kwarg_list:
-        return f"{args_list}, {kwarg_list}"
+        return truncate(f"{args_list}, {kwarg_list}")
     elif args_list:
-        return f"{args_list}"
+        return truncate(f"{args_list}")
     elif kwarg_list:
-        return f"{kwarg_list}"
+        return truncate(f"{kwarg_list}")
     else:
         return ""
 
@@ -89,42 +118,41 @@ def handle_exceptions(arg):
     def director(func):
         def function_wrapper(*args, **kwargs):
             label = arg or ""
-            arg_string = args_to_string(*args, **kwargs)
 
-            source = f"{label}({arg_string})"
-            function_wrapper.__name__ = func.__name__
-            #source = ""
+            def source():
+                # Only built once an exception is caught, so the success
+                # path never pays for rendering the arguments.
+                return f"{label}({args_to_string(*args, **kwargs)})"
+
             try:
-                #print(f"arg_string:{arg_string}")
                 return func(*args, **kwargs)
             except AttributeError as e:
                 print_to_err(f"CLI AttributeError: {func.__name__} is not a valid operation")
                # return error_func(f"AttributeError (he): {func.__name__} is not a valid operation")
             except TypeError as e:
-                print_to_err(f"CLI TypeError: '{source}' {e}")
+                print_to_err(f"CLI TypeError: '{source()}' {e}")
             except ServerSelectionTimeoutError as e:
-                print_to_err(f"CLI ServerSelectionTimeoutError: {label} {e}")
+                print_to_err(f"CLI ServerSelectionTimeoutError: {label} {truncate(str(e))}")
                 print_to_err(f"CLI Do you have a mongod server running?")
             except AutoReconnect as e:
-                print_to_err(f"CLI AutoReconnect error: {source} {e}")
+                print_to_err(f"CLI AutoReconnect error: {source()} {truncate(str(e))}")
             except BulkWriteError as e:
-                print_to_err(f"CLI BulkWriteError: {source} {e}")
-                err_str = pprint.pformat(e)
-                print_to_err(err_str)
+                write_errors = e.details.get("writeErrors", [])
+                print_to_err(f"CLI BulkWriteError: {source()} {len(write_errors)} write error(s)")
+                print_to_err(bounded_repr(e.details))
             except DuplicateKeyError as e:
-                print_to_err(f"CLI DuplicateKeyError: {source}")
-                err_str = pprint.pformat(e.details)
-                print_to_err(err_str)
+                print_to_err(f"CLI DuplicateKeyError: {source()}")
+                print_to_err(bounded_repr(e.details))
             except OperationFailure as e:
-                print_to_err(f"CLI OperationsFailure:{source}")
+                print_to_err(f"CLI OperationsFailure:{source()}")
                 print_to_err(e.code)
-                print_to_err(e.details)
+                print_to_err(bounded_repr(e.details))
             except MongoDBShellError as e:
                 print_to_err(f"CLI MongoDBShellError: {e}")
             except CollectionNotSetError as e:
                 print_to_err(f"CLI CollectionNotSetError: you must set a default collection")
             except Exception as e:
-                print_to_err(f"CLI Exception: {source} {e}")
+                print_to_err(f"CLI Exception: {source()} {truncate(str(e))}")
 
         function_wrapper.__name__ = func.__name__
         return function_wrapper
@@ -0,0 +1,303 @@
+"""
+Explain
+====================================
+Run `find`, `aggregate`, `count_documents`, `update_*` and `delete_*`
+calls through the server's `explain` command and reduce the explain
+document to the figures that matter when tuning a query: the winning
+plan, the index used, keys and documents examined against documents
+returned and the execution time.
+
+Explaining a write does not perform it.
+
+    >>> c.explain("find", {"state": "NY"})
+    explain find demo.zipcodes (executionStats)
+    plan     : FETCH -> IXSCAN state_1
+    index    : state_1
+    returned : 1595
+    examined : 1595 keys, 1595 docs (1.0 docs per doc returned)
+    time     : 2 ms
+
+"""
+
+from pymongoshell.errorhandling import MongoDBShellError
+
+EXPLAIN_VERBOSITIES = ["queryPlanner", "executionStats", "allPlansExecution"]
+EXPLAIN_VERBOSITY = "executionStats"
+
+EXPLAIN_METHODS = ["find",
+                   "find_one",
+                   "aggregate",
+                   "count_documents",
+                   "update_one",
+                   "update_many",
+                   "delete_one",
+                   "delete_many"]
+
+# Warn when more than this many documents are examined for each one returned.
+EXPLAIN_SELECTIVITY_WARNING = 10
+
+# Stages that read an index, the index name is shown next to them.
+INDEX_STAGES = ["IXSCAN", "COUNT_SCAN", "DISTINCT_SCAN", "EXPRESS_IXSCAN"]
+
+# Positional parameters of each method, as pymongo names them.
+POSITIONAL_ARGS = {"find": ["filter", "projection", "skip", "limit"],
+                   "find_one": ["filter", "projection"],
+                   "aggregate": ["pipeline"],
+                   "count_documents": ["filter"],
+                   "update_one": ["filter", "update", "upsert"],
+                   "update_many": ["filter", "update", "upsert"],
+                   "delete_one": ["filter"],
+                   "delete_many": ["filter"]}
+
+# pymongo keyword arguments and the command field each becomes.
+FIND_OPTIONS = {"sort": "sort", "skip": "skip", "limit": "limit", "hint": "hint",
+                "collation": "collation", "max_time_ms": "maxTimeMS", "let": "let"}
+COMMAND_OPTIONS = {"hint": "hint", "collation": "collation", "let": "let"}
+
+
+def index_spec(spec):
+    """
+    A sort or hint in any form pymongo takes as a command document.
+    """
+    if isinstance(spec, str):
+        return spec if spec != "$natural" else {"$natural": 1}
+    if isinstance(spec, (list, tuple)):
+        return {k: v for k, v in spec}
+    return spec
+
+
+def bind_args(method: str, args, kwargs) -> dict:
+    """
+    The arguments of a call to method by parameter name.
+    """
+    names = POSITIONAL_ARGS[method]
+    if len(args) > len(names):
+        raise MongoDBShellError(f"explain: too many arguments for {method}")
+    bound = dict(zip(names, args))
+    for name, value in kwargs.items():
+        if name in bound:
+            raise MongoDBShellError(f"explain: {method} got '{name}' twice")
+        bound[name] = value
+    return bound
+
+
+def take_options(bound: dict, options: dict, command: dict, method: str):
+    for name, field in options.items():
+        value = bound.pop(name, None)
+        if value is None:
+            continue
+        command[field] = index_spec(value) if name in ("sort", "hint") else value
+    if bound:
+        raise MongoDBShellError(f"explain: {method} argument(s) not supported: {', '.join(sorted(bound))}")
+
+
+def explain_command(collection_name: str, method: str, args=(), kwargs=None) -> dict:
+    """
+    The command that the call collection.method(*args, **kwargs) sends,
+    ready to be wrapped in explain.
+    """
+    if method not in EXPLAIN_METHODS:
+        raise MongoDBShellError(f"explain: can't explain {method}, only {', '.join(EXPLAIN_METHODS)}")
+    bound = bind_args(method, args, kwargs or {})
+    filter = bound.pop("filter", None) or {}
+
+    if method in ("find", "find_one"):
+        command = {"find": collection_name, "filter": filter}
+        projection = bound.pop("projection", None)
+        if projection is not None:
+            if isinstance(projection, (list, tuple)):
+                projection = {field: 1 for field in projection}
+            command["projection"] = projection
+        if method == "find_one":
+            bound["limit"] = 1
+            command["singleBatch"] = True
+        take_options(bound, FIND_OPTIONS, command, method)
+        if not command.get("skip"):
+            command.pop("skip", None)
+        if not command.get("limit"):
+            command.pop("limit", None)
+    elif method == "aggregate":
+        command = {"aggregate": collection_name, "pipeline": bound.pop("pipeline", []), "cursor": {}}
+        take_options(bound, COMMAND_OPTIONS, command, method)
+    elif method == "count_documents":
+        # The pipeline count_documents runs
+        pipeline = [{"$match": filter}]
+        skip = bound.pop("skip", None)
+        if skip:
+            pipeline.append({"$skip": skip})
+        limit = bound.pop("limit", None)
+        if limit:
+            pipeline.append({"$limit": limit})
+        pipeline.append({"$group": {"_id": 1, "n": {"$sum": 1}}})
+        command = {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}}
+        take_options(bound, COMMAND_OPTIONS, command, method)
+    elif method.startswith("update_"):
+        if "update" not in bound:
+            raise MongoDBShellError(f"explain: {method} needs an update document")
+        statement = {"q": filter, "u": bound.pop("update"),
+                     "multi": method == "update_many",
+                     "upsert": bool(bound.pop("upsert", False))}
+        for name in ("hint", "collation", "array_filters"):
+            value = bound.pop(name, None)
+            if value is not None:
+                field = "arrayFilters" if name == "array_filters" else name
+                statement[field] = index_spec(value) if name == "hint" else value
+        command = {"update": collection_name, "updates": [statement]}
+        take_options(bound, {"let": "let"}, command, method)
+    else:  # delete_one, delete_many
+        statement = {"q": filter, "limit": 1 if method == "delete_one" else 0}
+        for name in ("hint", "collation"):
+            value = bound.pop(name, None)
+            if value is not None:
+                statement[name] = index_spec(value) if name == "hint" else value
+        command = {"delete": collection_name, "deletes": [statement]}
+        take_options(bound, {"let": "let"}, command, method)
+    return command
+
+
+def find_first(doc, key: str):
+    """
+    The value of the first field called key found in doc searching
+    breadth first, so the outermost one wins. None if there isn't one.
+    """
+    queue = [doc]
+    while queue:
+        item = queue.pop(0)
+        if isinstance(item, dict):
+            if key in item:
+                return item[key]
+            queue.extend(item.values())
+        elif isinstance(item, list):
+            queue.extend(item)
+    return None
+
+
+def plan_children(plan: dict) -> list:
+    if "inputStage" in plan:
+        return [plan["inputStage"]]
+    if "inputStages" in plan:
+        return plan["inputStages"]
+    if "shards" in plan:
+        return [unwrap_plan(shard.get("winningPlan", {})) for shard in plan["shards"]]
+    return []
+
+
+def unwrap_plan(plan: dict) -> dict:
+    # The slot based engine nests the classic plan under queryPlan.
+    return plan.get("queryPlan", plan) if isinstance(plan, dict) else {}
+
+
+def describe_plan(plan: dict) -> str:
+    """
+    The stages of plan from the root down, e.g. "FETCH -> IXSCAN state_1".
+    Stages with several inputs list them in brackets.
+    """
+    stage = plan.get("stage", "?")
+    if stage in INDEX_STAGES and plan.get("indexName"):
+        stage = f"{stage} {plan['indexName']}"
+    children = plan_children(plan)
+    if len(children) == 1:
+        return f"{stage} -> {describe_plan(children[0])}"
+    elif children:
+        return f"{stage}({', '.join(describe_plan(c) for c in children)})"
+    return stage
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan_children(plan):
+        yield from plan_nodes(child)
+
+
+class ExplainResult:
+    """
+    The summary of an explain document, the whole document is kept in
+    `raw`. Figures that the verbosity doesn't provide are None.
+    """
+
+    def __init__(self, method: str, namespace: str, verbosity: str, raw: dict):
+        self.method = method
+        self.namespace = namespace
+        self.verbosity = verbosity
+        self.raw = raw
+
+        query_planner = find_first(raw, "queryPlanner") or {}
+        winning_plan = unwrap_plan(query_planner.get("winningPlan", {}))
+        nodes = list(plan_nodes(winning_plan)) if winning_plan else []
+        self.plan = describe_plan(winning_plan) if winning_plan else None
+        self.indexes = []
+        for node in nodes:
+            name = node.get("indexName")
+            if node.get("stage") in INDEX_STAGES and name and name not in self.indexes:
+                self.indexes.append(name)
+        self.collscan = any(node.get("stage") == "COLLSCAN" for node in nodes)
+        self.rejected_plans = len(query_planner.get("rejectedPlans", []))
+
+        execution_stats = find_first(raw, "executionStats") or {}
+        self.returned = execution_stats.get("nReturned")
+        self.keys_examined = execution_stats.get("totalKeysExamined")
+        self.docs_examined = execution_stats.get("totalDocsExamined")
+        self.time_ms = execution_stats.get("executionTimeMillis")
+
+    @property
+    def docs_per_returned(self):
+        """
+        Documents examined for each one returned, None if not known.
+        """
+        if self.docs_examined is None or self.returned is None:
+            return None
+        return self.docs_examined / max(self.returned, 1)
+
+    def warnings(self) -> list:
+        warnings = []
+        if self.collscan:
+            warnings.append("COLLSCAN: no index used, every document in the collection is read")
+        ratio = self.docs_per_returned
+        if ratio is not None and ratio > EXPLAIN_SELECTIVITY_WARNING:
+            warnings.append(f"POOR SELECTIVITY: {ratio:.1f} documents examined per document returned")
+        return warnings
+
+    def lines(self):
+        yield f"explain {self.method} {self.namespace} ({self.verbosity})"
+        yield f"plan     : {self.plan or 'unknown'}"
+        if self.indexes:
+            yield f"index    : {', '.join(self.indexes)}"
+        else:
+            yield "index    : none"
+        if self.returned is not None:
+            yield f"returned : {self.returned}"
+            examined = f"examined : {self.keys_examined} keys, {self.docs_examined} docs"
+            if self.docs_per_returned is not None:
+                examined = f"{examined} ({self.docs_per_returned:.1f} docs per doc returned)"
+            yield examined
+            yield f"time     : {self.time_ms} ms"
+        if self.rejected_plans:
+            yield f"rejected : {self.rejected_plans} plans"
+        for warning in self.warnings():
+            yield f"WARNING  : {warning}"
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+    def __repr__(self):
+        return f"ExplainResult(method='{self.method}', namespace='{self.namespace}', " \
+               f"plan='{self.plan}', indexes={self.indexes}, returned={self.returned}, " \
+               f"keys_examined={self.keys_examined}, docs_examined={self.docs_examined}, " \
+               f"time_ms={self.time_ms})"
+
+
+def run_explain(collection, method: str, args=(), kwargs=None,
+                verbosity: str = EXPLAIN_VERBOSITY) -> ExplainResult:
+    """
+    Explain collection.method(*args, **kwargs) at verbosity.
+
+    :param collection: a pymongo.collection.Collection
+    :param method: one of EXPLAIN_METHODS
+    :param verbosity: one of EXPLAIN_VERBOSITIES
+    :return: an ExplainResult
+    """
+    if verbosity not in EXPLAIN_VERBOSITIES:
+        raise MongoDBShellError(f"explain: verbosity must be one of {', '.join(EXPLAIN_VERBOSITIES)}")
+    command = explain_command(collection.name, method, args, kwargs)
+    raw = collection.database.command("explain", command, verbosity=verbosity)
+    return ExplainResult(method, collection.full_name, verbosity, raw)
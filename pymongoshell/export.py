@@ -0,0 +1,176 @@
+"""
+Exporter
+====================================
+Stream the results of a query straight to a file without going
+through the Pager.
+
+Two formats are supported. "bson" writes each document exactly as it
+arrived from the server (the format written by `mongodump`), the
+documents are never decoded. "jsonl" writes one MongoDB extended JSON
+document per line, the format read back by `bulk_load`.
+
+Output ending in `.gz` is gzip compressed. `compress` can't contradict
+the name as `bulk_load` relies on the extension to read the file back. Documents are written as the cursor returns them so the
+memory used does not depend on the size of the result.
+
+"""
+
+import gzip
+import os
+import time
+
+from bson import json_util
+from bson.raw_bson import RawBSONDocument
+
+from pymongoshell.errorhandling import MongoDBShellError
+
+FORMAT_JSONL = "jsonl"
+FORMAT_BSON = "bson"
+
+EXPORT_FORMATS = [FORMAT_JSONL, FORMAT_BSON]
+
+EXPORT_BATCH_SIZE = 1000
+
+# Bytes held by the file object before they are written to disk.
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+# Same flavour of extended JSON as mongoexport.
+EXPORT_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+def export_format(path: str, format: str = None) -> str:
+    """
+    The format to use for path, worked out from its extension unless
+    given explicitly.
+    """
+    if format is None:
+        name = os.fspath(path)
+        if name.endswith(".gz"):
+            name = name[:-3]
+        format = FORMAT_BSON if name.endswith(".bson") else FORMAT_JSONL
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {EXPORT_FORMATS} not '{format}'")
+    return format
+
+
+def compressed(path: str, compress: bool = None) -> bool:
+    """
+    Whether path is written gzip compressed, which is decided by its
+    extension. compress, if given, has to agree with it.
+    """
+    gz = os.fspath(path).endswith(".gz")
+    if compress is not None and bool(compress) != gz:
+        if compress:
+            raise MongoDBShellError(f"export: compressed output needs a name ending in .gz, not '{path}'")
+        raise MongoDBShellError(f"export: '{path}' ends in .gz so it must be compressed")
+    return gz
+
+
+def open_output(path: str, compress: bool = None):
+    """
+    Open path for binary writing, gzip compressed if the name ends in `.gz`.
+    """
+    if compressed(path, compress):
+        return gzip.open(path, "wb", compresslevel=6)
+    else:
+        return open(path, "wb", buffering=EXPORT_BUFFER_SIZE)
+
+
+class ExportResult:
+    """
+    The outcome of an export.
+    """
+
+    def __init__(self, path: str, format: str):
+        self.path = path
+        self.format = format
+        self.count = 0
+        self.bytes_written = 0  # before compression
+        self.file_size = 0
+        self.elapsed = 0.0
+
+    @property
+    def docs_per_second(self):
+        if self.elapsed > 0:
+            return self.count / self.elapsed
+        else:
+            return 0.0
+
+    @property
+    def bytes_per_second(self):
+        if self.elapsed > 0:
+            return self.bytes_written / self.elapsed
+        else:
+            return 0.0
+
+    def __repr__(self):
+        return f"ExportResult(path='{self.path}', format='{self.format}', " \
+               f"count={self.count}, bytes_written={self.bytes_written}, " \
+               f"elapsed={self.elapsed:.3f})"
+
+
+class Exporter:
+    """
+    Write the documents matching a query on collection to a file.
+
+    :param collection: the pymongo collection to query
+    :param batch_size: documents per batch requested from the server
+    """
+
+    def __init__(self, collection, batch_size: int = EXPORT_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1 not {batch_size}")
+        self._collection = collection
+        self._batch_size = batch_size
+
+    def _raw_collection(self):
+        codec_options = self._collection.codec_options.with_options(document_class=RawBSONDocument)
+        return self._collection.with_options(codec_options=codec_options)
+
+    @staticmethod
+    def _write_bson(cursor, f, result: ExportResult):
+        for doc in cursor:
+            data = doc.raw
+            f.write(data)
+            result.count = result.count + 1
+            result.bytes_written = result.bytes_written + len(data)
+
+    @staticmethod
+    def _write_jsonl(cursor, f, result: ExportResult):
+        for doc in cursor:
+            data = (json_util.dumps(doc, json_options=EXPORT_JSON_OPTIONS) + "\n").encode("utf-8")
+            f.write(data)
+            result.count = result.count + 1
+            result.bytes_written = result.bytes_written + len(data)
+
+    def export(self, path: str, filter=None, projection=None,
+               format: str = None, compress: bool = None, **kwargs) -> ExportResult:
+        """
+        Run a find and write every document it returns to path.
+
+        :param path: file to write, it is overwritten if it exists
+        :param filter: the query filter, all documents if None
+        :param projection: the fields to return
+        :param format: "jsonl" or "bson", from the extension of path if None
+        :param compress: must be True if path ends in .gz and False otherwise, None to leave it to the name
+        :param kwargs: passed on to `find`
+        :return: an ExportResult
+        """
+        format = export_format(path, format)
+        compressed(path, compress)
+        result = ExportResult(path, format)
+        if format == FORMAT_BSON:
+            collection, write = self._raw_collection(), self._write_bson
+        else:
+            collection, write = self._collection, self._write_jsonl
+
+        start = time.perf_counter()
+        cursor = collection.find(filter or {}, projection, batch_size=self._batch_size, **kwargs)
+        try:
+            with open_output(path, compress) as f:
+                write(cursor, f, result)
+        finally:
+            cursor.close()
+        result.elapsed = time.perf_counter() - start
+        result.file_size = os.path.getsize(path)
+        return result
@@ -0,0 +1,232 @@
+"""
+Latency
+====================================
+Measure the round trip latency to a MongoDB server. A number of
+cheap commands (`ping` by default, it needs no auth) are sent at a
+configurable rate and concurrency and timed with `perf_counter_ns`.
+The first command sent by each worker includes server selection and
+connection setup so it is reported separately from the steady state
+round trip times. If none of those first commands succeed the server
+is reported as not available and nothing more is sent, rather than
+waiting out server selection for every command.
+
+Used by the `mping` command line tool and by `c.ping()` in the shell.
+
+"""
+
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+from pymongoshell.errorhandling import truncate
+
+PING_COUNT = 10
+PING_CONCURRENCY = 1
+PING_COMMAND = "ping"
+# Server selection errors include the whole topology, keep the start of it.
+PING_ERROR_LENGTH = 200
+
+
+def percentile(samples: list, p: float):
+    """
+    Nearest rank percentile of samples, which must already be sorted.
+    """
+    if not samples:
+        return None
+    rank = max(1, -(-len(samples) * p // 100))  # ceiling
+    return samples[int(rank) - 1]
+
+
+class LatencyStats:
+    """
+    Summary of a list of latencies in nanoseconds, in the order they
+    were measured. Jitter is the mean difference between consecutive
+    samples.
+    """
+
+    def __init__(self, samples: list):
+        self.count = len(samples)
+        ordered = sorted(samples)
+        self.min = ordered[0] if ordered else None
+        self.max = ordered[-1] if ordered else None
+        self.mean = sum(ordered) / len(ordered) if ordered else None
+        self.p50 = percentile(ordered, 50)
+        self.p95 = percentile(ordered, 95)
+        self.p99 = percentile(ordered, 99)
+        if len(samples) > 1:
+            self.jitter = sum(abs(b - a) for a, b in zip(samples, samples[1:])) / (len(samples) - 1)
+        else:
+            self.jitter = 0.0 if samples else None
+
+    def to_dict(self):
+        """
+        The statistics in milliseconds.
+        """
+        def ms(ns):
+            return None if ns is None else ns / 1_000_000
+        return {"count": self.count,
+                "min": ms(self.min),
+                "p50": ms(self.p50),
+                "p95": ms(self.p95),
+                "p99": ms(self.p99),
+                "max": ms(self.max),
+                "mean": ms(self.mean),
+                "jitter": ms(self.jitter)}
+
+    def __str__(self):
+        if not self.count:
+            return "no samples"
+        d = self.to_dict()
+        return f"min {d['min']:.3f} p50 {d['p50']:.3f} p95 {d['p95']:.3f} " \
+               f"p99 {d['p99']:.3f} max {d['max']:.3f} jitter {d['jitter']:.3f} ms"
+
+
+class PingResult:
+    """
+    The outcome of a run of pings.
+    """
+
+    def __init__(self, host: str, command: str, concurrency: int, rate: float,
+                 setup: list, samples: list, errors: int, first_error: str, elapsed: float,
+                 available: bool = True):
+        self.host = host
+        self.command = command
+        self.concurrency = concurrency
+        self.rate = rate
+        self.setup = LatencyStats(setup)
+        self.rtt = LatencyStats(samples)
+        self.errors = errors
+        self.first_error = first_error
+        self.elapsed = elapsed
+        self.available = available
+
+    @property
+    def pings_per_second(self):
+        if self.elapsed > 0:
+            return self.rtt.count / self.elapsed
+        else:
+            return 0.0
+
+    def to_dict(self):
+        return {"host": self.host,
+                "command": self.command,
+                "concurrency": self.concurrency,
+                "rate": self.rate,
+                "date": datetime.datetime.utcnow().isoformat(),
+                "available": self.available,
+                "elapsed": self.elapsed,
+                "pings_per_second": self.pings_per_second,
+                "errors": self.errors,
+                "first_error": self.first_error,
+                "setup_ms": self.setup.to_dict(),
+                "rtt_ms": self.rtt.to_dict()}
+
+    def lines(self):
+        if not self.available:
+            yield f"{self.command} {self.host}: Server not available"
+            yield f"error : {self.first_error}"
+            return
+        yield f"{self.command} {self.host}: {self.rtt.count} pings, concurrency {self.concurrency}, " \
+              f"{self.pings_per_second:.0f} pings/s"
+        yield f"setup : {self.setup}"
+        yield f"rtt   : {self.rtt}"
+        if self.errors:
+            yield f"errors: {self.errors}, first error: {self.first_error}"
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+
+def ping(client: pymongo.MongoClient,
+         count: int = PING_COUNT,
+         concurrency: int = PING_CONCURRENCY,
+         rate: float = None,
+         command: str = PING_COMMAND,
+         host: str = None) -> PingResult:
+    """
+    Send `count` commands to the admin database of client from
+    `concurrency` threads.
+
+    :param client: a pymongo.MongoClient
+    :param count: steady state commands to time, not counting one setup command per thread
+    :param concurrency: threads sending commands at once
+    :param rate: commands per second across all threads, as fast as possible if None
+    :param command: the command to send
+    :param host: the name to report for the server
+    :return: a PingResult
+    """
+    if count < 1:
+        raise ValueError(f"count must be at least 1 not {count}")
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1 not {concurrency}")
+    if rate is not None and rate <= 0:
+        raise ValueError(f"rate must be greater than 0 not {rate}")
+
+    admin = client.admin
+    lock = threading.Lock()
+    setup = []
+    samples = []
+    state = {"next": 0, "errors": 0, "first_error": None}
+
+    def timed():
+        start = time.perf_counter_ns()
+        try:
+            admin.command(command)
+        except PyMongoError as e:
+            with lock:
+                state["errors"] = state["errors"] + 1
+                if state["first_error"] is None:
+                    state["first_error"] = truncate(str(e), PING_ERROR_LENGTH)
+            return None
+        return time.perf_counter_ns() - start
+
+    def worker(ready: threading.Barrier, start_ns: list):
+        latency = timed()
+        if latency is not None:
+            with lock:
+                setup.append(latency)
+        ready.wait()
+        while True:
+            with lock:
+                i = state["next"]
+                if i >= count:
+                    return
+                state["next"] = i + 1
+            if rate is not None:
+                delay = start_ns[0] + i * 1_000_000_000 / rate - time.perf_counter_ns()
+                if delay > 0:
+                    time.sleep(delay / 1_000_000_000)
+            latency = timed()
+            if latency is not None:
+                with lock:
+                    samples.append(latency)
+
+    start_ns = [0]
+
+    def begin():
+        # Every thread has sent its setup command, if none got through
+        # there is no server to time so stop here.
+        if not setup:
+            state["next"] = count
+        start_ns[0] = time.perf_counter_ns()
+
+    ready = threading.Barrier(concurrency, action=begin)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="pymongoshell-mping") as executor:
+        futures = [executor.submit(worker, ready, start_ns) for _ in range(concurrency)]
+        for f in futures:
+            f.result()
+    elapsed = (time.perf_counter_ns() - start_ns[0]) / 1_000_000_000
+
+    if host is None:
+        # nodes is empty until the server is found, fall back to the seeds from the URI
+        nodes = client.nodes or client.topology_description.server_descriptions()
+        host = ",".join(f"{h}:{p}" for h, p in sorted(nodes))
+    return PingResult(host=host,
+                      command=command, concurrency=concurrency, rate=rate,
+                      setup=setup, samples=samples,
+                      errors=state["errors"], first_error=state["first_error"],
+                      elapsed=elapsed, available=bool(setup))
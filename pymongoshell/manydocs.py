@@ -50,3 +50,6 @@ c.insert_one({"name":"Joe Drumgoole"})
 c.ldbs
 c.drop_database()
 c.ldbs
+c.collection = "dummy.data"
+c.bulk_load({"i": i} for i in range(10000))
+c.drop_collection(confirm=False)
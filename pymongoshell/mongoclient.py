@@ -8,13 +8,27 @@ friendly API calls.
 
 import pprint
 import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from functools import wraps
 # import pprint
 
 import pymongo
-
+from bson.raw_bson import RawBSONDocument
+
+from pymongoshell.bulkload import BulkLoader, BulkLoadResult, BULK_LOAD_BATCH_SIZE, BULK_LOAD_WORKERS
+from pymongoshell.explain import run_explain, ExplainResult, EXPLAIN_METHODS, EXPLAIN_VERBOSITIES, \
+    EXPLAIN_VERBOSITY
+from pymongoshell.export import Exporter, ExportResult, EXPORT_BATCH_SIZE
+from pymongoshell.latency import ping, PingResult, PING_COUNT, PING_CONCURRENCY, PING_COMMAND
+from pymongoshell.opstats import OpRecord, OpStats, affected_count
 from pymongoshell.pager import Pager, FileNotOpenError
+from pymongoshell.resultcache import ResultCache, CachedCursor, RecordingCursor, RESULT_CACHE_TTL
+from pymongoshell.registry import CLIENT_REGISTRY
 from pymongoshell.version import VERSION
+from pymongoshell.wirestats import WireStatsListener
 
 from pymongoshell.errorhandling import handle_exceptions, MongoDBShellError, CollectionNotSetError
 
@@ -24,42 +38,212 @@ else:
     db_name_excluded_chars = r'/\. "$'
 
 
+SRV_SCHEME = "mongodb+srv://"
+
+
+def parse_uri_offline(uri: str) -> dict:
+    """
+    `pymongo.uri_parser.parse_uri` without the DNS SRV and TXT lookups
+    it does for a mongodb+srv:// URI. We only need the names in the URI,
+    the lookups are left to pymongo when it first connects.
+    """
+    if not uri.startswith(SRV_SCHEME):
+        return pymongo.uri_parser.parse_uri(uri)
+    rest, _, query = uri[len(SRV_SCHEME):].partition("?")
+    netloc, _, path = rest.partition("/")
+    parsed = pymongo.uri_parser.parse_uri(f"mongodb://{netloc}/{path}")
+    parsed["options"] = pymongo.uri_parser.split_options(query, validate=False) if query else {}
+    parsed["fqdn"] = netloc.rpartition("@")[2]
+    return parsed
+
+
+# Maximum number of namespaces kept in the MongoClient namespace cache.
+NAMESPACE_CACHE_SIZE = 64
+
+# Threads used to list the collections of several databases at once.
+LIST_COLLECTIONS_WORKERS = 8
+# Seconds to wait for the collections of any one database.
+LIST_COLLECTIONS_TIMEOUT = 10.0
+
+# Collection methods whose cursors return RawBSONDocuments when
+# lazy_decode is set.
+LAZY_DECODE_METHODS = ["find", "aggregate"]
+
+# Write results with more ids than this are summarised (count, first and
+# last id) rather than listed in full.
+WRITE_RESULT_LIST_LIMIT = 20
+
+# Results rendered a document at a time by Pager.print_cursor
+CURSOR_TYPES = [pymongo.command_cursor.CommandCursor,
+                pymongo.cursor.Cursor,
+                CachedCursor,
+                RecordingCursor]
+
+
+class NamespaceEntry:
+    """
+    A validated namespace together with its ready to use pymongo objects
+    and the interceptor wrappers already built for the collection.
+    """
+
+    def __init__(self, database_name: str, collection_name: str,
+                 database: pymongo.database.Database,
+                 collection: pymongo.collection.Collection):
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self.database = database
+        self.collection = collection
+        self.dispatch = {}
+        self.raw_dispatch = {}
+        self._raw_collection = None
+
+    @property
+    def raw_collection(self) -> pymongo.collection.Collection:
+        """
+        The collection with RawBSONDocument as its document class. Built
+        on first use.
+        """
+        if self._raw_collection is None:
+            codec_options = self.collection.codec_options.with_options(document_class=RawBSONDocument)
+            self._raw_collection = self.collection.with_options(codec_options=codec_options)
+        return self._raw_collection
+
+
+class NamespaceCache:
+    """
+    Bounded LRU cache of NamespaceEntry objects keyed by "db.col".
+    """
+
+    def __init__(self, maxsize: int = NAMESPACE_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses = self._misses + 1
+        else:
+            self._hits = self._hits + 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: NamespaceEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+class ClosedClient:
+    """
+    Stands in for the pymongo client, database and collection of a
+    MongoClient that has been closed so any further use is reported
+    clearly rather than reaching a released pymongo client.
+    """
+
+    def _closed(self, *args, **kwargs):
+        raise MongoDBShellError("this MongoClient has been closed, create a new one")
+
+    __getattr__ = _closed
+    __getitem__ = _closed
+    __call__ = _closed
+
+    def __bool__(self):
+        return False
+
+
+CLOSED_CLIENT = ClosedClient()
+
+
 class HandleResults:
 
     def __init__(self, pager: Pager):
-        self._pager = Pager()
+        self._pager = pager
 
     def is_result_type(self, result):
         return type(result) in [pymongo.results.InsertOneResult,
                                 pymongo.results.InsertManyResult,
                                 pymongo.results.UpdateResult,
                                 pymongo.results.DeleteResult,
-                                pymongo.results.BulkWriteResult
+                                pymongo.results.BulkWriteResult,
+                                BulkLoadResult,
+                                ExportResult,
+                                PingResult,
+                                ExplainResult
                                 ]
 
-    def handle(self, result):
+    def handle(self, result, elapsed: float = None):
         """
         result is a pymongo result Type.
+
+        :param elapsed: seconds the call took, shown in write summaries if given
         """
         if type(result) is pymongo.results.InsertOneResult:
             self.handle_InsertOneResult(result)
         elif type(result) is pymongo.results.InsertManyResult:
-            self.handle_InsertManyResult(result)
+            self.handle_InsertManyResult(result, elapsed)
         elif type(result) is pymongo.results.UpdateResult:
             self.handle_UpdateResult(result)
         elif type(result) is pymongo.results.DeleteResult:
             self.handle_DeleteResult(result)
         elif type(result) is pymongo.results.BulkWriteResult:
-            self.handle_BulkWriteResult(result)
+            self.handle_BulkWriteResult(result, elapsed)
+        elif type(result) is BulkLoadResult:
+            self.handle_BulkLoadResult(result)
+        elif type(result) is ExportResult:
+            self.handle_ExportResult(result)
+        elif type(result) is PingResult:
+            self.handle_PingResult(result)
+        elif type(result) is ExplainResult:
+            self.handle_ExplainResult(result)
         else:
             raise TypeError(result)
 
     def handle_InsertOneResult(self, result: pymongo.results.InsertOneResult):
         print(f"Inserted: {result.inserted_id}")
 
-    def handle_InsertManyResult(self, result: pymongo.results.InsertManyResult):
-        doc = pprint.pformat(result.inserted_ids)
-        self._pager.paginate_lines(doc.splitlines())
+    @staticmethod
+    def id_summary(count: int, first_id, last_id, elapsed: float = None) -> str:
+        """
+        A one line stand in for a long list of ids, with the rate if
+        elapsed is known.
+        """
+        summary = f"{count} documents, first _id: {first_id!r}, last _id: {last_id!r}"
+        if elapsed:
+            summary = f"{summary}, {elapsed:.2f} seconds ({count / elapsed:.0f} docs/s)"
+        return summary
+
+    def handle_InsertManyResult(self, result: pymongo.results.InsertManyResult, elapsed: float = None):
+        ids = result.inserted_ids
+        if len(ids) > WRITE_RESULT_LIST_LIMIT:
+            print(f"Inserted: {self.id_summary(len(ids), ids[0], ids[-1], elapsed)}")
+        else:
+            self._pager.paginate_lines(Pager.list_to_lines(repr(i) for i in ids))
 
     def handle_UpdateResult(self, result: pymongo.results.UpdateResult):
         self._pager.paginate_doc(result.raw_result)
@@ -67,10 +251,40 @@ class HandleResults:
     def handle_DeleteResult(self, result: pymongo.results.DeleteResult):
         self._pager.paginate_doc(result.raw_result)
 
-    def handle_BulkWriteResult(self, result: pymongo.results.BulkWriteResult):
-        doc = pprint.pformat(result.bulk_api_result)
+    def handle_BulkWriteResult(self, result: pymongo.results.BulkWriteResult, elapsed: float = None):
+        doc = result.bulk_api_result
+        upserted = doc.get("upserted", [])
+        if len(upserted) > WRITE_RESULT_LIST_LIMIT:
+            doc = dict(doc)
+            doc["upserted"] = self.id_summary(len(upserted), upserted[0]["_id"], upserted[-1]["_id"])
+        if elapsed:
+            doc = dict(doc)
+            doc["elapsed"] = f"{elapsed:.2f} seconds"
         self._pager.paginate_doc(doc)
 
+    def handle_BulkLoadResult(self, result: BulkLoadResult):
+        print(f"Inserted: {result.inserted_count} documents in {result.batch_count} batches, "
+              f"{result.elapsed:.2f} seconds ({result.docs_per_second:.0f} docs/s)")
+        if result.aborted:
+            print(f"Aborted: {result.aborted}")
+            if result.skipped_batches:
+                print(f"Skipped: {result.skipped_batches} batches already read were not sent")
+        if result.errors:
+            print(f"Errors: {result.error_count} documents in {len(result.errors)} batches failed")
+            self._pager.paginate_lines(str(e) for e in result.errors)
+
+    def handle_ExportResult(self, result: ExportResult):
+        print(f"Exported: {result.count} documents to '{result.path}' ({result.format}, "
+              f"{result.file_size / (1024 * 1024):.1f} MB), {result.elapsed:.2f} seconds "
+              f"({result.docs_per_second:.0f} docs/s, {result.bytes_per_second / (1024 * 1024):.1f} MB/s)")
+
+    def handle_PingResult(self, result: PingResult):
+        for line in result.lines():
+            print(line)
+
+    def handle_ExplainResult(self, result: ExplainResult):
+        self._pager.paginate_lines(result.lines())
+
 
 class MongoClient:
     """
@@ -82,6 +296,8 @@ class MongoClient:
                  host: str = "mongodb://localhost:27017",
                  serverSelectionTimeoutMS: int = 5000,
                  *args: object,
+                 wire_stats: bool = False,
+                 private_client: bool = False,
                  **kwargs: object) -> object:
 
         """
@@ -91,6 +307,9 @@ class MongoClient:
         :param database_name: The name of the database to be opened
         :param collection_name: The collection name to be opened
         :param mongodb_uri: A properly formatted MongoDB URI
+        :param wire_stats: monitor the commands sent to the server, see `wire_stats()`
+        :param private_client: don't share the pymongo client with other MongoClient
+            objects created with the same URI and options, see `close()`
         :param *args, *kwargs : Passed through to MongoClient
 
         >>> import pymongoshell
@@ -106,7 +325,7 @@ class MongoClient:
         Access the internal MongoClient object:
 
         >>> c.client
-        MongoClient(host=['localhost:27017'], document_class=dict, tz_aware=False, connect=True, serverselectiontimeoutms=5000)
+        MongoClient(host=['localhost:27017'], document_class=dict, tz_aware=False, connect=False, serverselectiontimeoutms=5000)
         >>>
 
         """
@@ -127,11 +346,42 @@ class MongoClient:
         # in the first place.
 
         object.__setattr__(self, "_banner", banner)
+        # Maps a collection method name to its prebuilt interceptor wrapper.
+        # Each namespace has its own, _set_collection swaps them over.
+        object.__setattr__(self, "_dispatch_cache", {})
+        object.__setattr__(self, "_namespace_cache", NamespaceCache())
+        object.__setattr__(self, "_namespace", None)
+        object.__setattr__(self, "_lazy_decode", False)
+        object.__setattr__(self, "_last_op", None)
+        object.__setattr__(self, "_op_stats", OpStats())
+        object.__setattr__(self, "_timing", False)
+        object.__setattr__(self, "_result_cache", None)
+        object.__setattr__(self, "_result_cache_ttl", RESULT_CACHE_TTL)
+        object.__setattr__(self, "_explain_mode", False)
+        object.__setattr__(self, "_explain_verbosity", EXPLAIN_VERBOSITY)
         object.__setattr__(self, "_mongodb_uri", host)
-        client = pymongo.MongoClient(host=self._mongodb_uri, serverSelectionTimeoutMS=serverSelectionTimeoutMS, *args,
-                                     **kwargs)
+        if wire_stats:
+            listener = WireStatsListener()
+            kwargs["event_listeners"] = list(kwargs.get("event_listeners") or []) + [listener]
+        else:
+            listener = None
+        object.__setattr__(self, "_wire_stats", listener)
+        # Don't start the monitor threads (or resolve a mongodb+srv:// name)
+        # until the first operation, pass connect=True to connect straight away.
+        kwargs.setdefault("connect", False)
+        # Objects created for the same server with the same options share
+        # one pymongo client, and so one pool and set of monitor threads.
+        # A client with a wire_stats listener is never shared as the
+        # listener is part of its key.
+        if private_client:
+            client = pymongo.MongoClient(self._mongodb_uri, *args,
+                                         serverSelectionTimeoutMS=serverSelectionTimeoutMS, **kwargs)
+        else:
+            client = CLIENT_REGISTRY.acquire(self._mongodb_uri, *args,
+                                             serverSelectionTimeoutMS=serverSelectionTimeoutMS, **kwargs)
+        object.__setattr__(self, "_private_client", private_client)
         object.__setattr__(self, "_client", client)
-        uri_dict = pymongo.uri_parser.parse_uri(self._mongodb_uri)
+        uri_dict = parse_uri_offline(self._mongodb_uri)
         object.__setattr__(self, "_uri_dict", uri_dict)
         '''
         The dict returned by parse_uri. 
@@ -190,6 +440,7 @@ class MongoClient:
         object.__setattr__(self, "_pager", Pager(line_numbers=self._line_numbers,
                                                  pretty_print=self._pretty_print,
                                                  paginate=self._paginate))
+        self._pager.codec_options = self._client.codec_options
 
         object.__setattr__(self, "_handle_result", HandleResults(self._pager))
         object.__setattr__(self, "_overlap", 0)
@@ -272,18 +523,15 @@ class MongoClient:
             database_name: str
             database_name, _, collection_name = name.partition(".")
             if self.valid_mongodb_name(database_name):
-                self._database_name = database_name
                 if self.valid_mongodb_name(collection_name):
-                    self._collection_name = collection_name
-                    return self._database_name, self._collection_name
+                    return database_name, collection_name
                 else:
                     raise MongoDBShellError(f"'{collection_name}' is not a valid collection name")
             else:
                 raise MongoDBShellError(f"'{database_name}' is not a valid database name")
         else:
             if self.valid_mongodb_name(name):
-                self._collection_name = name
-                return self._database_name, self._collection_name
+                return self._database_name, name
             else:
                 raise MongoDBShellError(f"'{name}' is not a valid collection name")
 
@@ -297,18 +545,49 @@ class MongoClient:
         :return: The mongodb collection object
         '''
 
-        self._database_name, self._collection_name = self.parse_full_name(name)
-        self._database = self._client[self._database_name]
-        self._collection = self._database[self._collection_name]
+        if "." in name:
+            key = name
+        else:
+            key = f"{self._database_name}.{name}"
+
+        entry = self._namespace_cache.get(key)
+        if entry is None:
+            database_name, collection_name = self.parse_full_name(name)
+            database = self._client[database_name]
+            entry = NamespaceEntry(database_name, collection_name,
+                                   database, database[collection_name])
+            self._namespace_cache.put(key, entry)
+
+        self._database_name = entry.database_name
+        self._collection_name = entry.collection_name
+        self._database = entry.database
+        self._collection = entry.collection
+        self._namespace = entry
+        self._dispatch_cache = entry.raw_dispatch if self._lazy_decode else entry.dispatch
         return self._collection
 
+    @property
+    def namespace_cache_hits(self):
+        """
+        :return: The number of collection switches served from the namespace cache
+        """
+        return self._namespace_cache.hits
+
+    @property
+    def namespace_cache_misses(self):
+        """
+        :return: The number of collection switches that had to validate and
+        build a new namespace
+        """
+        return self._namespace_cache.misses
+
     @property
     def collection(self):
         """
         Assign to `collection` to reset the current default collection.
         Return the default collection object associated with the `MongoDB` object.
         """
-        if self._collection:
+        if self._collection is not None:
             return self._collection
         else:
             return None
@@ -341,6 +620,68 @@ class MongoClient:
             print("Info: You have specified an empty database '{self._database}'")
         return self
 
+    @handle_exceptions("ping")
+    def ping(self, count=PING_COUNT, concurrency=PING_CONCURRENCY, rate=None, command=PING_COMMAND):
+        """
+        Measure the round trip time to the server. The first command from
+        each thread may include connection setup so it is reported separately.
+
+        >>> c.ping(count=100, concurrency=4)
+        ping localhost:27017: 100 pings, concurrency 4, 7042 pings/s
+        setup : min 0.291 p50 0.352 p95 1.210 p99 1.210 max 1.210 jitter 0.406 ms
+        rtt   : min 0.301 p50 0.512 p95 0.871 p99 1.020 max 1.020 jitter 0.182 ms
+
+        :param count: number of commands to time
+        :param concurrency: commands in flight at once
+        :param rate: commands per second, as fast as possible if None
+        :param command: the command to send
+        :return: a PingResult, also available as `result`
+        """
+        self.process_result(ping(self._client, count=count, concurrency=concurrency,
+                                 rate=rate, command=command))
+
+    @handle_exceptions("explain")
+    def explain(self, method="find", *args, verbosity=None, **kwargs):
+        """
+        Show how the server runs a call on the default collection without
+        running it: the winning plan, the index used, keys and documents
+        examined against documents returned and the execution time.
+        Collection scans and poor selectivity are flagged.
+
+        >>> c.explain("find", {"state": "NY"}, sort=[("pop", -1)])
+        explain find demo.zipcodes (executionStats)
+        plan     : SORT -> FETCH -> IXSCAN state_1
+        index    : state_1
+        returned : 1595
+        examined : 1595 keys, 1595 docs (1.0 docs per doc returned)
+        time     : 4 ms
+
+        :param method: find, find_one, aggregate, count_documents, update_one,
+        update_many, delete_one or delete_many
+        :param args, kwargs: the arguments the method would be called with
+        :param verbosity: defaults to `explain_verbosity`
+        :return: an ExplainResult, also available as `result`. The full explain
+        document is in its `raw` attribute
+        """
+        self.process_result(run_explain(self._collection, method, args, kwargs,
+                                    verbosity=verbosity or self._explain_verbosity))
+
+    def wire_stats(self, reset=False):
+        """
+        Show what has gone over the wire since the client was created (or
+        last reset): latency percentiles, failures and retries per command
+        name, the average reply size and the documents returned per batch.
+        Only available if the client was created with `wire_stats=True`.
+
+        :param reset: clear the figures after showing them
+        """
+        if self._wire_stats is None:
+            print("Command monitoring is off, create the client with MongoClient(wire_stats=True)")
+            return
+        self._pager.paginate_lines(self._wire_stats.lines())
+        if reset:
+            self._wire_stats.reset()
+
     @handle_exceptions("is_master")
     def is_master(self):
         """
@@ -350,8 +691,66 @@ class MongoClient:
         return self._pager.paginate_doc(self._database.command("ismaster"))
 
     def count_documents(self, filter=None, *args, **kwargs):
-        filter_arg = filter or {}
-        return self.collection.count_documents(filter=filter_arg, *args, *kwargs)
+        op = OpRecord("count_documents", self.collection_name)
+        op.error = True
+        try:
+            result = self._call(op, self.collection.count_documents, (filter or {}, *args), kwargs)
+            op.error = False
+            if type(result) is ExplainResult:
+                # explain mode, show the summary as the other methods do
+                self.process_result(result)
+                return None
+            return result
+        finally:
+            self.record_op(op)
+
+    @handle_exceptions("bulk_load")
+    def bulk_load(self, source, batch_size=BULK_LOAD_BATCH_SIZE, workers=BULK_LOAD_WORKERS):
+        """
+        Insert a stream of documents into the default collection using
+        several concurrent unordered insert_many calls. Memory use is
+        bounded however many documents there are.
+
+        >>> c.bulk_load("zipcodes.jsonl", batch_size=5000, workers=8)
+        Inserted: 29353 documents in 6 batches, 0.52 seconds (56448 docs/s)
+
+        :param source: an iterable (e.g. a generator) of documents, or the name of a
+        .bson file or a JSON Lines file of extended JSON documents
+        :param batch_size: documents per insert_many call
+        :param workers: insert_many calls to run at once
+        :return: a BulkLoadResult, also available as `result`
+        """
+        loader = BulkLoader(self._collection, batch_size=batch_size, workers=workers)
+        try:
+            result = loader.load(source)
+        finally:
+            self.invalidate_results(self.collection_name)
+        self.process_result(result)
+
+    @handle_exceptions("export")
+    def export(self, path, filter=None, projection=None, format=None, compress=None,
+               batch_size=EXPORT_BATCH_SIZE, **kwargs):
+        """
+        Write the documents matching filter in the default collection to
+        a file. The pager is not used and memory use doesn't grow with the
+        number of documents.
+
+        >>> c.export("zipcodes.bson.gz", filter={"state": "NY"})
+        Exported: 1595 documents to 'zipcodes.bson.gz' (bson, 0.0 MB), 0.03 seconds (53167 docs/s, 4.0 MB/s)
+
+        :param path: file to write
+        :param filter: query filter, all documents if None
+        :param projection: fields to include or exclude
+        :param format: "jsonl" (extended JSON, one document per line) or "bson"
+        (raw documents as written by mongodump). Taken from the extension of path if None
+        :param compress: gzip the file, must agree with the name: True if path ends in .gz
+        :param batch_size: documents per batch requested from the server
+        :param kwargs: other arguments for find e.g. sort or limit
+        :return: an ExportResult, also available as `result`
+        """
+        exporter = Exporter(self._collection, batch_size=batch_size)
+        self.process_result(exporter.export(path, filter=filter, projection=projection,
+                                            format=format, compress=compress, **kwargs))
 
     def rename(self, new_name, **kwargs):
         if not self.valid_mongodb_name(new_name):
@@ -361,6 +760,8 @@ class MongoClient:
         old_name = self._collection.name
         db_name = self._collection.database.name
         self._collection.rename(new_name, **kwargs)
+        self.invalidate_results(f"{db_name}.{old_name}")
+        self.invalidate_results(f"{db_name}.{new_name}")
         print(f"renamed collection '{db_name}.{old_name}' to '{db_name}.{new_name}'")
 
     def command(self, cmd):
@@ -398,26 +799,72 @@ class MongoClient:
         else:
             print(f"'{self.collection_name}'is not a valid collection")
 
-    def _get_collections(self, db_names=None):
+    def _list_collection_names(self, db_name, timeout=None):
+        db = self.client.get_database(db_name)
+        if timeout and hasattr(pymongo, "timeout"):  # pymongo 4.2 and later
+            with pymongo.timeout(timeout):
+                return db.list_collection_names()
+        else:
+            return db.list_collection_names()
+
+    def _get_collections(self, db_names=None,
+                         workers: int = LIST_COLLECTIONS_WORKERS,
+                         timeout: float = LIST_COLLECTIONS_TIMEOUT):
         """
         Internal function to return all the collections for every database.
         include a list of db_names to filter the list of collections.
+
+        The databases are listed concurrently by a pool of `workers` threads
+        sharing this client's connection pool. Results are yielded in database
+        order as soon as each database is ready. A database that takes longer
+        than `timeout` seconds (None to wait forever) or fails is reported
+        with a single line and skipped.
         """
         if db_names:
             db_list = db_names
         else:
             db_list = self.client.list_database_names()
 
-        for db_name in db_list:
-            db = self.client.get_database(db_name)
-            for col_name in db.list_collection_names():
-                yield f"{db_name}.{col_name}"
+        db_iter = iter(db_list)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=workers,
+                                      thread_name_prefix="pymongoshell-lcols")
+
+        def submit_next():
+            db_name = next(db_iter, None)
+            if db_name is not None:
+                pending.append((db_name,
+                                executor.submit(self._list_collection_names, db_name, timeout)))
 
-    def list_collection_names(self, database_name=None):
+        try:
+            # Keep a bounded window of databases in flight
+            for _ in range(workers * 2):
+                submit_next()
+            while pending:
+                db_name, future = pending.popleft()
+                submit_next()
+                try:
+                    col_names = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    future.cancel()
+                    yield f"{db_name}: timed out after {timeout} seconds"
+                    continue
+                except pymongo.errors.PyMongoError as e:
+                    yield f"{db_name}: {e}"
+                    continue
+                for col_name in col_names:
+                    yield f"{db_name}.{col_name}"
+        finally:
+            # The pager may stop early, don't start any more work
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def list_collection_names(self, database_name=None, timeout=LIST_COLLECTIONS_TIMEOUT):
         if database_name:
-            self._pager.paginate_lines(self._get_collections([database_name]))
+            self._pager.paginate_lines(self._get_collections([database_name], timeout=timeout))
         else:
-            self._pager.paginate_lines(self._get_collections())
+            self._pager.paginate_lines(self._get_collections(timeout=timeout))
 
     @property
     def lcols(self):
@@ -462,12 +909,14 @@ class MongoClient:
 
     @handle_exceptions("drop_collections")
     def drop_collection(self, confirm=True):
+        self.invalidate_results(self.collection_name)
         if confirm and self.confirm_yes(f"Drop collection: '{self._database_name}.{self._collection_name}'"):
             return self._collection.drop()
         else:
             return self._collection.drop()
 
     def drop_database(self, confirm=True):
+        self.invalidate_results(f"{self._database_name}.")
         if confirm and self.confirm_yes(f"Drop database: '{self._database_name}'"):
             result = self._client.drop_database(self.database)
         else:
@@ -524,6 +973,183 @@ class MongoClient:
         """
         self._pager.paginate = state
 
+    @property
+    def interactive(self):
+        """
+        Get and set whether output goes to a terminal. Output is only
+        paginated when it does. None, the default, checks stdout each
+        time, so output piped into another program isn't paginated.
+
+        :return: `interactive` (True|False|None)
+        """
+        return self._pager.interactive
+
+    @interactive.setter
+    def interactive(self, state):
+        self._pager.interactive = state
+
+    @property
+    def prefetch(self):
+        """
+        Get and set the prefetch boolean. When set cursors are read ahead
+        on a background thread while a page of output is displayed.
+
+        :return: `prefetch` (True|False)
+        """
+        return self._pager.prefetch
+
+    @prefetch.setter
+    def prefetch(self, state):
+        self._pager.prefetch = state
+
+    @property
+    def lazy_decode(self):
+        """
+        Get and set the lazy_decode boolean. When set `find` and `aggregate`
+        return cursors of RawBSONDocuments and each document is only decoded
+        when the pager is about to display it. Documents that are never
+        paged to are never decoded.
+
+        :return: `lazy_decode` (True|False)
+        """
+        return self._lazy_decode
+
+    @lazy_decode.setter
+    def lazy_decode(self, state):
+        self._lazy_decode = bool(state)
+        if self._lazy_decode:
+            self._dispatch_cache = self._namespace.raw_dispatch
+        else:
+            self._dispatch_cache = self._namespace.dispatch
+
+    @property
+    def timing(self):
+        """
+        Get and set the timing boolean. When set a one line summary of the
+        time taken, documents returned and output rendered is printed
+        after each collection operation.
+
+        :return: `timing` (True|False)
+        """
+        return self._timing
+
+    @timing.setter
+    def timing(self, state):
+        self._timing = bool(state)
+
+    @property
+    def explain_mode(self):
+        """
+        Get and set the explain_mode boolean. When set find, find_one,
+        aggregate, count_documents, update_one, update_many, delete_one and
+        delete_many are not run, instead the server explains them at
+        `explain_verbosity` and a summary of the plan is shown. Writes are
+        not performed while it is set.
+
+        :return: `explain_mode` (True|False)
+        """
+        return self._explain_mode
+
+    @explain_mode.setter
+    def explain_mode(self, state):
+        self._explain_mode = bool(state)
+
+    @property
+    def explain_verbosity(self):
+        """
+        The verbosity used by `explain` and `explain_mode`, one of
+        "queryPlanner", "executionStats" (the default) or "allPlansExecution".
+        """
+        return self._explain_verbosity
+
+    @explain_verbosity.setter
+    def explain_verbosity(self, verbosity):
+        if verbosity not in EXPLAIN_VERBOSITIES:
+            raise MongoDBShellError(f"explain_verbosity must be one of {', '.join(EXPLAIN_VERBOSITIES)}")
+        self._explain_verbosity = verbosity
+
+    @property
+    def wire_reply_sizes(self):
+        """
+        Get and set the wire_reply_sizes boolean. When set, and the client
+        was created with `wire_stats=True`, the size of every reply is
+        measured for `wire_stats()`. Off by default as each reply has to be
+        encoded again to measure it.
+
+        :return: `wire_reply_sizes` (True|False)
+        """
+        return self._wire_stats is not None and self._wire_stats.reply_sizes
+
+    @wire_reply_sizes.setter
+    def wire_reply_sizes(self, state):
+        if self._wire_stats is None:
+            raise MongoDBShellError("Command monitoring is off, create the client with "
+                                    "MongoClient(wire_stats=True)")
+        self._wire_stats.reply_sizes = bool(state)
+
+    @property
+    def result_cache(self):
+        """
+        Get and set the result_cache boolean. When set repeated find_one,
+        count_documents, estimated_document_count, distinct and aggregate
+        calls are answered from memory for `result_cache_ttl` seconds.
+        Writes made through this client clear the cached results for the
+        collection they write to. Turning it off discards the cache.
+
+        :return: `result_cache` (True|False)
+        """
+        return self._result_cache is not None
+
+    @result_cache.setter
+    def result_cache(self, state):
+        if state and self._result_cache is None:
+            self._result_cache = ResultCache(ttl=self._result_cache_ttl)
+        elif not state:
+            self._result_cache = None
+
+    @property
+    def result_cache_ttl(self):
+        """
+        Seconds a cached result stays valid. Can be set while the cache is
+        off, it is used once `result_cache` is turned on.
+        """
+        return self._result_cache_ttl
+
+    @result_cache_ttl.setter
+    def result_cache_ttl(self, seconds):
+        self._result_cache_ttl = seconds
+        if self._result_cache is not None:
+            self._result_cache.ttl = seconds
+
+    @property
+    def result_cache_stats(self):
+        """
+        Entries, hits, misses, hit rate, evictions and invalidations for
+        the result cache, None if it is off.
+        """
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
+
+    def invalidate_results(self, namespace):
+        if self._result_cache is not None:
+            self._result_cache.invalidate(namespace)
+
+    @property
+    def last_op(self):
+        """
+        The OpRecord for the last collection operation.
+        """
+        return self._last_op
+
+    @property
+    def op_stats(self):
+        """
+        Timings for all the collection operations so far, by namespace and
+        method. Use `op_stats.reset()` to start again.
+        """
+        return self._op_stats
+
     @property
     def output_file(self):
         """
@@ -594,13 +1220,18 @@ class MongoClient:
         else:
             return None
 
-    def process_result(self, result):
+    def process_result(self, result, elapsed: float = None):
+        """
+        Render result and keep it as `result`.
+
+        :param elapsed: seconds the call took, shown in write summaries if given
+        """
         if result is None:
             print("None")
-        elif type(result) in [pymongo.command_cursor.CommandCursor, pymongo.cursor.Cursor]:
+        elif type(result) in CURSOR_TYPES:
             self._pager.print_cursor(result)
         elif self._handle_result.is_result_type(result):
-            self._handle_result.handle(result)
+            self._handle_result.handle(result, elapsed)
         elif type(result) is dict:
             self._pager.paginate_doc(result)
         elif type(result) is list:
@@ -614,15 +1245,78 @@ class MongoClient:
     def result(self):
         return self._result
 
+    def record_op(self, op: OpRecord):
+        self._last_op = op
+        self._op_stats.add(op)
+        if self._timing:
+            print(op.footer())
+
+    def _invoke(self, namespace: str, func, args, kwargs):
+        """
+        Call func(*args, **kwargs), or explain it in `explain_mode`, going
+        through the result cache if it is on.
+        """
+        if self._explain_mode and func.__name__ in EXPLAIN_METHODS:
+            return run_explain(func.__self__, func.__name__, args, kwargs, verbosity=self._explain_verbosity)
+        if self._result_cache is None:
+            return func(*args, **kwargs)
+        return self._result_cache.call(namespace, func, args, kwargs)
+
+    def _call(self, op: OpRecord, func, args, kwargs):
+        """
+        Call func(*args, **kwargs), through the result cache if it is on,
+        and fill in op.call_time and op.server_time. Nothing is rendered.
+        """
+        listener = self._wire_stats
+        if listener is not None:
+            server_before = listener.thread_server_time()
+        start = time.perf_counter()
+        try:
+            return self._invoke(op.namespace, func, args, kwargs)
+        finally:
+            op.call_time = time.perf_counter() - start
+            if listener is not None:
+                op.server_time = (listener.thread_server_time() - server_before) / 1_000_000
+
     def interceptor(self, func):
         assert callable(func)
+        namespace = self.collection_name
 
         @handle_exceptions(func.__name__)
         @wraps(func)
         def inner_func(*args, **kwargs):
             # print(f"{func.__name__}({args}, {kwargs})")
-            result = func(*args, **kwargs)
-            self.process_result(result)
+            op = OpRecord(func.__name__, namespace)
+            pager = self._pager
+            docs_before = pager.docs_rendered
+            bytes_before = pager.bytes_rendered
+            listener = self._wire_stats
+            if listener is not None:
+                server_before = listener.thread_server_time()
+            start = time.perf_counter()
+            called = None
+            op.error = True
+            try:
+                result = self._invoke(namespace, func, args, kwargs)
+                called = time.perf_counter()
+                self.process_result(result, elapsed=called - start)
+                op.error = False
+            finally:
+                end = time.perf_counter()
+                if called is None:
+                    op.call_time = end - start
+                else:
+                    op.call_time = called - start
+                    op.render_time = end - called
+                op.bytes_rendered = pager.bytes_rendered - bytes_before
+                if listener is not None:
+                    op.server_time = (listener.thread_server_time() - server_before) / 1_000_000
+                if not op.error:
+                    if type(result) in CURSOR_TYPES:
+                        op.docs = pager.docs_rendered - docs_before
+                    else:
+                        op.docs = affected_count(result)
+                self.record_op(op)
 
         # print(f"inner_func.__name__ : {inner_func.__name__}")
         return inner_func
@@ -631,18 +1325,52 @@ class MongoClient:
         if self._collection is None:
             return self._set_collection(item)
         else:
+            # Fast path: a method we have already wrapped for this collection.
+            wrapper = self._dispatch_cache.get(item)
+            if wrapper is not None:
+                return wrapper
             db_name, col_name = self.parse_full_name(item)
             # print(f"item:{item}")
             # print(f"col_name:{col_name}")
-            func = self.has_attr(self._collection, col_name)
+            if self._lazy_decode and col_name in LAZY_DECODE_METHODS:
+                func = self.has_attr(self._namespace.raw_collection, col_name)
+            else:
+                func = self.has_attr(self._collection, col_name)
             if callable(func):
-                return self.interceptor(func)
+                wrapper = self.interceptor(func)
+                self._dispatch_cache[item] = wrapper
+                return wrapper
             else:
                 self._collection = self._set_collection(item)
                 return self
 
+    def close(self):
+        """
+        Release the pymongo client. A shared client is only closed once
+        every MongoClient using it has been closed. The object can't be
+        used afterwards.
+        """
+        client = self.__dict__.get("_client")
+        if client is None or client is CLOSED_CLIENT:
+            return
+        object.__setattr__(self, "_client", CLOSED_CLIENT)
+        object.__setattr__(self, "_database", CLOSED_CLIENT)
+        object.__setattr__(self, "_collection", CLOSED_CLIENT)
+        object.__setattr__(self, "_namespace", None)
+        object.__setattr__(self, "_dispatch_cache", {})
+        if "_namespace_cache" in self.__dict__:
+            self._namespace_cache.clear()
+        if self._result_cache is not None:
+            self._result_cache.clear()
+        if self._private_client:
+            client.close()
+        else:
+            CLIENT_REGISTRY.release(client)
+
     def __del__(self):
-        self._pager.close()
+        self.close()
+        if "_pager" in self.__dict__:
+            self._pager.close()
 
     def __getitem__(self, name):
         self._set_collection(name)
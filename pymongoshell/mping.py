@@ -1,36 +1,63 @@
 """
 Author : joe@joedrumgoole.com
 
-MPing : Ping a MongoDB server with an is_master command.
+MPing : Measure the round trip latency to a MongoDB server.
+
+Sends a number of `ping` commands (cheap, no auth needed) at a
+configurable rate and concurrency and reports min/p50/p95/p99/max
+and jitter. Connection setup is reported separately from steady
+state round trip times. Use --json to save the results.
+
+    $ python -m pymongoshell.mping mongodb://localhost:27017 --count 1000 --concurrency 4
+    $ python -m pymongoshell.mping --rate 50 --json latency.json
 
 """
 
-import pymongo
-from pymongo.errors import ConnectionFailure
-from datetime import datetime
-import pprint
+import argparse
+import json
 import sys
 
-if __name__ == "__main__":
+import pymongo
 
-    arg = None
+from pymongoshell.latency import ping, PING_COUNT, PING_CONCURRENCY, PING_COMMAND
 
-    if len(sys.argv) > 1:
-        arg = sys.argv[1]
+if __name__ == "__main__":
 
-    client = pymongo.MongoClient(host=arg)
+    parser = argparse.ArgumentParser(description="Measure round trip latency to a MongoDB server")
+    parser.add_argument("host", nargs="?", default="mongodb://localhost:27017",
+                        help="MongoDB URI [default: %(default)s]")
+    parser.add_argument("--count", type=int, default=PING_COUNT,
+                        help="number of pings to time [default: %(default)s]")
+    parser.add_argument("--concurrency", type=int, default=PING_CONCURRENCY,
+                        help="pings in flight at once [default: %(default)s]")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="pings per second, as fast as possible if not set")
+    parser.add_argument("--command", default=PING_COMMAND,
+                        help="command to send [default: %(default)s]")
+    parser.add_argument("--timeout", type=int, default=5000,
+                        help="server selection timeout in ms [default: %(default)s]")
+    parser.add_argument("--json", default=None,
+                        help="write the results as JSON to this file, '-' for stdout")
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(host=args.host, serverSelectionTimeoutMS=args.timeout)
     try:
-        # The ismaster command is cheap and does not require auth.
-        start = datetime.utcnow()
-        doc = client.admin.command('ismaster')
-        end = datetime.utcnow()
-
-        duration = end - start
-        print(f"ismaster took : {duration}")
-        pprint.pprint(doc)
-
-    except ConnectionFailure:
-        end = datetime.utcnow()
-        print("Server not available")
-        duration = end - start
-        print(f"connection failure took : {duration}")
+        result = ping(client, count=args.count, concurrency=args.concurrency,
+                      rate=args.rate, command=args.command, host=args.host)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        client.close()
+
+    if args.json == "-":
+        json.dump(result.to_dict(), sys.stdout, indent=2)
+        print()
+    else:
+        print(result)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(result.to_dict(), f, indent=2)
+            print(f"results written to '{args.json}'")
+
+    if not result.available or (result.errors and not result.rtt.count):
+        sys.exit(1)
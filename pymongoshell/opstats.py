@@ -0,0 +1,185 @@
+"""
+OpStats
+====================================
+Timing and volume figures for the collection operations run through
+`MongoClient.interceptor`.
+
+Each call produces an `OpRecord` (available as `c.last_op`) and is
+added to an `OpStats` table (`c.op_stats`) that aggregates calls by
+namespace and method.
+
+"""
+
+import datetime
+
+import pymongo
+
+
+def affected_count(result):
+    """
+    The number of documents returned or changed by a call that returned
+    result, None if that can't be told from the result alone (cursors are
+    counted as they are rendered).
+    """
+    if getattr(result, "acknowledged", True) is False:  # unacknowledged write
+        return None
+    if type(result) is pymongo.results.InsertOneResult:
+        return 1
+    elif type(result) is pymongo.results.InsertManyResult:
+        return len(result.inserted_ids)
+    elif type(result) is pymongo.results.UpdateResult:
+        return result.modified_count + (0 if result.upserted_id is None else 1)
+    elif type(result) is pymongo.results.DeleteResult:
+        return result.deleted_count
+    elif type(result) is pymongo.results.BulkWriteResult:
+        return result.inserted_count + result.upserted_count + \
+               result.modified_count + result.deleted_count
+    elif isinstance(result, dict):
+        return 1
+    elif type(result) is list:
+        return len(result)
+    else:
+        return None
+
+
+def format_bytes(n: int) -> str:
+    if n < 1024:
+        return f"{n} B"
+    elif n < 1024 * 1024:
+        return f"{n / 1024:.1f} KB"
+    else:
+        return f"{n / (1024 * 1024):.1f} MB"
+
+
+class OpRecord:
+    """
+    One intercepted call. Times are in seconds. `call_time` is the time
+    spent in the pymongo method and `render_time` the time spent
+    displaying the result, which for a cursor includes fetching the
+    documents from the server. `server_time` is filled in when the server
+    reports it.
+    """
+
+    def __init__(self, method: str, namespace: str):
+        self.method = method
+        self.namespace = namespace
+        self.started = datetime.datetime.utcnow()
+        self.call_time = 0.0
+        self.render_time = 0.0
+        self.server_time = None
+        self.docs = None
+        self.bytes_rendered = 0
+        self.error = False
+
+    @property
+    def elapsed(self):
+        return self.call_time + self.render_time
+
+    def footer(self) -> str:
+        """
+        A one line summary in the style of psql's \\timing.
+        """
+        parts = [f"call {self.call_time * 1000:.3f} ms",
+                 f"render {self.render_time * 1000:.3f} ms"]
+        if self.server_time is not None:
+            parts.append(f"server {self.server_time * 1000:.3f} ms")
+        line = f"Time: {self.elapsed * 1000:.3f} ms ({', '.join(parts)})"
+        if self.docs is not None:
+            line = f"{line}, {self.docs} docs"
+        if self.bytes_rendered:
+            line = f"{line}, {format_bytes(self.bytes_rendered)}"
+        if self.error:
+            line = f"{line}, failed"
+        return line
+
+    def __repr__(self):
+        return f"OpRecord(method='{self.method}', namespace='{self.namespace}', " \
+               f"elapsed={self.elapsed:.6f}, docs={self.docs}, " \
+               f"bytes_rendered={self.bytes_rendered}, error={self.error})"
+
+
+class OpSummary:
+    """
+    Running totals for one method on one namespace.
+    """
+
+    def __init__(self, namespace: str, method: str):
+        self.namespace = namespace
+        self.method = method
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.min_time = None
+        self.max_time = None
+        self.docs = 0
+        self.bytes_rendered = 0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def add(self, op: OpRecord):
+        self.calls = self.calls + 1
+        if op.error:
+            self.errors = self.errors + 1
+        elapsed = op.elapsed
+        self.total_time = self.total_time + elapsed
+        if self.min_time is None or elapsed < self.min_time:
+            self.min_time = elapsed
+        if self.max_time is None or elapsed > self.max_time:
+            self.max_time = elapsed
+        self.docs = self.docs + (op.docs or 0)
+        self.bytes_rendered = self.bytes_rendered + op.bytes_rendered
+
+
+class OpStats:
+    """
+    OpRecords aggregated by (namespace, method).
+
+    >>> c.op_stats
+    namespace      method    calls errors   mean ms    max ms     docs    rendered
+    demo.zipcodes  find          3      0    41.230    80.102     1200    270.4 KB
+    demo.zipcodes  find_one      2      0     0.871     1.013        2       168 B
+    """
+
+    def __init__(self):
+        self._summaries = {}
+
+    def add(self, op: OpRecord):
+        key = (op.namespace, op.method)
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = OpSummary(op.namespace, op.method)
+            self._summaries[key] = summary
+        summary.add(op)
+
+    def get(self, namespace: str, method: str) -> OpSummary:
+        return self._summaries.get((namespace, method))
+
+    def reset(self):
+        self._summaries = {}
+
+    def __len__(self):
+        return len(self._summaries)
+
+    def __iter__(self):
+        return iter(self._summaries.values())
+
+    def lines(self):
+        if not self._summaries:
+            yield "no operations recorded"
+            return
+        ns_width = max(len("namespace"), *(len(s.namespace) for s in self))
+        method_width = max(len("method"), *(len(s.method) for s in self))
+        yield f"{'namespace':<{ns_width}}  {'method':<{method_width}} {'calls':>6} {'errors':>6} " \
+              f"{'mean ms':>9} {'max ms':>9} {'docs':>8} {'rendered':>11}"
+        for s in self:
+            yield f"{s.namespace:<{ns_width}}  {s.method:<{method_width}} {s.calls:>6} {s.errors:>6} " \
+                  f"{s.mean_time * 1000:>9.3f} {s.max_time * 1000:>9.3f} {s.docs:>8} " \
+                  f"{format_bytes(s.bytes_rendered):>11}"
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+    def __repr__(self):
+        return str(self)
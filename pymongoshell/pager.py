@@ -1,8 +1,23 @@
-import shutil
-import pprint
+import re
+import sys
 from datetime import datetime
+from itertools import count
 
+import bson
 import pymongo
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
+
+from pymongoshell.prefetch import Prefetcher
+from pymongoshell.render import DocRenderer
+from pymongoshell.sink import OutputSink, SINK_BUFFER_SIZE, FLUSH_CALL
+from pymongoshell.spool import SpooledLines
+from pymongoshell.terminal import TERMINAL_SIZE
+from pymongoshell.wrap import row_end, wrap_offsets
+
+
+# Lines joined into each write when output isn't paginated.
+WRITE_BATCH_LINES = 512
 
 
 class QuitPaginateException(Exception):
@@ -83,10 +98,15 @@ class Pager:
 
     def __init__(self,
                  paginate: bool = True,
-                 paginate_prompt: str = "Hit Return to continue (q or quit to exit)",
+                 paginate_prompt: str = "Hit Return to continue, b back, /pattern search, gN line N, q quit",
                  output_filename: str = None,
                  line_numbers: bool = True,
-                 pretty_print: bool = True):
+                 pretty_print: bool = True,
+                 prefetch: bool = False,
+                 output_buffer_size: int = SINK_BUFFER_SIZE,
+                 output_flush_policy: str = FLUSH_CALL,
+                 output_background: bool = False,
+                 interactive: bool = None):
         """
 
         :param paginate: paginate at terminal boundaries
@@ -94,15 +114,32 @@ class Pager:
         :param line_number: if 0 no line numbers are emitted. If 1 or more
         start line_numbers from that point and auto increment with
         line_number function.
+        :param prefetch: read cursors ahead on a background thread in print_cursor
+        :param output_buffer_size: characters buffered before writing to the output file
+        :param output_flush_policy: when the output file is flushed, see pymongoshell.sink
+        :param output_background: write the output file from a background thread
+        :param interactive: whether output goes to a person at a terminal. If it
+        doesn't there is nobody to answer the prompt so output isn't paginated.
+        None (the default) checks whether stdout is a terminal on each call.
 
         """
         self._paginate = paginate
         self._output_filename = output_filename
         self._output_file = None
-        self._line_numbers = True
+        self._line_numbers = line_numbers
         self._line_count = LineNumbers()
         self._paginate_prompt = paginate_prompt
         self._pretty_print = pretty_print
+        self._prefetch = prefetch
+        self._renderer = DocRenderer()
+        self._codec_options = DEFAULT_CODEC_OPTIONS
+        self._output_buffer_size = output_buffer_size
+        self._output_flush_policy = output_flush_policy
+        self._output_background = output_background
+        self._interactive = interactive
+        # Running totals, read before and after a call to see what it rendered.
+        self._docs_rendered = 0
+        self._bytes_rendered = 0
 
         assert type(paginate_prompt) is str
 
@@ -110,6 +147,7 @@ class Pager:
     def line_numbers(self):
         return self._line_numbers
 
+    @line_numbers.setter
     def line_numbers(self, state):
         self._line_numbers = state
 
@@ -143,6 +181,99 @@ class Pager:
     def pretty_print(self, state):
         self._pretty_print = state
 
+    @property
+    def prefetch(self):
+        return self._prefetch
+
+    @prefetch.setter
+    def prefetch(self, state):
+        self._prefetch = state
+
+    @property
+    def output_buffer_size(self):
+        return self._output_buffer_size
+
+    @output_buffer_size.setter
+    def output_buffer_size(self, size):
+        """
+        Takes effect the next time an output file is opened.
+        """
+        self._output_buffer_size = size
+
+    @property
+    def output_flush_policy(self):
+        return self._output_flush_policy
+
+    @output_flush_policy.setter
+    def output_flush_policy(self, policy):
+        """
+        Takes effect the next time an output file is opened.
+        """
+        self._output_flush_policy = policy
+
+    @property
+    def output_background(self):
+        return self._output_background
+
+    @output_background.setter
+    def output_background(self, state):
+        """
+        Takes effect the next time an output file is opened.
+        """
+        self._output_background = state
+
+    @property
+    def interactive(self):
+        return self._interactive
+
+    @interactive.setter
+    def interactive(self, state):
+        """
+        :param state: True or False to force it, None to check stdout
+        """
+        self._interactive = state
+
+    def is_interactive(self) -> bool:
+        if self._interactive is None:
+            try:
+                return sys.stdout.isatty()
+            except (AttributeError, ValueError):  # no isatty or closed
+                return False
+        return self._interactive
+
+    @property
+    def docs_rendered(self):
+        """
+        Documents taken from cursors for display since the Pager was created.
+        """
+        return self._docs_rendered
+
+    @property
+    def bytes_rendered(self):
+        """
+        Characters of output (including newlines) since the Pager was created.
+        """
+        return self._bytes_rendered
+
+    def make_sink(self, name, mode):
+        return OutputSink(name,
+                          mode=mode,
+                          buffer_size=self._output_buffer_size,
+                          flush_policy=self._output_flush_policy,
+                          background=self._output_background)
+
+    @property
+    def codec_options(self):
+        """
+        The codec options used to decode RawBSONDocuments just before
+        they are displayed.
+        """
+        return self._codec_options
+
+    @codec_options.setter
+    def codec_options(self, codec_options):
+        self._codec_options = codec_options
+
     def close(self):
         if self._output_file and not self._output_file.closed:
             self._output_file.write(f"# closing '{self._output_filename}' {datetime.utcnow()}\n")
@@ -152,7 +283,7 @@ class Pager:
     def open(self, name):
         self.close()
         if name:
-            self._output_file = open(name, "w+")
+            self._output_file = self.make_sink(name, "w")
             self._output_filename = name
             self._output_file.write(f"# opening '{name}' {datetime.utcnow()}\n")
             self._output_file.flush()
@@ -199,22 +330,14 @@ class Pager:
     def line_to_box(self, line: str, width: int = 80) -> list:
         """
         Take a line and split into separate lines at width boundaries making
-        a box of line * width dimensions
+        a box of line * width dimensions. Width is counted in terminal cells
+        so wide characters take two and combining marks none.
 
         :param line: A string of input
         :param width: the size of the terminal in columns
         :return: A list of strings split at width boundaries from line
         """
-        lines: list = []
-        while len(line) > width:
-            segment: str = line[0:width]
-            lines.append(segment)
-            line: str = line[width:]
-
-        if len(line) > 0:
-            lines.append(line)
-
-        return lines
+        return [line[start:end] for start, end in wrap_offsets(line, width)]
 
     def line_to_paragraph(self, line: str, width: int = 80, line_number: int = 0) -> list:
         """
@@ -228,27 +351,30 @@ class Pager:
         :return: A list of strings split at width boundaries from line
         """
         lines: list = []
-        prefix = self.prefix(line_number)
-
-        while len(prefix) + len(line) > width:
-            if len(prefix) < width:
-                segment: str = prefix + line[0:width - len(prefix)]
-                lines.append(segment)
-                line: str = line[width - len(prefix):]
-                line_number = line_number + 1
-                prefix = self.prefix(line_number)
-            else:
-                segment: str = self.prefix(line_number)[0:width]
-                lines.append(segment)
-                line: str = ""
-        if len(line) > 0:
-            lines.append(self.prefix(line_number) + line)
+        start = 0
+        while start < len(line):
+            prefix = self.prefix(line_number)
+            if len(prefix) >= width:
+                lines.append(prefix[0:width])
+                break
+            end = row_end(line, start, width - len(prefix))
+            lines.append(prefix + line[start:end])
+            start = end
+            line_number = line_number + 1
 
         return lines
 
     @staticmethod
     def get_terminal_cols_lines(default_columns=None, default_lines=None):
-        terminal_columns, terminal_lines = shutil.get_terminal_size(fallback=(80, 24))
+        """
+        The terminal size, with either dimension overridden by a default.
+        The terminal is only asked for its size again after it is resized,
+        see pymongoshell.terminal.
+        """
+        if default_columns and default_lines:
+            return default_columns, default_lines
+
+        terminal_columns, terminal_lines = TERMINAL_SIZE.get()
 
         if default_lines:
             terminal_lines = default_lines
@@ -264,9 +390,10 @@ class Pager:
                 print(f"{line_counter}", end="")
             else:
                 print(f"{line_counter}")
-        user_input = input()
-        if user_input.lower().strip() in ["q", "quit", "exit"]:
+        user_input = input().strip()
+        if user_input.lower() in ["q", "quit", "exit"]:
             raise QuitPaginateException
+        return user_input
 
     def make_page(self,
                   lines: list,
@@ -296,7 +423,6 @@ class Pager:
             # and the line[0:terminal_width - line_number_width].
             if self._output_file:
                 self._output_file.write(f"{l}\n")
-                self._output_file.flush()
 
             multi_lines = self.line_to_box(l, terminal_columns)
             lines_consumed = lines_consumed + 1
@@ -327,6 +453,187 @@ class Pager:
         if chunk:
             yield chunk
 
+    def take_line(self, line: str):
+        """
+        Count a line pulled for display and copy it to the output file
+        if there is one.
+        """
+        self._bytes_rendered = self._bytes_rendered + len(line) + 1
+        if self._output_file:
+            self._output_file.write(f"{line}\n")
+
+    def page_geometry(self, top_row: int,
+                      default_terminal_cols: int = None,
+                      default_terminal_lines: int = None):
+        """
+        The layout of a page starting at top_row on the terminal as it is now.
+
+        :return: (prompt lines, page height, line number width, row width)
+        """
+        terminal_columns, terminal_lines = Pager.get_terminal_cols_lines(default_terminal_cols,
+                                                                         default_terminal_lines)
+        prompt_lines = self.line_to_box(self._paginate_prompt, terminal_columns)
+        page_height = terminal_lines - len(prompt_lines)
+        if page_height < 2:
+            raise PaginationError("Only 1 display line for output, I need at least two")
+
+        if self._line_numbers:
+            # Same widths as make_numbers_column for this page.
+            number_width = len(str(top_row + terminal_lines - 2)) + 1
+            row_width = terminal_columns - len(Pager.indented_number(top_row + terminal_lines))
+        else:
+            number_width = 0
+            row_width = terminal_columns
+        return prompt_lines, page_height, number_width, max(row_width, 1)
+
+    @staticmethod
+    def show_page(spooled: SpooledLines, position: tuple, page_height: int,
+                  number_width: int, row_width: int):
+        """
+        Print up to page_height rows starting at position. The line after
+        the page is pulled too so its row is known before it is shown.
+
+        :param position: (line index, offset, row) of the first row
+        :return: the number of rows printed and the position after them
+        """
+        index, offset, row = position
+        printed = 0
+        line = spooled.get(index)
+        while line is not None and printed < page_height:
+            end = row_end(line, offset, row_width)
+            text = line[offset:end] if offset or end < len(line) else line
+            if number_width:
+                print(f"{row:<{number_width}}: {text}")
+            else:
+                print(text)
+            row = row + 1
+            printed = printed + 1
+            if end < len(line):
+                offset = end
+            else:
+                index = index + 1
+                offset = 0
+                line = spooled.get(index)
+                if line is not None:
+                    spooled.note_row(index, row)
+        return printed, (index, offset, row)
+
+    def paginate_stream(self, lines,
+                        default_terminal_cols: int = None,
+                        default_terminal_lines: int = None):
+        """
+        Page through lines a screen at a time. Input is pulled lazily and
+        each line is only split into rows as it is displayed, so the work
+        done is constant per output row regardless of the size of the input.
+        Rows are measured in terminal cells, see pymongoshell.wrap.
+        The screen geometry is checked at the start of every page so a
+        resize takes effect on the next page.
+
+        Lines are spooled as they are pulled (see pymongoshell.spool) so
+        as well as Return and q the prompt takes:
+
+            b          back a page
+            gN or :N   go to line N
+            /pattern   search forward for a regular expression
+            ?pattern   search backward
+            n          repeat the last search
+
+        :param lines: An iterable of lines
+        :param default_terminal_cols: override the terminal width
+        :param default_terminal_lines: override the terminal height
+        """
+        spooled = SpooledLines(lines, self.take_line)
+        try:
+            position = (0, 0, 1)  # line index, offset in the line, row
+            browsing = False
+            search = None
+            while spooled.get(position[0]) is not None:
+                prompt_lines, page_height, number_width, row_width = \
+                    self.page_geometry(position[2], default_terminal_cols, default_terminal_lines)
+                printed, following = Pager.show_page(spooled, position, page_height,
+                                                     number_width, row_width)
+                # A short page is the end of the output unless we've been moving about.
+                if printed < page_height and not browsing:
+                    return
+
+                command = Pager.input_prompt(prompt_lines)
+                jump = re.fullmatch(r"[g:](\d*)", command)
+                if command == "b":
+                    browsing = True
+                    position = spooled.position(position[2] - page_height, row_width)
+                elif jump:
+                    browsing = True
+                    position = spooled.position(int(jump.group(1) or 1), row_width)
+                elif command[:1] in ("/", "?") or (command == "n" and search):
+                    if command != "n":
+                        search = (command[1:], command[0] == "?")
+                    pattern, backward = search
+                    start = position[0] - 1 if backward else position[0] + 1
+                    try:
+                        found = spooled.find(pattern, start, backward)
+                    except re.error as e:
+                        print(f"Bad pattern '{pattern}': {e}")
+                        continue
+                    if found is None:
+                        print(f"Pattern not found: {pattern}")
+                        continue
+                    browsing = True
+                    position = (found, 0, spooled.first_row(found, row_width))
+                else:
+                    position = following
+        finally:
+            spooled.close()
+
+    def print_stream(self, lines):
+        """
+        Print lines straight through with no pauses, a line at a time so
+        each one appears on the terminal as soon as it is rendered.
+
+        :param lines: An iterable of lines
+        """
+        line_number = 1
+        for l in lines:
+            self._bytes_rendered = self._bytes_rendered + len(l) + 1
+            if self._line_numbers:
+                print(f"{line_number} : {l}")
+                line_number = line_number + 1
+            else:
+                print(l)
+            if self._output_file:
+                self._output_file.write(f"{l}\n")
+
+    def write_chunk(self, chunk: list, numbers):
+        text = "\n".join(chunk)
+        self._bytes_rendered = self._bytes_rendered + len(text) + 1
+        if self._output_file:
+            self._output_file.write(f"{text}\n")
+        if self._line_numbers:
+            # chunk first so zip stops without taking a number past its end
+            text = "\n".join([f"{n} : {l}" for l, n in zip(chunk, numbers)])
+        sys.stdout.write(f"{text}\n")
+
+    def write_stream(self, lines):
+        """
+        Write lines straight through for output that isn't going to a
+        terminal. Lines are numbered and joined WRITE_BATCH_LINES at a
+        time so each batch takes one write to stdout (and one to the
+        output file). Lines already read are written even if reading
+        the rest fails or is interrupted.
+
+        :param lines: An iterable of lines
+        """
+        numbers = count(1)
+        chunk = []
+        try:
+            for line in lines:
+                chunk.append(line)
+                if len(chunk) == WRITE_BATCH_LINES:
+                    self.write_chunk(chunk, numbers)
+                    chunk = []
+        finally:
+            if chunk:
+                self.write_chunk(chunk, numbers)
+
     def paginate_lines(self, lines,
                        default_terminal_cols: int = None,
                        default_terminal_lines: int = None):
@@ -341,6 +648,10 @@ class Pager:
         `paginate` : Is on by default and triggers pagination. Without `paginate`
         all output is written straight to the screen.
 
+        `interactive` : Output is only paginated when it goes to a terminal,
+        when stdout is a pipe or a file it is written in large batches.
+        Unpaginated output to a terminal is printed a line at a time.
+
         `output_file` : By assigning a name to this property we can ensure that
         all output is sent to the corresponding file. Prompts are not output.
 
@@ -357,53 +668,18 @@ class Pager:
         :return: paginated output
         """
         try:
-            if self._output_filename:
-                self._output_file = open(self._output_filename, "a+")
-
-            line_number = 1
-            residual_lines = []
-            terminal_columns, terminal_lines = Pager.get_terminal_cols_lines(default_terminal_cols,
-                                                                             default_terminal_lines)
-            for page_lines in Pager.line_chunker(lines, terminal_lines):
-                if self._paginate:
-                    residual_lines.extend(page_lines)
-                    page_lines = residual_lines
-                    terminal_columns, terminal_lines = Pager.get_terminal_cols_lines(default_terminal_cols,
-                                                                                     default_terminal_lines)
-                    prompt_lines = self.line_to_box(self._paginate_prompt,
-                                                    terminal_columns)
-                    if self.line_numbers:
-                        number_prefix_width = len(Pager.indented_number(line_number + terminal_lines))
-                    else:
-                        number_prefix_width = 0
-
-                    output_lines, residual_lines = self.make_page(page_lines,
-                                                                  terminal_columns - number_prefix_width,
-                                                                  terminal_lines - len(prompt_lines))
-                    if self.line_numbers:
-                        line_number_column = Pager.make_numbers_column(line_number,
-                                                                       default_terminal_cols,
-                                                                       default_terminal_lines)
-
-                        for number, line in zip(line_number_column, output_lines):
-                            print(f"{number}{line}")
-                            line_number = line_number + 1
-                    else:
-                        for line in output_lines:
-                            print(f"{line}")
-                            line_number = line_number + 1
-
-                    if len(output_lines) == (terminal_lines - len(prompt_lines)):
-                        Pager.input_prompt(prompt_lines)
-                else:
-                    for l in page_lines:
-                        if self.line_numbers:
-                            print(f"{line_number} : {l}")
-                            line_number = line_number + 1
-                        else:
-                            print(l)
-                        if self.output_file:
-                            self._output_file.write(f"{l}\n")
+            # The output file stays open across calls, it is only opened here
+            # if a name was given to the constructor.
+            if self._output_filename and not self._output_file:
+                self._output_file = self.make_sink(self._output_filename, "a")
+
+            interactive = self.is_interactive()
+            if self._paginate and interactive:
+                self.paginate_stream(lines, default_terminal_cols, default_terminal_lines)
+            elif interactive:
+                self.print_stream(lines)
+            else:
+                self.write_stream(lines)
         except QuitPaginateException:
             pass
 
@@ -411,52 +687,49 @@ class Pager:
             print("ctrl-C...")
         finally:
             if self._output_file:
-                self._output_file.close()
+                self._output_file.end_call()
 
     def dict_to_lines(self, d, format_func=None):
         """
         Generator that converts a doc to a sequence of lines.
         :param d: A dictionary
-        :param format_func: customisable formatter defaults to pformat
+        :param format_func: customisable formatter defaults to the pformat layout
         :return: a generator yielding a line at a time
         """
         if format_func:
             for l in format_func(d).splitlines():
                 yield l
         elif self._pretty_print:
-            for l in pprint.pformat(d).splitlines():
-                yield l
+            yield from self._renderer.lines(d)
         else:
             for l in str(d).splitlines():
                 yield l
 
     @staticmethod
-    def list_to_line_gen(l: list):
-        open_bracket = "["
-        close_bracket = "]"
-        for i, elem in enumerate(l):
-            if i == 0:
-                elem = f"{open_bracket}{elem},"
-            if i == (len(l) - 1):
-                elem = f"{elem}{close_bracket}"
-            yield f"{elem},"
+    def list_to_lines(l):
+        """
+        Generator yielding one line per element of l, bracketed as
+        "[first,", "second,", ... "last]". Only one element is held at a
+        time so memory use doesn't depend on the length of l, which can be
+        any iterable.
 
-    @staticmethod
-    def list_to_lines(l: list):
+        :param l: a list or other iterable
+        :return: a generator yielding a line at a time
+        """
+        elements = iter(l)
+        end = object()
+        current = next(elements, end)
+        if current is end:
+            yield "[]"
+            return
         open_bracket = "["
-        close_bracket = "]"
-        result = []
-        for i, elem in enumerate(l):
-            if i == 0:
-                result.append(f"{open_bracket}{elem},")
-            elif i == (len(l) - 1):
-                result.append(f"{elem}{close_bracket}")
-            else:
-                result.append(f"{elem},")
-        if len(result) == 0:
-            return [str(result)]
-        else:
-            return result
+        for following in elements:
+            yield f"{open_bracket}{current},"
+            open_bracket = ""
+            current = following
+        yield f"{open_bracket}{current}]"
+
+    list_to_line_gen = list_to_lines
 
     def paginate_list(self, l):
         return self.paginate_lines(Pager.list_to_lines(l))
@@ -476,12 +749,29 @@ class Pager:
         Take a cursor that returns a list of docs and returns a
         generator yield each line of each doc a line at a time.
 
-        :param cursor: A mongodb cursor yielding docs (dictionaries)
+        :param cursor: A mongodb cursor yielding docs (dictionaries or RawBSONDocuments)
         :param format_func: A customisable format function, expects and returns a doc
         :return: a generator yielding a line at a time
         """
         for doc in cursor:
+            self._docs_rendered = self._docs_rendered + 1
+            if type(doc) is RawBSONDocument:
+                # decoded only now that it is about to be displayed
+                doc = bson.decode(doc.raw, codec_options=self._codec_options)
             yield from self.dict_to_lines(doc, format_func)
 
     def print_cursor(self, cursor, format_func=None):
-        return self.paginate_lines(self.cursor_to_lines(cursor, format_func))
+        """
+        Paginate the docs returned by cursor. If `prefetch` is set the cursor
+        is read ahead on a background thread while the current page is
+        displayed. The read ahead stops as soon as pagination ends, whether
+        the cursor is exhausted or the user quits.
+        """
+        if self._prefetch:
+            prefetcher = Prefetcher(cursor)
+            try:
+                return self.paginate_lines(self.cursor_to_lines(prefetcher, format_func))
+            finally:
+                prefetcher.close()
+        else:
+            return self.paginate_lines(self.cursor_to_lines(cursor, format_func))
@@ -0,0 +1,120 @@
+"""
+Prefetcher
+====================================
+Read ahead from a cursor on a background thread so the next batch
+of documents has already been fetched and decoded by the time the
+pager asks for it.
+
+"""
+
+import queue
+import threading
+
+# Documents handed from the background thread to the reader in one go.
+PREFETCH_BATCH_SIZE = 100
+# Maximum number of batches held ahead of the reader.
+PREFETCH_MAX_BATCHES = 4
+# How long the background thread waits on a full queue before checking
+# whether it has been cancelled.
+PREFETCH_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class PrefetchError:
+    """
+    Carries an exception raised by the source from the background
+    thread to the reader.
+    """
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+class Prefetcher:
+    """
+    Wrap an iterable (typically a pymongo cursor) and iterate it on a
+    background thread, keeping at most `max_batches` batches of `batch_size`
+    items ahead of the reader. The source is only touched by the
+    background thread, which closes it when iteration ends or when
+    `close()` is called.
+
+    >>> p = Prefetcher(collection.find())
+    >>> for doc in p:
+    ...     print(doc)
+    >>> p.close()
+    """
+
+    def __init__(self, source,
+                 batch_size: int = PREFETCH_BATCH_SIZE,
+                 max_batches: int = PREFETCH_MAX_BATCHES):
+        self._source = source
+        self._batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name="pymongoshell-prefetch",
+                                        daemon=True)
+        self._thread.start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _put(self, item):
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=PREFETCH_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            batch = []
+            for item in self._source:
+                if self._cancelled.is_set():
+                    return
+                batch.append(item)
+                if len(batch) == self._batch_size:
+                    if not self._put(batch):
+                        return
+                    batch = []
+            if batch:
+                self._put(batch)
+        except BaseException as e:
+            self._put(PrefetchError(e))
+        finally:
+            close = getattr(self._source, "close", None)
+            if callable(close):
+                close()
+            self._put(_DONE)
+
+    def __iter__(self):
+        while True:
+            batch = self._queue.get()
+            if batch is _DONE:
+                return
+            elif type(batch) is PrefetchError:
+                raise batch.exception
+            yield from batch
+
+    def close(self, timeout: float = 5.0):
+        """
+        Stop the background thread and discard anything it has read
+        ahead. Safe to call more than once.
+
+        :param timeout: seconds to wait for the thread to finish an
+        outstanding fetch.
+        """
+        self._cancelled.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join(timeout)
@@ -0,0 +1,116 @@
+"""
+ClientRegistry
+====================================
+A process wide registry of `pymongo.MongoClient` objects so that
+`pymongoshell.MongoClient` instances created for the same server and
+options share one connection pool and one set of monitor threads.
+
+Clients are reference counted, the pymongo client is closed when the
+last `pymongoshell.MongoClient` using it releases it.
+
+"""
+
+import re
+import threading
+
+import pymongo
+
+DEFAULT_PORT = 27017
+
+
+def registry_key(uri: str, args: tuple, kwargs: dict) -> tuple:
+    """
+    A key identifying the connection pool needed for uri, args and kwargs.
+    Hosts and URI options are put in a canonical order and the default
+    port filled in. The database and collection in the path are left
+    out unless there are credentials, as then the database is the
+    default authSource.
+    """
+    scheme, _, rest = uri.partition("://")
+    scheme = scheme.lower()
+    rest, _, query = rest.partition("?")
+    netloc, _, path = rest.partition("/")
+    userinfo, _, hosts = netloc.rpartition("@")
+    host_list = []
+    for h in hosts.split(","):
+        h = h.lower()
+        if scheme == "mongodb" and not re.search(r":\d+$", h):
+            h = f"{h}:{DEFAULT_PORT}"
+        host_list.append(h)
+    auth_db = path.partition(".")[0] if userinfo else ""
+    options = sorted((k.lower(), v) for k, _, v in
+                     (pair.partition("=") for pair in query.split("&") if pair))
+    # Objects such as event listeners have no useful equality so repr()
+    # (which includes their id) keeps clients with different ones apart.
+    keywords = sorted((k.lower(), repr(v)) for k, v in kwargs.items())
+    return scheme, userinfo, ",".join(sorted(host_list)), auth_db, tuple(options), \
+        tuple(repr(a) for a in args), tuple(keywords)
+
+
+class ClientRegistry:
+    """
+    Hands out shared pymongo clients.
+
+    >>> client = CLIENT_REGISTRY.acquire("mongodb://localhost:27017", serverSelectionTimeoutMS=5000)
+    >>> CLIENT_REGISTRY.release(client)
+
+    :param factory: called as factory(uri, *args, **kwargs) to make a new client
+    """
+
+    def __init__(self, factory=pymongo.MongoClient):
+        self._factory = factory
+        # Reentrant as MongoClient.__del__ releases its client and garbage
+        # collection can run it while this thread holds the lock.
+        self._lock = threading.RLock()
+        self._clients = {}   # key -> [client, refcount]
+        self._keys = {}      # id(client) -> key
+
+    def acquire(self, uri: str, *args, **kwargs):
+        """
+        The client for uri, args and kwargs, made if there isn't one already.
+        Every acquire must be matched by a release.
+        """
+        key = registry_key(uri, args, kwargs)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                client = self._factory(uri, *args, **kwargs)
+                entry = [client, 0]
+                self._clients[key] = entry
+                self._keys[id(client)] = key
+            entry[1] = entry[1] + 1
+            return entry[0]
+
+    def release(self, client):
+        """
+        Give up a client, closing it if nobody else is using it. Clients
+        that didn't come from the registry are just closed.
+        """
+        with self._lock:
+            key = self._keys.get(id(client))
+            entry = self._clients.get(key) if key is not None else None
+            if entry is None or entry[0] is not client:
+                close = True
+            else:
+                entry[1] = entry[1] - 1
+                close = entry[1] == 0
+                if close:
+                    del self._clients[key]
+                    del self._keys[id(client)]
+        if close:
+            client.close()
+
+    def refcount(self, client) -> int:
+        """
+        How many holders client has, 0 if it isn't in the registry.
+        """
+        with self._lock:
+            key = self._keys.get(id(client))
+            entry = self._clients.get(key) if key is not None else None
+            return entry[1] if entry is not None and entry[0] is client else 0
+
+    def __len__(self):
+        return len(self._clients)
+
+
+CLIENT_REGISTRY = ClientRegistry()
@@ -0,0 +1,284 @@
+"""
+DocRenderer
+====================================
+Render documents a line at a time in exactly the layout produced by
+`pprint.pformat`, but without its repeated work. `pprint` computes the
+repr of every sub-document again at each level of nesting it descends
+through, we compute it once per document and reuse it. The kind of
+formatting needed for each type is worked out once and cached.
+
+Types that `pprint` lays out specially but which never come back from
+MongoDB (sets, deques, OrderedDicts, dataclasses etc.) are handed
+to `pprint` itself so the output is always identical.
+
+"""
+
+import pprint
+import re
+from operator import itemgetter
+
+# How each type is rendered
+SCALAR = 0     # repr() on one line
+DICT = 1
+LIST = 2
+TUPLE = 3
+STR = 4
+BYTES = 5
+FALLBACK = 6   # let pprint format the whole document
+
+_NATIVE_KINDS = {dict.__repr__: DICT,
+                 list.__repr__: LIST,
+                 tuple.__repr__: TUPLE,
+                 str.__repr__: STR,
+                 bytes.__repr__: BYTES}
+
+# type -> kind, shared by all renderers as it doesn't depend on width.
+_kind_cache = {}
+
+
+class FallbackToPprint(Exception):
+    """
+    Raised when a document contains something we don't lay out ourselves.
+    """
+    pass
+
+
+def kind_of(typ) -> int:
+    """
+    Classify a type by the way pprint would lay out its instances.
+    """
+    kind = _kind_cache.get(typ)
+    if kind is None:
+        r = getattr(typ, "__repr__", None)
+        if r in _NATIVE_KINDS:
+            kind = _NATIVE_KINDS[r]
+        elif r in pprint.PrettyPrinter._dispatch or hasattr(typ, "__dataclass_fields__"):
+            kind = FALLBACK
+        else:
+            kind = SCALAR
+        _kind_cache[typ] = kind
+    return kind
+
+
+def wrap_bytes_repr(b: bytes, width: int, allowance: int):
+    current = b''
+    last = len(b) // 4 * 4
+    for i in range(0, len(b), 4):
+        part = b[i: i + 4]
+        candidate = current + part
+        if i == last:
+            width -= allowance
+        if len(repr(candidate)) > width:
+            if current:
+                yield repr(current)
+            current = part
+        else:
+            current = candidate
+    if current:
+        yield repr(current)
+
+
+class DocRenderer:
+    """
+    Drop in replacement for `pprint.pformat(doc).splitlines()` that
+    yields the lines as they are completed.
+
+    >>> r = DocRenderer()
+    >>> list(r.lines({"b": 1, "a": [1, 2]}))
+    ["{'a': [1, 2], 'b': 1}"]
+    """
+
+    def __init__(self, width: int = 80):
+        self._width = width
+        self._memo = {}
+        self._path = set()
+        self._line = []
+
+    @property
+    def width(self):
+        return self._width
+
+    def lines(self, obj):
+        """
+        Generator yielding the pretty printed form of obj a line at a time.
+        """
+        self._memo = {}
+        self._line = []
+        try:
+            self.flat(obj)
+        except FallbackToPprint:
+            self._memo = {}
+            yield from pprint.pformat(obj, width=self._width).splitlines()
+            return
+        try:
+            yield from self._format(obj, 0, 0, 0)
+            yield "".join(self._line)
+        finally:
+            self._memo = {}
+            self._line = []
+
+    def format(self, obj) -> str:
+        return "\n".join(self.lines(obj))
+
+    @staticmethod
+    def sorted_items(d: dict):
+        try:
+            return sorted(d.items(), key=itemgetter(0))
+        except TypeError:
+            return sorted(d.items(), key=pprint._safe_tuple)
+
+    def flat(self, obj) -> str:
+        """
+        The single line repr of obj as pprint would produce it. The reprs
+        of containers are remembered for the rest of the document.
+        """
+        kind = _kind_cache.get(type(obj))
+        if kind is None:
+            kind = kind_of(type(obj))
+        if kind < DICT or kind == STR or kind == BYTES:
+            return repr(obj)
+        elif kind == FALLBACK:
+            raise FallbackToPprint(type(obj))
+
+        objid = id(obj)
+        memo = self._memo.get(objid)
+        if memo is not None:
+            return memo[0]
+        if objid in self._path:  # recursive structure
+            raise FallbackToPprint(type(obj))
+        self._path.add(objid)
+        try:
+            flat = self.flat
+            if kind == DICT:
+                items = self.sorted_items(obj)
+                rep = "{" + ", ".join([f"{flat(k)}: {flat(v)}" for k, v in items]) + "}"
+            elif kind == LIST:
+                items = None
+                rep = "[" + ", ".join([flat(x) for x in obj]) + "]"
+            elif len(obj) == 1:
+                items = None
+                rep = f"({flat(obj[0])},)"
+            else:
+                items = None
+                rep = "(" + ", ".join([flat(x) for x in obj]) + ")"
+        finally:
+            self._path.discard(objid)
+        self._memo[objid] = (rep, items)
+        return rep
+
+    def _newline(self, indent: int) -> str:
+        line = "".join(self._line)
+        self._line = [" " * indent]
+        return line
+
+    def _format(self, obj, indent: int, allowance: int, level: int):
+        rep = self.flat(obj)
+        if len(rep) <= self._width - indent - allowance:
+            self._line.append(rep)
+            return
+        kind = kind_of(type(obj))
+        if kind == DICT:
+            yield from self._format_dict(obj, indent, allowance, level + 1)
+        elif kind == LIST:
+            self._line.append("[")
+            yield from self._format_items(obj, indent, allowance + 1, level + 1)
+            self._line.append("]")
+        elif kind == TUPLE:
+            endchar = ",)" if len(obj) == 1 else ")"
+            self._line.append("(")
+            yield from self._format_items(obj, indent, allowance + len(endchar), level + 1)
+            self._line.append(endchar)
+        elif kind == STR:
+            yield from self._format_str(obj, indent, allowance, level + 1)
+        elif kind == BYTES:
+            yield from self._format_bytes(obj, indent, allowance, level + 1)
+        else:
+            self._line.append(rep)
+
+    def _format_dict(self, obj: dict, indent: int, allowance: int, level: int):
+        self._line.append("{")
+        items = self._memo[id(obj)][1]
+        if items:
+            allowance = allowance + 1
+            indent = indent + 1
+            last_index = len(items) - 1
+            for i, (key, value) in enumerate(items):
+                last = i == last_index
+                krep = self.flat(key)
+                self._line.append(krep)
+                self._line.append(": ")
+                yield from self._format(value, indent + len(krep) + 2,
+                                        allowance if last else 1, level)
+                if not last:
+                    self._line.append(",")
+                    yield self._newline(indent)
+        self._line.append("}")
+
+    def _format_items(self, items, indent: int, allowance: int, level: int):
+        indent = indent + 1
+        last_index = len(items) - 1
+        for i, item in enumerate(items):
+            if i > 0:
+                self._line.append(",")
+                yield self._newline(indent)
+            yield from self._format(item, indent,
+                                    allowance if i == last_index else 1, level)
+
+    def _format_str(self, s: str, indent: int, allowance: int, level: int):
+        if not len(s):
+            self._line.append(repr(s))
+            return
+        chunks = []
+        lines = s.splitlines(True)
+        if level == 1:
+            indent = indent + 1
+            allowance = allowance + 1
+        max_width1 = max_width = self._width - indent
+        for i, line in enumerate(lines):
+            rep = repr(line)
+            if i == len(lines) - 1:
+                max_width1 -= allowance
+            if len(rep) <= max_width1:
+                chunks.append(rep)
+            else:
+                # A list of alternating (non-space, space) strings
+                parts = re.findall(r'\S*\s*', line)
+                parts.pop()  # drop empty last part
+                max_width2 = max_width
+                current = ''
+                for j, part in enumerate(parts):
+                    candidate = current + part
+                    if j == len(parts) - 1 and i == len(lines) - 1:
+                        max_width2 -= allowance
+                    if len(repr(candidate)) > max_width2:
+                        if current:
+                            chunks.append(repr(current))
+                        current = part
+                    else:
+                        current = candidate
+                if current:
+                    chunks.append(repr(current))
+        yield from self._write_chunks(chunks, indent, level)
+
+    def _format_bytes(self, b: bytes, indent: int, allowance: int, level: int):
+        if len(b) <= 4:
+            self._line.append(repr(b))
+            return
+        if level == 1:
+            indent = indent + 1
+            allowance = allowance + 1
+        chunks = list(wrap_bytes_repr(b, self._width - indent, allowance))
+        yield from self._write_chunks(chunks, indent, level, always_wrap=True)
+
+    def _write_chunks(self, chunks, indent, level, always_wrap=False):
+        if len(chunks) == 1 and not always_wrap:
+            self._line.append(chunks[0])
+            return
+        if level == 1:
+            self._line.append("(")
+        for i, rep in enumerate(chunks):
+            if i > 0:
+                yield self._newline(indent)
+            self._line.append(rep)
+        if level == 1:
+            self._line.append(")")
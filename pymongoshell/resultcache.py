@@ -0,0 +1,270 @@
+"""
+ResultCache
+====================================
+An opt-in cache of read results for the shell proxy. Repeated
+`find_one`, `count_documents`, `estimated_document_count`, `distinct`
+and `aggregate` calls with the same arguments on the same namespace are
+answered from memory until the entry expires.
+
+Writes made through the same `MongoClient` invalidate every entry for
+the namespace they write to. Writes made by anyone else are only seen
+once the entry expires, hence the short default TTL.
+
+Aggregation results are kept only if the whole result was read and it
+is no more than `RESULT_CACHE_MAX_DOCS` documents long.
+
+Values are copied in and out of the cache so changes made to a result
+can't reach it. Lookups and updates are made under a lock as an
+aggregation may be completed (and cached) by a prefetch thread.
+
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import bson
+from bson.errors import InvalidDocument
+
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 30.0
+RESULT_CACHE_MAX_DOCS = 1000
+
+CACHED_METHODS = ["find_one",
+                  "count_documents",
+                  "estimated_document_count",
+                  "distinct",
+                  "aggregate"]
+
+WRITE_METHODS = ["insert_one",
+                 "insert_many",
+                 "update_one",
+                 "update_many",
+                 "replace_one",
+                 "delete_one",
+                 "delete_many",
+                 "find_one_and_delete",
+                 "find_one_and_replace",
+                 "find_one_and_update",
+                 "bulk_write",
+                 "drop",
+                 "rename"]
+
+
+def writes_elsewhere(method: str, args, kwargs) -> bool:
+    """
+    True for an aggregation that ends in $out or $merge, it writes to a
+    collection we can't easily name so the whole cache must go.
+    """
+    if method != "aggregate":
+        return False
+    pipeline = args[0] if args else kwargs.get("pipeline", [])
+    return any(isinstance(stage, dict) and ("$out" in stage or "$merge" in stage)
+               for stage in pipeline)
+
+
+class CachedCursor:
+    """
+    Replays an aggregation result held in the cache.
+    """
+
+    def __init__(self, docs: list):
+        self._docs = docs
+
+    @property
+    def docs(self):
+        return self._docs
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def close(self):
+        pass
+
+
+class RecordingCursor:
+    """
+    Wraps a cursor and keeps the documents it returns. If the cursor is
+    read to the end without returning more than max_docs documents
+    they are handed to on_complete.
+    """
+
+    def __init__(self, cursor, on_complete, max_docs: int = RESULT_CACHE_MAX_DOCS):
+        self._cursor = cursor
+        self._on_complete = on_complete
+        self._max_docs = max_docs
+
+    @property
+    def cursor(self):
+        return self._cursor
+
+    def __iter__(self):
+        docs = []
+        for doc in self._cursor:
+            if docs is not None:
+                docs.append(doc)
+                if len(docs) > self._max_docs:
+                    docs = None
+            yield doc
+        if docs is not None:
+            self._on_complete(CachedCursor(docs))
+
+    def close(self):
+        self._cursor.close()
+
+
+def copy_value(value):
+    """
+    A copy of a result that can be changed without affecting value.
+    """
+    if type(value) is CachedCursor:
+        return CachedCursor(copy.deepcopy(value.docs))
+    elif type(value) in (dict, list):
+        return copy.deepcopy(value)
+    return value
+
+
+class ResultCache:
+    """
+    LRU cache of results keyed by namespace, method and arguments, with a
+    time to live.
+
+    :param maxsize: entries kept, the least recently used is evicted first
+    :param ttl: seconds an entry stays valid
+    """
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires, namespace, value)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, seconds: float):
+        self._ttl = seconds
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @staticmethod
+    def make_key(namespace: str, method: str, args, kwargs, codec_options=None):
+        """
+        A hashable key for a call, None if the arguments can't be encoded
+        as BSON (e.g. a session) in which case the call isn't cached.
+        Keyword arguments are sorted, documents keep their field order as
+        it can be significant (e.g. in a sort). The codec options of the
+        collection are part of the key as they decide what type of
+        documents come back, e.g. RawBSONDocuments with lazy_decode.
+        """
+        try:
+            encoded = bson.encode({"a": list(args),
+                                   "k": [[name, kwargs[name]] for name in sorted(kwargs)]})
+        except (InvalidDocument, TypeError, OverflowError):
+            return None
+        # CodecOptions aren't hashable (their TypeRegistry isn't), their repr is.
+        return namespace, method, encoded, repr(codec_options)
+
+    def get(self, key):
+        """
+        :return: (True, value) on a hit, (False, None) on a miss. The value
+        is the cached object itself, not a copy.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits = self._hits + 1
+                    return True, entry[2]
+                del self._entries[key]
+            self._misses = self._misses + 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, key[0], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self._evictions = self._evictions + 1
+
+    def invalidate(self, namespace: str):
+        """
+        Drop the entries for namespace. A database name followed by "."
+        drops every namespace in that database.
+        """
+        with self._lock:
+            if namespace.endswith("."):
+                stale = [k for k in self._entries if k[0].startswith(namespace)]
+            else:
+                stale = [k for k in self._entries if k[0] == namespace]
+            for k in stale:
+                del self._entries[k]
+            self._invalidations = self._invalidations + len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations = self._invalidations + len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {"entries": len(self._entries),
+                    "hits": self._hits,
+                    "misses": self._misses,
+                    "hit_rate": self._hits / lookups if lookups else 0.0,
+                    "evictions": self._evictions,
+                    "invalidations": self._invalidations,
+                    "ttl": self._ttl}
+
+    def call(self, namespace: str, func, args, kwargs):
+        """
+        Call func(*args, **kwargs) through the cache. Reads listed in
+        CACHED_METHODS are answered from the cache when possible, writes
+        in WRITE_METHODS invalidate namespace, anything else is just called.
+        """
+        method = func.__name__
+        if method in WRITE_METHODS:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.invalidate(namespace)
+        if method not in CACHED_METHODS:
+            return func(*args, **kwargs)
+        if writes_elsewhere(method, args, kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.clear()
+
+        collection = getattr(func, "__self__", None)
+        key = self.make_key(namespace, method, args, kwargs, getattr(collection, "codec_options", None))
+        if key is None:
+            return func(*args, **kwargs)
+        # Documents are copied in and out so changes made to a result
+        # can't leak into the cache.
+        hit, value = self.get(key)
+        if hit:
+            return copy_value(value)
+        value = func(*args, **kwargs)
+        if method == "aggregate":
+            return RecordingCursor(value, lambda docs: self.put(key, copy_value(docs)))
+        self.put(key, copy_value(value))
+        return value
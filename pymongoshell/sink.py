@@ -0,0 +1,156 @@
+"""
+OutputSink
+====================================
+A buffered text file used by the Pager to keep a transcript of
+output. Writes are collected in memory and handed to the file in
+large chunks, optionally from a background thread, so teeing a big
+result to a file does not cost a system call per line.
+
+"""
+
+import queue
+import threading
+
+# Characters collected before they are written to the file.
+SINK_BUFFER_SIZE = 64 * 1024
+
+# Flush policies
+FLUSH_LINE = "line"    # flush after every write, the old Pager behaviour
+FLUSH_CALL = "call"    # flush at the end of each Pager call (the default)
+FLUSH_CLOSE = "close"  # only flush when the buffer fills or the sink is closed
+
+FLUSH_POLICIES = [FLUSH_LINE, FLUSH_CALL, FLUSH_CLOSE]
+
+_STOP = object()
+_FLUSH = object()
+
+
+class OutputSink:
+    """
+    Buffered writer for a text file that stays open until `close()`.
+
+    :param filename: file to write to
+    :param mode: mode passed to `open`, "w" to truncate or "a" to append
+    :param buffer_size: characters held in memory before a write
+    :param flush_policy: one of FLUSH_LINE, FLUSH_CALL or FLUSH_CLOSE
+    :param background: if True writes are done on a background thread
+    """
+
+    def __init__(self,
+                 filename: str,
+                 mode: str = "w",
+                 buffer_size: int = SINK_BUFFER_SIZE,
+                 flush_policy: str = FLUSH_CALL,
+                 background: bool = False):
+
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"flush_policy must be one of {FLUSH_POLICIES} not '{flush_policy}'")
+
+        self._filename = filename
+        self._file = open(filename, mode)
+        self._buffer_size = buffer_size
+        self._flush_policy = flush_policy
+        self._buffer = []
+        self._buffered = 0
+        self._queue = None
+        self._thread = None
+        self._error = None
+        if background:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run,
+                                            name="pymongoshell-sink",
+                                            daemon=True)
+            self._thread.start()
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def flush_policy(self):
+        return self._flush_policy
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                elif item is _FLUSH:
+                    self._file.flush()
+                elif type(item) is threading.Event:
+                    self._file.flush()
+                    item.set()
+                elif self._error is None:
+                    self._file.write(item)
+            except Exception as e:
+                # Kept and raised in the caller's thread on the next flush.
+                self._error = e
+                if type(item) is threading.Event:
+                    item.set()
+            finally:
+                self._queue.task_done()
+
+    def _drain(self):
+        if self._buffer:
+            chunk = "".join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            if self._queue is not None:
+                self._queue.put(chunk)
+            else:
+                self._file.write(chunk)
+
+    def write(self, s: str):
+        self._buffer.append(s)
+        self._buffered = self._buffered + len(s)
+        if self._flush_policy == FLUSH_LINE:
+            self._drain()
+            if self._queue is not None:
+                self._queue.put(_FLUSH)  # don't wait for the writer thread
+            else:
+                self._file.flush()
+        elif self._buffered >= self._buffer_size:
+            self._drain()
+
+    def flush(self):
+        """
+        Push everything written so far to the operating system.
+        """
+        self._drain()
+        if self._queue is not None:
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+            self._raise_error()
+        else:
+            self._file.flush()
+
+    def end_call(self):
+        """
+        Called by the Pager when it finishes a unit of output.
+        """
+        if self._flush_policy == FLUSH_CALL:
+            self.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._drain()
+        if self._queue is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._file.close()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def __repr__(self):
+        return f"OutputSink('{self._filename}', flush_policy='{self._flush_policy}')"
@@ -0,0 +1,200 @@
+"""
+Spool
+====================================
+Keep the lines the pager has shown so it can go back to them. Lines are
+appended to an anonymous temporary file and read back through `mmap`,
+an array of offsets indexes where each one starts. Only the offsets
+(eight bytes a line) are held in memory however large the result, and
+going back or searching never goes back to the server.
+
+`SpooledLines` pulls lines from the iterator being paged as they are
+needed and keeps track of the screen row each line starts on, so a
+page can be shown from any line or row.
+
+"""
+
+import mmap
+import re
+import tempfile
+from array import array
+from bisect import bisect_right
+
+from pymongoshell.wrap import row_end, wrap_offsets
+
+
+class LineSpool:
+    """
+    An append only sequence of lines kept in a temporary file.
+
+    >>> spool = LineSpool()
+    >>> spool.append("{'a': 1}")
+    >>> spool[0]
+    "{'a': 1}"
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("Q", [0])  # line i is [offsets[i], offsets[i + 1] - 1)
+        self._map = None
+        self._mapped = 0
+        # The line just appended is usually the next one read.
+        self._last = (-1, None)
+
+    def append(self, line: str):
+        data = line.encode("utf-8", "surrogatepass")
+        self._file.write(data)
+        self._file.write(b"\n")
+        self._offsets.append(self._offsets[-1] + len(data) + 1)
+        self._last = (len(self._offsets) - 2, line)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _view(self, end: int):
+        """
+        A map of the file covering at least the first end bytes. The file
+        is only mapped again when reading past the end of the last map.
+        """
+        if end > self._mapped:
+            self._file.flush()
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped = len(self._map)
+        return self._map
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index = index + len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"spool index {index} out of range")
+        if index == self._last[0]:
+            return self._last[1]
+        start = self._offsets[index]
+        end = self._offsets[index + 1] - 1
+        return self._view(end)[start:end].decode("utf-8", "surrogatepass")
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        self._last = (-1, None)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class SpooledLines:
+    """
+    The lines from an iterator by index, pulled from it as they are asked
+    for and spooled so they can be read again. Blank lines are dropped as
+    the pager doesn't display them.
+
+    Screen rows are numbered from 1. Row numbers are worked out a line at
+    a time with the row width in use, the row each line starts on is
+    remembered so pages are numbered the same way when they are shown
+    again.
+
+    :param lines: an iterable of lines
+    :param on_line: called with each line pulled from lines, blank or not
+    """
+
+    def __init__(self, lines, on_line=None):
+        self._lines = iter(lines)
+        self._on_line = on_line
+        self._spool = LineSpool()
+        self._exhausted = False
+        self._rows = array("Q", [1])  # first row of each line whose row is known
+
+    def _pull(self) -> bool:
+        for line in self._lines:
+            if self._on_line:
+                self._on_line(line)
+            if line:
+                self._spool.append(line)
+                return True
+        self._exhausted = True
+        return False
+
+    def get(self, index: int):
+        """
+        Line index, None if there are not that many lines.
+        """
+        while index >= len(self._spool):
+            if self._exhausted or not self._pull():
+                return None
+        return self._spool[index]
+
+    def __len__(self):
+        """
+        The number of lines pulled so far.
+        """
+        return len(self._spool)
+
+    def first_row(self, index: int, row_width: int):
+        """
+        The row line index starts on, None if there is no such line.
+        """
+        rows = self._rows
+        while len(rows) <= index:
+            last = len(rows) - 1
+            line = self.get(last)
+            if line is None or self.get(last + 1) is None:
+                return None
+            rows.append(rows[last] + sum(1 for _ in wrap_offsets(line, row_width)))
+        return rows[index] if self.get(index) is not None else None
+
+    def note_row(self, index: int, row: int):
+        """
+        Record that line index starts on row, if it isn't known already.
+        """
+        if index == len(self._rows):
+            self._rows.append(row)
+
+    def position(self, row: int, row_width: int):
+        """
+        The (line index, offset, row) where row starts, or the last row
+        there is if the lines run out first.
+        """
+        rows = self._rows
+        while rows[-1] <= row and self.first_row(len(rows), row_width) is not None:
+            pass
+        index = bisect_right(rows, max(row, 1)) - 1
+        line = self.get(index)
+        if line is None:
+            return 0, 0, 1
+        offset = 0
+        current = rows[index]
+        while current < row:
+            end = row_end(line, offset, row_width)
+            if end >= len(line):
+                break
+            offset = end
+            current = current + 1
+        return index, offset, current
+
+    def find(self, pattern, start: int, backward: bool = False):
+        """
+        The index of the first line matching the regular expression
+        pattern searching from line start, forwards or backwards. Searching
+        forwards pulls lines until one matches. None if nothing matches.
+        """
+        regex = re.compile(pattern)
+        if backward:
+            for index in range(min(start, len(self._spool) - 1), -1, -1):
+                if regex.search(self._spool[index]):
+                    return index
+            return None
+        index = max(start, 0)
+        while True:
+            line = self.get(index)
+            if line is None:
+                return None
+            if regex.search(line):
+                return index
+            index = index + 1
+
+    def close(self):
+        self._spool.close()
@@ -0,0 +1,117 @@
+"""
+TerminalSize
+====================================
+The size of the terminal, read once and then again only after the
+terminal has been resized. A SIGWINCH handler marks the size stale, so
+paging through a long result doesn't ask the terminal for its size on
+every page. The size is also read again if `COLUMNS` or `LINES` change,
+as `shutil.get_terminal_size` takes them in preference to the terminal.
+
+Signal handlers can only be installed from the main thread and not at
+all on platforms without SIGWINCH (Windows). Where there is no handler,
+or something else (curses, a REPL) has put in its own since, the size
+is read every time it is asked for, as it would be without the cache.
+
+"""
+
+import os
+import shutil
+import signal
+import threading
+
+FALLBACK_SIZE = (80, 24)
+
+
+class TerminalSize:
+    """
+    >>> columns, lines = TERMINAL_SIZE.get()
+
+    :param fallback: (columns, lines) used when the size can't be read
+    """
+
+    def __init__(self, fallback=FALLBACK_SIZE):
+        self._fallback = fallback
+        self._size = None
+        self._environ = None
+        self._generation = 0
+        self._watching = False
+        self._previous_handler = None
+        # The one bound method installed, so getsignal() can be compared with it.
+        self._handler = self._resized
+
+    @property
+    def generation(self) -> int:
+        """
+        Incremented each time the terminal is resized.
+        """
+        return self._generation
+
+    @property
+    def watching(self) -> bool:
+        return self._watching
+
+    def watch(self) -> bool:
+        """
+        Install the SIGWINCH handler if it isn't installed already. Any
+        handler it replaces is still called.
+
+        :return: True if resizes are being watched for
+        """
+        if self._watching:
+            return True
+        if not hasattr(signal, "SIGWINCH") or threading.current_thread() is not threading.main_thread():
+            return False
+        try:
+            self._previous_handler = signal.signal(signal.SIGWINCH, self._handler)
+        except (ValueError, OSError):
+            return False
+        self._watching = True
+        return True
+
+    def unwatch(self):
+        """
+        Put back the SIGWINCH handler that was there before watch(), unless
+        another one has been put in since.
+        """
+        if self._watching and threading.current_thread() is threading.main_thread():
+            if self.handler_installed():
+                signal.signal(signal.SIGWINCH, self._previous_handler or signal.SIG_DFL)
+            self._watching = False
+            self._previous_handler = None
+            self._size = None
+
+    def handler_installed(self) -> bool:
+        """
+        True if our handler is the one SIGWINCH goes to.
+        """
+        return self._watching and signal.getsignal(signal.SIGWINCH) is self._handler
+
+    def _resized(self, signum, frame):
+        self.invalidate()
+        if callable(self._previous_handler):
+            self._previous_handler(signum, frame)
+
+    def invalidate(self):
+        self._size = None
+        self._generation = self._generation + 1
+
+    def get(self) -> tuple:
+        """
+        The terminal size as (columns, lines).
+        """
+        environ = (os.environ.get("COLUMNS"), os.environ.get("LINES"))
+        size = self._size
+        if size is None or environ != self._environ or not self.handler_installed():
+            watching = self.watch() and self.handler_installed()
+            generation = self._generation
+            size = tuple(shutil.get_terminal_size(fallback=self._fallback))
+            # Don't keep a size if the terminal was resized while it was read.
+            if watching and generation == self._generation:
+                self._size = size
+                self._environ = environ
+            else:
+                self._size = None
+        return size
+
+
+TERMINAL_SIZE = TerminalSize()
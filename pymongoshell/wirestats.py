@@ -0,0 +1,243 @@
+"""
+WireStats
+====================================
+A `pymongo.monitoring.CommandListener` that records what goes over
+the wire: how long each command takes (as a histogram per command
+name), how large the replies are, how many documents come back in each
+batch, failures and retried commands.
+
+Measuring reply sizes means encoding every reply again on the thread
+that ran the command, which is as costly as the transfer being measured
+for large batches, so it is off unless `reply_sizes` is set.
+
+Enable it with `MongoClient(wire_stats=True)` and view it with
+`c.wire_stats()`.
+
+"""
+
+import threading
+from collections import OrderedDict
+
+import bson
+from pymongo import monitoring
+
+# Bits of precision kept for each histogram value, 6 bits keeps every
+# bucket within about 3% of the values it holds.
+HISTOGRAM_SUB_BUCKET_BITS = 6
+
+# Failed operations remembered to spot retried commands.
+RETRY_WINDOW = 1024
+
+
+class LatencyHistogram:
+    """
+    A sparse HDR style histogram of integer values. Values below
+    2**HISTOGRAM_SUB_BUCKET_BITS are kept exactly, larger ones are rounded
+    down to their top HISTOGRAM_SUB_BUCKET_BITS significant bits, so memory
+    use depends on the range of the values not on how many there are.
+    """
+
+    def __init__(self, sub_bucket_bits: int = HISTOGRAM_SUB_BUCKET_BITS):
+        self._sub_bucket_bits = sub_bucket_bits
+        self._counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def bucket(self, value: int) -> int:
+        """
+        The lowest value held in the same bucket as value.
+        """
+        shift = value.bit_length() - self._sub_bucket_bits
+        if shift <= 0:
+            return value
+        return (value >> shift) << shift
+
+    def bucket_width(self, value: int) -> int:
+        shift = value.bit_length() - self._sub_bucket_bits
+        return 1 if shift <= 0 else 1 << shift
+
+    def record(self, value: int):
+        value = max(0, int(value))
+        key = self.bucket(value)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self.count = self.count + 1
+        self.total = self.total + value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float):
+        """
+        The highest value in the bucket holding the p'th percentile,
+        never more than the largest value recorded.
+        """
+        if not self.count:
+            return None
+        target = max(1, -(-self.count * p // 100))
+        seen = 0
+        for key in sorted(self._counts):
+            seen = seen + self._counts[key]
+            if seen >= target:
+                return min(key + self.bucket_width(key) - 1, self.max)
+        return self.max
+
+    def buckets(self):
+        """
+        (lowest value, count) for each non empty bucket in order.
+        """
+        return sorted(self._counts.items())
+
+
+class CommandStats:
+    """
+    Totals for one command name.
+    """
+
+    def __init__(self, command_name: str):
+        self.command_name = command_name
+        self.latency = LatencyHistogram()  # microseconds
+        self.failures = 0
+        self.retries = 0
+        self.reply_bytes = 0
+        self.max_reply_bytes = 0
+        self.replies_sized = 0
+        self.batches = 0
+        self.batch_docs = 0
+
+    @property
+    def count(self):
+        return self.latency.count
+
+    @property
+    def mean_batch_size(self):
+        return self.batch_docs / self.batches if self.batches else None
+
+
+def batch_size(reply) -> int:
+    """
+    The number of documents in a cursor reply, None if it isn't one.
+    """
+    cursor = reply.get("cursor") if hasattr(reply, "get") else None
+    if not hasattr(cursor, "get"):
+        return None
+    batch = cursor.get("firstBatch")
+    if batch is None:
+        batch = cursor.get("nextBatch")
+    return None if batch is None else len(batch)
+
+
+class WireStatsListener(monitoring.CommandListener):
+    """
+    Collects CommandStats for every command sent by the client it is
+    registered with. Events arrive on whichever thread ran the command
+    so all updates are made under a lock.
+
+    The time spent waiting for the server is also accumulated per thread
+    so a caller can find out how much of an operation was server time
+    with `thread_server_time()`.
+
+    A command is counted as retried when it is sent again for an operation
+    whose previous attempt failed. Every batch of a bulk write shares one
+    operation id so simply seeing an id twice doesn't make a retry.
+
+    :param reply_sizes: measure the BSON size of every reply
+    """
+
+    def __init__(self, reply_sizes: bool = False):
+        self.reply_sizes = reply_sizes
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._failed = OrderedDict()
+        self._local = threading.local()
+
+    def _command_stats(self, command_name: str) -> CommandStats:
+        stats = self._stats.get(command_name)
+        if stats is None:
+            stats = CommandStats(command_name)
+            self._stats[command_name] = stats
+        return stats
+
+    def thread_server_time(self) -> int:
+        """
+        Microseconds spent in commands issued by the calling thread.
+        """
+        return getattr(self._local, "server_time", 0)
+
+    def _add_thread_time(self, micros: int):
+        self._local.server_time = getattr(self._local, "server_time", 0) + micros
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        key = (event.operation_id, event.command_name)
+        with self._lock:
+            if self._failed.pop(key, None) is not None:
+                stats = self._command_stats(event.command_name)
+                stats.retries = stats.retries + 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._add_thread_time(event.duration_micros)
+        size = len(bson.encode(event.reply)) if self.reply_sizes else None
+        docs = batch_size(event.reply)
+        with self._lock:
+            stats = self._command_stats(event.command_name)
+            stats.latency.record(event.duration_micros)
+            if size is not None:
+                stats.reply_bytes = stats.reply_bytes + size
+                stats.max_reply_bytes = max(stats.max_reply_bytes, size)
+                stats.replies_sized = stats.replies_sized + 1
+            if docs is not None:
+                stats.batches = stats.batches + 1
+                stats.batch_docs = stats.batch_docs + docs
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._add_thread_time(event.duration_micros)
+        with self._lock:
+            stats = self._command_stats(event.command_name)
+            stats.latency.record(event.duration_micros)
+            stats.failures = stats.failures + 1
+            self._failed[(event.operation_id, event.command_name)] = True
+            if len(self._failed) > RETRY_WINDOW:
+                self._failed.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        command name -> CommandStats
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._failed = OrderedDict()
+
+    def lines(self):
+        stats = self.stats()
+        if not stats:
+            yield "no commands recorded"
+            return
+        name_width = max(len("command"), *(len(name) for name in stats))
+        yield f"{'command':<{name_width}} {'count':>7} {'failed':>6} {'retried':>7} " \
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} " \
+              f"{'avg reply':>10} {'docs/batch':>10}"
+        for name in sorted(stats, key=lambda n: -stats[n].count):
+            s = stats[name]
+            h = s.latency
+
+            def ms(micros):
+                return "-" if micros is None else f"{micros / 1000:.3f}"
+
+            avg_reply = f"{s.reply_bytes / s.replies_sized / 1024:.1f} KB" if s.replies_sized else "-"
+            docs = "-" if s.mean_batch_size is None else f"{s.mean_batch_size:.1f}"
+            yield f"{name:<{name_width}} {s.count:>7} {s.failures:>6} {s.retries:>7} " \
+                  f"{ms(h.percentile(50)):>8} {ms(h.percentile(95)):>8} {ms(h.percentile(99)):>8} " \
+                  f"{ms(h.max):>8} {avg_reply:>10} {docs:>10}"
+
+    def __str__(self):
+        return "\n".join(self.lines())
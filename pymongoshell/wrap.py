@@ -0,0 +1,99 @@
+"""
+Wrap
+====================================
+Split lines into rows that fit the terminal. Widths are measured in
+terminal cells rather than characters: East Asian wide and fullwidth
+characters take two cells, combining marks and other zero width
+characters take none and stay on the row of the character they modify.
+
+Each row is found by scanning on from where the previous one ended so
+a line is walked once however many rows it makes, and nothing is copied
+beyond the row itself. ASCII text is measured without looking at the
+characters at all.
+
+    >>> list(wrap_offsets("abc東京def", 4))
+    [(0, 3), (3, 5), (5, 8)]
+
+"""
+
+import unicodedata
+from functools import lru_cache
+
+# Distinct strings (and characters) whose widths are remembered.
+WIDTH_CACHE_SIZE = 4096
+
+WIDE = ("W", "F")
+ZERO_WIDTH_CATEGORIES = ("Mn", "Me", "Cf")
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def char_width(ch: str) -> int:
+    """
+    The number of terminal cells ch takes, 0, 1 or 2.
+    """
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ZERO_WIDTH_CATEGORIES:
+        return 0
+    if unicodedata.east_asian_width(ch) in WIDE:
+        return 2
+    return 1
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def _text_width(s: str) -> int:
+    return sum(char_width(ch) for ch in s)
+
+
+def display_width(s: str) -> int:
+    """
+    The number of terminal cells s takes. Results for strings that
+    aren't pure ASCII are cached, rendered documents repeat the same
+    field names and values many times over.
+    """
+    if s.isascii():
+        return len(s)
+    return _text_width(s)
+
+
+def row_end(line: str, start: int, width: int) -> int:
+    """
+    The index in line where a row starting at line[start] and at most
+    width cells wide ends. A row always holds at least one character,
+    even one wider than width, so wrapping always makes progress.
+    """
+    width = max(width, 1)
+    n = len(line)
+    end = start + width
+    if end >= n:
+        if line.isascii():
+            return n
+        remainder = line[start:] if start else line
+        if display_width(remainder) <= width:
+            return n
+    elif line.isascii():
+        return end
+    elif line[start:end].isascii() and char_width(line[end]):
+        # a combining mark straight after the row belongs on it
+        return end
+
+    cells = 0
+    end = start
+    while end < n:
+        w = char_width(line[end])
+        if cells + w > width and end > start:
+            break
+        cells = cells + w
+        end = end + 1
+    return end
+
+
+def wrap_offsets(line: str, width: int):
+    """
+    Generator yielding the (start, end) index of each row of line
+    when it is wrapped at width cells.
+    """
+    start = 0
+    n = len(line)
+    while start < n:
+        end = row_end(line, start, width)
+        yield start, end
+        start = end
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import unittest
+
+from pymongo.errors import OperationFailure
+
+from pymongoshell.asyncclient import AsyncMongoClient, AsyncResult, StartedCursor
+
+from helpers import captured_output
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self._iter = iter(docs)
+        self.closed = False
+        self.read = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        doc = next(self._iter)
+        self.read = self.read + 1
+        return doc
+
+    def close(self):
+        self.closed = True
+
+
+class TestAsyncMongoClient(unittest.TestCase):
+    """
+    Runs operations that don't need a server through the async proxy.
+    """
+
+    def setUp(self):
+        self._c = AsyncMongoClient(banner=False, workers=4)
+        self._c.paginate = False
+        self._c.line_numbers = False
+
+    def tearDown(self):
+        self._c.close()
+
+    def test_interceptor_returns_awaitable(self):
+        def lookup(x):
+            return {"x": x}
+
+        wrapper = self._c.interceptor(lookup)
+        self.assertEqual(wrapper.__name__, "lookup")
+        pending = wrapper(1)
+        self.assertIsInstance(pending, AsyncResult)
+        with captured_output() as (out, err):
+            value = asyncio.run(self._awaited(pending))
+        self.assertEqual(value, {"x": 1})
+        self.assertEqual(out.getvalue(), "{'x': 1}\n")
+        self.assertEqual(self._c.result, {"x": 1})
+
+    @staticmethod
+    async def _awaited(*pending):
+        if len(pending) == 1:
+            return await pending[0]
+        return await asyncio.gather(*pending)
+
+    def test_concurrent(self):
+        # Each operation blocks until all three are running at once.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def op(i):
+            barrier.wait()
+            return i
+
+        pending = [self._c.submit("op", op, i) for i in range(3)]
+        with captured_output() as (out, err):
+            values = asyncio.run(self._awaited(*pending))
+        self.assertEqual(values, [0, 1, 2])
+        self.assertEqual(sorted(out.getvalue().split()), ["0", "1", "2"])
+
+    def test_rendered_once(self):
+        pending = self._c.submit("op", lambda: "hello")
+        with captured_output() as (out, err):
+            self.assertEqual(pending.result(timeout=5), "hello")
+            self.assertEqual(pending.result(timeout=5), "hello")
+        self.assertEqual(out.getvalue(), "hello\n")
+        self.assertTrue(pending.done())
+
+    def test_error(self):
+        def fail(x):
+            raise OperationFailure("not authorized", code=13)
+
+        pending = self._c.submit("fail", fail, 42)
+        with captured_output() as (out, err):
+            value = asyncio.run(self._awaited(pending))
+        self.assertIsNone(value)
+        self.assertIn("CLI OperationsFailure:fail(42)", err.getvalue())
+
+    def test_coll_stats_missing_collection(self):
+        class FakeDatabase:
+            def list_collection_names(self):
+                return ["other"]
+
+            def command(self, command):
+                raise AssertionError("collStats sent for a missing collection")
+
+        object.__setattr__(self._c, "_database", FakeDatabase())
+        object.__setattr__(self._c, "_collection_name", "missing")
+        with captured_output() as (out, err):
+            value = self._c.coll_stats().result(timeout=5)
+        self.assertIsNone(value)
+        self.assertIn("'missing' is not a valid collection", err.getvalue())
+
+    def test_started_cursor(self):
+        cursor = FakeCursor([{"i": i} for i in range(5)])
+        started = StartedCursor(cursor)
+        self.assertEqual(cursor.read, 1)
+        self.assertEqual([d["i"] for d in started], [0, 1, 2, 3, 4])
+        started.close()
+        self.assertTrue(cursor.closed)
+
+    def test_render_cursor(self):
+        cursor = FakeCursor([{"i": i} for i in range(3)])
+        pending = self._c.submit("find", StartedCursor, cursor)
+        with captured_output() as (out, err):
+            value = pending.result(timeout=5)
+        self.assertIs(value, cursor)
+        self.assertIs(self._c.result, cursor)
+        self.assertEqual(out.getvalue().splitlines(), ["{'i': 0}", "{'i': 1}", "{'i': 2}"])
+
+    def test_op_recorded(self):
+        cursor = FakeCursor([{"i": i} for i in range(3)])
+        self._c.timing = True
+        with captured_output() as (out, err):
+            self._c.submit("find", StartedCursor, cursor).result(timeout=5)
+        self.assertEqual(self._c.last_op.method, "find")
+        self.assertEqual(self._c.last_op.docs, 3)
+        self.assertGreater(self._c.last_op.bytes_rendered, 0)
+        self.assertTrue(out.getvalue().splitlines()[-1].startswith("Time: "))
+
+        def fail():
+            raise OperationFailure("not authorized", code=13)
+
+        with captured_output():
+            self._c.submit("fail", fail).result(timeout=5)
+        self.assertTrue(self._c.last_op.error)
+        self.assertEqual(self._c.op_stats.get("test.test", "find").calls, 1)
+        self.assertEqual(self._c.op_stats.get("test.test", "fail").errors, 1)
+
+    def test_result_cache(self):
+        calls = []
+
+        def find_one(x):
+            calls.append(x)
+            return {"x": x}
+
+        self._c.result_cache = True
+        with captured_output():
+            self._c.submit("find_one", find_one, 1).result(timeout=5)
+            self._c.submit("find_one", find_one, 1).result(timeout=5)
+        self.assertEqual(calls, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from unittest import mock
+
+from benchmarks import bench_pager, bench_startup
+
+
+class TestBenchmarks(unittest.TestCase):
+    """
+    Keep the benchmark suite runnable, the timings themselves are not checked.
+    """
+
+    def test_bench_pager(self):
+        results = bench_pager.run(size=5, repeat=1)
+        self.assertIn("paginate_lines[paginated,file]", results)
+        self.assertIn("cursor_to_lines", results)
+        for r in results.values():
+            self.assertGreater(r["items_per_second"], 0)
+
+    def test_bench_pager_selected(self):
+        results = bench_pager.run(size=5, repeat=1, selected=["line_to_box"])
+        self.assertEqual(list(results), ["line_to_box"])
+
+    def test_bench_pager_paginates(self):
+        with mock.patch("pymongoshell.pager.Pager.paginate_stream") as paginate_stream, \
+                mock.patch("pymongoshell.pager.Pager.write_stream") as write_stream:
+            bench_pager.run(size=5, repeat=1, selected=["paginate_lines[paginated]"])
+        paginate_stream.assert_called_once()
+        write_stream.assert_not_called()
+
+        with mock.patch("pymongoshell.pager.Pager.paginate_stream") as paginate_stream:
+            bench_pager.run(size=5, repeat=1, selected=["paginate_lines[plain]"])
+        paginate_stream.assert_not_called()
+
+    def test_bench_startup(self):
+        results = bench_startup.run(repeat=1)
+        self.assertIn("import pymongoshell", results)
+        self.assertIn("construct[mongodb+srv]", results)
+        self.assertIsInstance(bench_startup.over_budget(results), list)
+
+
+if __name__ == '__main__':
+    unittest.main()
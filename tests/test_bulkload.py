@@ -0,0 +1,173 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+
+import bson
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+from pymongoshell.bulkload import BulkLoader, BulkLoadResult, batches, read_documents
+
+
+class FakeInsertManyResult:
+
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class FakeCollection:
+    """
+    Records each insert_many call. Any batch containing a document
+    with "bad" set fails with a duplicate key error for that document.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def insert_many(self, docs, ordered=True):
+        assert not ordered
+        with self._lock:
+            self.active = self.active + 1
+            self.max_active = max(self.max_active, self.active)
+            self.batches.append(list(docs))
+        try:
+            bad = [d for d in docs if d.get("bad")]
+            if bad:
+                raise BulkWriteError({"nInserted": len(docs) - len(bad),
+                                      "writeErrors": [{"index": 0, "code": 11000,
+                                                       "errmsg": "E11000 duplicate key error"}
+                                                      for _ in bad]})
+            return FakeInsertManyResult([d.get("_id") for d in docs])
+        finally:
+            with self._lock:
+                self.active = self.active - 1
+
+
+class TestBulkLoad(unittest.TestCase):
+
+    def setUp(self):
+        self._tempfiles = []
+
+    def tearDown(self):
+        for name in self._tempfiles:
+            os.unlink(name)
+
+    def tempfile(self, suffix, data: bytes):
+        fd, name = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self._tempfiles.append(name)
+        return name
+
+    def test_batches(self):
+        self.assertEqual(list(batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batches([], 2)), [])
+
+    def test_read_jsonl(self):
+        oid = ObjectId()
+        name = self.tempfile(".jsonl",
+                             f'{{"_id": {{"$oid": "{oid}"}}, "a": 1}}\n\n{{"a": 2}}\n'.encode())
+        docs = list(read_documents(name))
+        self.assertEqual(docs, [{"_id": oid, "a": 1}, {"a": 2}])
+
+    def test_read_bson(self):
+        name = self.tempfile(".bson", b"".join(bson.encode({"i": i}) for i in range(3)))
+        self.assertEqual(list(read_documents(name)), [{"i": 0}, {"i": 1}, {"i": 2}])
+
+    def test_read_gzip(self):
+        name = self.tempfile(".bson.gz", gzip.compress(b"".join(bson.encode({"i": i}) for i in range(3))))
+        self.assertEqual(list(read_documents(name)), [{"i": 0}, {"i": 1}, {"i": 2}])
+        name = self.tempfile(".jsonl.gz", gzip.compress(b'{"a": 1}\n{"a": 2}\n'))
+        self.assertEqual(list(read_documents(name)), [{"a": 1}, {"a": 2}])
+
+    def test_load_generator(self):
+        collection = FakeCollection()
+        loader = BulkLoader(collection, batch_size=10, workers=3)
+        result = loader.load({"i": i} for i in range(95))
+        self.assertIsInstance(result, BulkLoadResult)
+        self.assertEqual(result.inserted_count, 95)
+        self.assertEqual(result.batch_count, 10)
+        self.assertEqual(result.error_count, 0)
+        self.assertEqual(sorted(len(b) for b in collection.batches), [5] + [10] * 9)
+        self.assertLessEqual(collection.max_active, 3)
+        self.assertEqual(sorted(d["i"] for b in collection.batches for d in b), list(range(95)))
+
+    def test_load_errors(self):
+        collection = FakeCollection()
+        docs = [{"i": i, "bad": i in (12, 13, 31)} for i in range(40)]
+        result = BulkLoader(collection, batch_size=10, workers=2).load(docs)
+        self.assertEqual(result.inserted_count, 37)
+        self.assertEqual(result.error_count, 3)
+        self.assertEqual([e.batch_number for e in result.errors], [2, 4])
+        self.assertIn("E11000", str(result.errors[0]))
+
+    def test_backpressure(self):
+        # Reading must stall while the workers are busy.
+        gate = threading.Event()
+        read = []
+
+        class SlowCollection(FakeCollection):
+            def insert_many(self, docs, ordered=True):
+                gate.wait(5)
+                return super().insert_many(docs, ordered)
+
+        def source():
+            for i in range(100):
+                read.append(i)
+                yield {"i": i}
+
+        collection = SlowCollection()
+        loader = BulkLoader(collection, batch_size=1, workers=2)
+        t = threading.Thread(target=loader.load, args=(source(),))
+        t.start()
+        try:
+            while len(read) < 5:
+                pass
+            gate.wait(0.2)
+            # 4 batches in flight plus the one waiting for a slot
+            self.assertLessEqual(len(read), 5)
+        finally:
+            gate.set()
+            t.join()
+        self.assertEqual(len(read), 100)
+
+    def test_load_aborts_when_server_unavailable(self):
+        read = []
+
+        class DownCollection(FakeCollection):
+            def insert_many(self, docs, ordered=True):
+                with self._lock:
+                    self.batches.append(list(docs))
+                raise ServerSelectionTimeoutError("localhost:27017: [Errno 111] Connection refused")
+
+        def source():
+            for i in range(100000):
+                read.append(i)
+                yield {"i": i}
+
+        collection = DownCollection()
+        result = BulkLoader(collection, batch_size=10, workers=2).load(source())
+        self.assertEqual(result.inserted_count, 0)
+        # only the batches actually sent are counted, the rest read are skipped
+        self.assertEqual(result.batch_count, len(collection.batches))
+        self.assertGreater(result.skipped_batches, 0)
+        self.assertEqual((result.batch_count + result.skipped_batches) * 10, len(read))
+        self.assertIn("Connection refused", result.aborted)
+        self.assertEqual(result.errors, [])
+        # stopped after the batches that were already in flight
+        self.assertLess(len(read), 100)
+
+    def test_invalid_args(self):
+        with self.assertRaises(ValueError):
+            BulkLoader(FakeCollection(), batch_size=0)
+        with self.assertRaises(ValueError):
+            BulkLoader(FakeCollection(), workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from pymongoshell.errorhandling import handle_exceptions, args_to_string, bounded_repr, \
+    MAX_CONTEXT_LENGTH
+
+from helpers import captured_output
+
+
+class Unprintable:
+    """
+    Fails the test if anything tries to render it.
+    """
+
+    def __repr__(self):
+        raise AssertionError("argument rendered on the success path")
+
+    __str__ = __repr__
+
+
+class TestErrorHandling(unittest.TestCase):
+
+    def test_args_to_string(self):
+        self.assertEqual(args_to_string(), "")
+        self.assertEqual(args_to_string(1, 2), "1, 2")
+        self.assertEqual(args_to_string(1, a="b"), "1, 'a'='b'")
+
+    def test_bounded_repr(self):
+        big = [{"a": i, "nested": {"b": {"c": {"d": i}}}} for i in range(100000)]
+        s = bounded_repr(big)
+        self.assertLessEqual(len(s), MAX_CONTEXT_LENGTH)
+        self.assertTrue(s.endswith("...]"), s)
+        self.assertLessEqual(len(bounded_repr("x" * 100000)), MAX_CONTEXT_LENGTH)
+
+    def test_lazy_context(self):
+
+        @handle_exceptions("ok")
+        def ok(x):
+            return 1
+
+        self.assertEqual(ok(Unprintable()), 1)
+
+    def test_bounded_context(self):
+
+        @handle_exceptions("fails")
+        def fails(x):
+            raise TypeError("bad")
+
+        with captured_output() as (out, err):
+            fails(list(range(1000000)))
+        self.assertTrue("CLI TypeError: 'fails([0, 1," in err.getvalue(), err.getvalue())
+        self.assertLess(len(err.getvalue()), MAX_CONTEXT_LENGTH + 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import unittest
+from unittest import mock
+
+from pymongoshell.errorhandling import MongoDBShellError
+from pymongoshell.explain import ExplainResult, describe_plan, explain_command, run_explain
+from pymongoshell.mongoclient import MongoClient
+
+from helpers import captured_output
+
+
+IXSCAN_EXPLAIN = {
+    "queryPlanner": {
+        "namespace": "demo.zipcodes",
+        "winningPlan": {"stage": "FETCH",
+                        "inputStage": {"stage": "IXSCAN", "keyPattern": {"state": 1},
+                                       "indexName": "state_1"}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}]},
+    "executionStats": {"nReturned": 1595, "executionTimeMillis": 3,
+                       "totalKeysExamined": 1595, "totalDocsExamined": 1595},
+    "ok": 1.0}
+
+COLLSCAN_EXPLAIN = {
+    "queryPlanner": {
+        "winningPlan": {"stage": "COLLSCAN", "filter": {"city": {"$eq": "PALMER"}}},
+        "rejectedPlans": []},
+    "executionStats": {"nReturned": 1, "executionTimeMillis": 12,
+                       "totalKeysExamined": 0, "totalDocsExamined": 29353},
+    "ok": 1.0}
+
+# An aggregation with the query planner output nested in its $cursor stage,
+# and the slot based engine's queryPlan wrapper.
+AGGREGATE_EXPLAIN = {
+    "stages": [{"$cursor": {
+        "queryPlanner": {"winningPlan": {"queryPlan": {
+            "stage": "OR",
+            "inputStages": [{"stage": "IXSCAN", "indexName": "a_1"},
+                            {"stage": "IXSCAN", "indexName": "b_1"}]}}},
+        "executionStats": {"nReturned": 10, "executionTimeMillis": 1,
+                           "totalKeysExamined": 10, "totalDocsExamined": 10}}},
+        {"$group": {"_id": 1, "n": {"$sum": 1}}}],
+    "ok": 1.0}
+
+
+class FakeDatabase:
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.commands = []
+
+    def command(self, name, value, verbosity=None):
+        self.commands.append((name, value, verbosity))
+        return self.reply
+
+
+class FakeCollection:
+    """
+    Collection whose writes must never run in explain mode.
+    """
+
+    def __init__(self, reply):
+        self.name = "zipcodes"
+        self.full_name = "demo.zipcodes"
+        self.database = FakeDatabase(reply)
+
+    def find_one(self, filter=None):
+        return {"found": True}
+
+    def delete_many(self, filter):
+        raise AssertionError("delete_many ran in explain mode")
+
+    def insert_one(self, doc):
+        return None
+
+    def count_documents(self, filter, **kwargs):
+        raise AssertionError("count_documents ran in explain mode")
+
+
+class TestExplain(unittest.TestCase):
+
+    def test_summary(self):
+        result = ExplainResult("find", "demo.zipcodes", "executionStats", IXSCAN_EXPLAIN)
+        self.assertEqual(result.plan, "FETCH -> IXSCAN state_1")
+        self.assertEqual(result.indexes, ["state_1"])
+        self.assertFalse(result.collscan)
+        self.assertEqual(result.rejected_plans, 1)
+        self.assertEqual(result.docs_per_returned, 1.0)
+        self.assertEqual(result.warnings(), [])
+        lines = list(result.lines())
+        self.assertEqual(lines[0], "explain find demo.zipcodes (executionStats)")
+        self.assertIn("examined : 1595 keys, 1595 docs (1.0 docs per doc returned)", lines)
+
+    def test_collscan_flagged(self):
+        result = ExplainResult("find", "demo.zipcodes", "executionStats", COLLSCAN_EXPLAIN)
+        self.assertTrue(result.collscan)
+        self.assertEqual(result.indexes, [])
+        warnings = [line for line in result.lines() if line.startswith("WARNING")]
+        self.assertEqual(len(warnings), 2)
+        self.assertIn("COLLSCAN", warnings[0])
+        self.assertIn("29353.0 documents examined per document returned", warnings[1])
+
+    def test_nested_plan(self):
+        result = ExplainResult("aggregate", "demo.zipcodes", "executionStats", AGGREGATE_EXPLAIN)
+        self.assertEqual(result.plan, "OR(IXSCAN a_1, IXSCAN b_1)")
+        self.assertEqual(result.indexes, ["a_1", "b_1"])
+        self.assertEqual(result.returned, 10)
+
+    def test_query_planner_only(self):
+        raw = {"queryPlanner": IXSCAN_EXPLAIN["queryPlanner"]}
+        result = ExplainResult("find", "demo.zipcodes", "queryPlanner", raw)
+        self.assertIsNone(result.returned)
+        self.assertFalse(any(line.startswith("examined") for line in result.lines()))
+
+    def test_partial_stats(self):
+        raw = {"queryPlanner": IXSCAN_EXPLAIN["queryPlanner"], "executionStats": {"nReturned": 5}}
+        result = ExplainResult("find", "demo.zipcodes", "executionStats", raw)
+        self.assertIsNone(result.docs_per_returned)
+        self.assertIn("examined : None keys, None docs", list(result.lines()))
+
+    def test_sharded_plan(self):
+        plan = {"stage": "SHARD_MERGE",
+                "shards": [{"shardName": "s0", "winningPlan": {"stage": "COLLSCAN"}},
+                           {"shardName": "s1", "winningPlan": {"stage": "COLLSCAN"}}]}
+        self.assertEqual(describe_plan(plan), "SHARD_MERGE(COLLSCAN, COLLSCAN)")
+
+    def test_commands(self):
+        self.assertEqual(explain_command("col", "find", ({"a": 1}, ["b"]), {"sort": [("c", -1)], "limit": 5}),
+                         {"find": "col", "filter": {"a": 1}, "projection": {"b": 1},
+                          "sort": {"c": -1}, "limit": 5})
+        self.assertEqual(explain_command("col", "find_one", ({"a": 1},)),
+                         {"find": "col", "filter": {"a": 1}, "singleBatch": True, "limit": 1})
+        self.assertEqual(explain_command("col", "count_documents", ({"a": 1},), {"limit": 3}),
+                         {"aggregate": "col", "cursor": {},
+                          "pipeline": [{"$match": {"a": 1}}, {"$limit": 3},
+                                       {"$group": {"_id": 1, "n": {"$sum": 1}}}]})
+        self.assertEqual(explain_command("col", "update_many", ({"a": 1}, {"$set": {"b": 2}}), {"upsert": True}),
+                         {"update": "col", "updates": [{"q": {"a": 1}, "u": {"$set": {"b": 2}},
+                                                        "multi": True, "upsert": True}]})
+        self.assertEqual(explain_command("col", "delete_one", ({"a": 1},), {"hint": "a_1"}),
+                         {"delete": "col", "deletes": [{"q": {"a": 1}, "limit": 1, "hint": "a_1"}]})
+        with self.assertRaises(MongoDBShellError):
+            explain_command("col", "insert_one", ({"a": 1},))
+        with self.assertRaises(MongoDBShellError):
+            explain_command("col", "find", (), {"no_such_option": 1})
+
+    def test_run_explain(self):
+        collection = FakeCollection(IXSCAN_EXPLAIN)
+        result = run_explain(collection, "aggregate", ([{"$match": {"state": "NY"}}],),
+                             verbosity="queryPlanner")
+        name, command, verbosity = collection.database.commands[0]
+        self.assertEqual(name, "explain")
+        self.assertEqual(command["pipeline"], [{"$match": {"state": "NY"}}])
+        self.assertEqual(verbosity, "queryPlanner")
+        self.assertEqual(result.namespace, "demo.zipcodes")
+        with self.assertRaises(MongoDBShellError):
+            run_explain(collection, "find", verbosity="everything")
+
+
+class TestClientExplain(unittest.TestCase):
+
+    def setUp(self):
+        self._c = MongoClient(banner=False)
+        self._c.paginate = False
+        self._c.line_numbers = False
+
+    def tearDown(self):
+        self._c.close()
+
+    def test_explain_mode(self):
+        col = FakeCollection(COLLSCAN_EXPLAIN)
+        find_one = self._c.interceptor(col.find_one)
+        delete_many = self._c.interceptor(col.delete_many)
+        insert_one = self._c.interceptor(col.insert_one)
+        self._c.explain_mode = True
+        self._c.explain_verbosity = "allPlansExecution"
+        with captured_output() as (out, err):
+            find_one({"city": "PALMER"})
+            delete_many({"city": "PALMER"})
+            insert_one({"x": 1})  # not explainable, runs as usual
+        self.assertEqual(err.getvalue(), "")
+        self.assertEqual(len(col.database.commands), 2)
+        self.assertEqual(col.database.commands[1][1], {"delete": "zipcodes",
+                                                       "deletes": [{"q": {"city": "PALMER"}, "limit": 0}]})
+        self.assertEqual(col.database.commands[1][2], "allPlansExecution")
+        self.assertEqual(out.getvalue().count("WARNING  : COLLSCAN"), 2)
+        self.assertTrue(out.getvalue().endswith("None\n"))
+
+        self._c.explain_mode = False
+        with captured_output() as (out, err):
+            find_one({"city": "PALMER"})
+        self.assertEqual(out.getvalue(), "{'found': True}\n")
+
+    def test_count_documents_explained(self):
+        col = FakeCollection(COLLSCAN_EXPLAIN)
+        self._c.explain_mode = True
+        with mock.patch.object(self._c, "_collection", col):
+            with captured_output() as (out, err):
+                self.assertIsNone(self._c.count_documents({"city": "PALMER"}))
+        self.assertEqual(err.getvalue(), "")
+        self.assertEqual(col.database.commands[0][1]["pipeline"][0], {"$match": {"city": "PALMER"}})
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "explain count_documents demo.zipcodes (executionStats)")
+        self.assertIn("WARNING  : COLLSCAN: no index used, every document in the collection is read", lines)
+        self.assertTrue(any(line.startswith("WARNING  : POOR SELECTIVITY") for line in lines))
+        self.assertIsInstance(self._c.result, ExplainResult)
+
+    def test_verbosity_checked(self):
+        with self.assertRaises(MongoDBShellError):
+            self._c.explain_verbosity = "verbose"
+        self.assertEqual(self._c.explain_verbosity, "executionStats")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import bson
+from bson import ObjectId, json_util
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+
+from pymongoshell.bulkload import read_documents
+from pymongoshell.errorhandling import MongoDBShellError
+from pymongoshell.export import Exporter, ExportResult, export_format
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self._docs = docs
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    """
+    Returns its documents from find, as RawBSONDocuments if the codec
+    options ask for them.
+    """
+
+    def __init__(self, docs, codec_options=DEFAULT_CODEC_OPTIONS):
+        self._docs = docs
+        self.codec_options = codec_options
+        self.cursors = []
+        self.find_args = None
+
+    def with_options(self, codec_options):
+        return FakeCollection(self._docs, codec_options)
+
+    def find(self, filter, projection=None, **kwargs):
+        self.find_args = (filter, projection, kwargs)
+        docs = [bson.decode(bson.encode(d), codec_options=self.codec_options) for d in self._docs]
+        cursor = FakeCursor(docs)
+        self.cursors.append(cursor)
+        return cursor
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.docs = [{"_id": ObjectId(), "i": i, "name": f"name {i}"} for i in range(50)]
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def test_export_format(self):
+        self.assertEqual(export_format("a.bson"), "bson")
+        self.assertEqual(export_format("a.bson.gz"), "bson")
+        self.assertEqual(export_format("a.jsonl"), "jsonl")
+        self.assertEqual(export_format("a.json.gz"), "jsonl")
+        self.assertEqual(export_format("a.bson", "jsonl"), "jsonl")
+        with self.assertRaises(ValueError):
+            export_format("a.csv", "csv")
+
+    def test_jsonl(self):
+        collection = FakeCollection(self.docs)
+        result = Exporter(collection).export(self.path("out.jsonl"), filter={"i": {"$gt": 1}},
+                                             projection={"name": 0}, limit=10)
+        self.assertIsInstance(result, ExportResult)
+        self.assertEqual(result.count, 50)
+        self.assertEqual(result.format, "jsonl")
+        self.assertEqual(collection.find_args[0], {"i": {"$gt": 1}})
+        self.assertEqual(collection.find_args[1], {"name": 0})
+        self.assertEqual(collection.find_args[2]["limit"], 10)
+        with open(self.path("out.jsonl")) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 50)
+        self.assertEqual(json_util.loads(lines[3]), self.docs[3])
+        self.assertEqual(result.bytes_written, os.path.getsize(self.path("out.jsonl")))
+        self.assertTrue(collection.cursors[0].closed)
+
+    def test_bson_is_raw(self):
+        collection = FakeCollection(self.docs)
+        result = Exporter(collection).export(self.path("out.bson"))
+        self.assertEqual(result.format, "bson")
+        with open(self.path("out.bson"), "rb") as f:
+            data = f.read()
+        self.assertEqual(data, b"".join(bson.encode(d) for d in self.docs))
+        self.assertEqual(list(read_documents(self.path("out.bson"))), self.docs)
+
+    def test_compressed(self):
+        collection = FakeCollection(self.docs)
+        result = Exporter(collection).export(self.path("out.bson.gz"))
+        self.assertEqual(result.count, 50)
+        with gzip.open(self.path("out.bson.gz"), "rb") as f:
+            self.assertEqual(list(bson.decode_file_iter(f)), self.docs)
+        self.assertEqual(result.file_size, os.path.getsize(self.path("out.bson.gz")))
+
+        Exporter(collection).export(self.path("out.jsonl.gz"), compress=True)
+        self.assertEqual(len(list(read_documents(self.path("out.jsonl.gz")))), 50)
+
+        # compress and the name must agree or bulk_load couldn't read the file
+        with self.assertRaises(MongoDBShellError):
+            Exporter(collection).export(self.path("plain.jsonl"), compress=True)
+        with self.assertRaises(MongoDBShellError):
+            Exporter(collection).export(self.path("plain.jsonl.gz"), compress=False)
+        self.assertFalse(os.path.exists(self.path("plain.jsonl")))
+
+    def test_cursor_closed_on_error(self):
+        collection = FakeCollection(self.docs)
+        with self.assertRaises(OSError):
+            Exporter(collection).export(self.path("missing/out.jsonl"))
+        self.assertTrue(collection.cursors[0].closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+import unittest
+
+from pymongo.errors import AutoReconnect, ServerSelectionTimeoutError
+
+from pymongoshell.latency import LatencyStats, PingResult, percentile, ping
+
+
+class FakeAdmin:
+
+    def __init__(self, fail_every=0):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._fail_every = fail_every
+        self._lock = threading.Lock()
+
+    def command(self, name):
+        with self._lock:
+            self.calls = self.calls + 1
+            call = self.calls
+            self.active = self.active + 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.001)
+            if self._fail_every and call % self._fail_every == 0:
+                raise AutoReconnect("connection reset")
+            return {"ok": 1}
+        finally:
+            with self._lock:
+                self.active = self.active - 1
+
+
+class FakeTopology:
+
+    def __init__(self, seeds):
+        self._seeds = seeds
+
+    def server_descriptions(self):
+        return {seed: None for seed in self._seeds}
+
+
+class FakeClient:
+
+    def __init__(self, admin):
+        self.admin = admin
+        self.nodes = frozenset([("localhost", 27017)])
+
+
+class TestMPing(unittest.TestCase):
+
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 95), 95)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_latency_stats(self):
+        stats = LatencyStats([3_000_000, 1_000_000, 2_000_000])
+        self.assertEqual(stats.min, 1_000_000)
+        self.assertEqual(stats.max, 3_000_000)
+        self.assertEqual(stats.p50, 2_000_000)
+        self.assertEqual(stats.jitter, 1_500_000)
+        self.assertEqual(stats.to_dict()["p50"], 2.0)
+        self.assertEqual(str(LatencyStats([])), "no samples")
+
+    def test_ping(self):
+        admin = FakeAdmin()
+        result = ping(FakeClient(admin), count=40, concurrency=4)
+        self.assertIsInstance(result, PingResult)
+        self.assertEqual(admin.calls, 44)
+        self.assertEqual(result.setup.count, 4)
+        self.assertEqual(result.rtt.count, 40)
+        self.assertGreater(admin.max_active, 1)
+        self.assertGreaterEqual(result.rtt.min, 1_000_000)
+        self.assertEqual(result.host, "localhost:27017")
+        json.dumps(result.to_dict())
+        self.assertTrue(str(result).startswith("ping localhost:27017: 40 pings"))
+
+    def test_server_not_available(self):
+        class DownAdmin(FakeAdmin):
+            def command(self, name):
+                with self._lock:
+                    self.calls = self.calls + 1
+                raise ServerSelectionTimeoutError("localhost:27017: [Errno 111] Connection refused, "
+                                                  "Topology Description: " + "x" * 5000)
+
+        admin = DownAdmin()
+        client = FakeClient(admin)
+        client.nodes = frozenset()
+        client.topology_description = FakeTopology([("db1.example.com", 27017)])
+        result = ping(client, count=10, concurrency=2)
+        self.assertEqual(admin.calls, 2)  # only the setup commands
+        self.assertFalse(result.available)
+        self.assertEqual(result.host, "db1.example.com:27017")
+        self.assertLessEqual(len(result.first_error), 200)
+        self.assertEqual(str(result).splitlines()[0], "ping db1.example.com:27017: Server not available")
+        self.assertFalse(result.to_dict()["available"])
+
+    def test_rate(self):
+        start = time.perf_counter()
+        result = ping(FakeClient(FakeAdmin()), count=10, rate=100)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(result.rtt.count, 10)
+
+    def test_errors(self):
+        result = ping(FakeClient(FakeAdmin(fail_every=3)), count=8)
+        self.assertEqual(result.errors, 3)
+        self.assertEqual(result.rtt.count + result.setup.count, 6)
+        self.assertEqual(result.first_error, "connection reset")
+        self.assertIn("errors: 3", str(result))
+
+    def test_invalid_args(self):
+        for kwargs in [{"count": 0}, {"concurrency": 0}, {"rate": 0}]:
+            with self.assertRaises(ValueError):
+                ping(FakeClient(FakeAdmin()), **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
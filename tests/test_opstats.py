@@ -0,0 +1,59 @@
+import unittest
+
+from pymongo.results import InsertManyResult, UpdateResult, DeleteResult, InsertOneResult
+
+from pymongoshell.opstats import OpRecord, OpStats, affected_count, format_bytes
+
+
+class TestOpStats(unittest.TestCase):
+
+    def test_affected_count(self):
+        self.assertEqual(affected_count(InsertOneResult(1, True)), 1)
+        self.assertEqual(affected_count(InsertManyResult([1, 2, 3], True)), 3)
+        self.assertIsNone(affected_count(InsertManyResult([1, 2, 3], False)))
+        self.assertEqual(affected_count(UpdateResult({"n": 2, "nModified": 2}, True)), 2)
+        self.assertEqual(affected_count(UpdateResult({"n": 1, "nModified": 0,
+                                                      "upserted": 7}, True)), 1)
+        self.assertEqual(affected_count(DeleteResult({"n": 4}, True)), 4)
+        self.assertEqual(affected_count({"a": 1}), 1)
+        self.assertEqual(affected_count([1, 2]), 2)
+        self.assertIsNone(affected_count(42))
+
+    def test_format_bytes(self):
+        self.assertEqual(format_bytes(10), "10 B")
+        self.assertEqual(format_bytes(2048), "2.0 KB")
+        self.assertEqual(format_bytes(3 * 1024 * 1024), "3.0 MB")
+
+    def test_footer(self):
+        op = OpRecord("find", "demo.zipcodes")
+        op.call_time = 0.001
+        op.render_time = 0.002
+        op.docs = 20
+        op.bytes_rendered = 4096
+        self.assertEqual(op.footer(),
+                         "Time: 3.000 ms (call 1.000 ms, render 2.000 ms), 20 docs, 4.0 KB")
+        op.server_time = 0.0005
+        self.assertIn("server 0.500 ms", op.footer())
+
+    def test_aggregate(self):
+        stats = OpStats()
+        self.assertEqual(str(stats), "no operations recorded")
+        for method, elapsed, docs in [("find", 0.01, 10), ("find", 0.03, 5), ("count_documents", 0.002, None)]:
+            op = OpRecord(method, "demo.zipcodes")
+            op.call_time = elapsed
+            op.docs = docs
+            stats.add(op)
+        self.assertEqual(len(stats), 2)
+        find = stats.get("demo.zipcodes", "find")
+        self.assertEqual(find.calls, 2)
+        self.assertEqual(find.docs, 15)
+        self.assertAlmostEqual(find.mean_time, 0.02)
+        self.assertAlmostEqual(find.max_time, 0.03)
+        lines = str(stats).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("namespace"))
+        self.assertIn("count_documents", lines[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,23 +1,16 @@
 import unittest
-from contextlib import contextmanager
 import string
 import random
 import os
-from io import StringIO
 import sys
+from unittest import mock
+from pymongoshell import pager as pager_module
 from pymongoshell.pager import Pager
 from pymongoshell.pager import LineNumbers
+import bson
+from bson.raw_bson import RawBSONDocument
 
-
-@contextmanager
-def captured_output():
-    new_out, new_err = StringIO(), StringIO()
-    old_out, old_err = sys.stdout, sys.stderr
-    try:
-        sys.stdout, sys.stderr = new_out, new_err
-        yield sys.stdout, sys.stderr
-    finally:
-        sys.stdout, sys.stderr = old_out, old_err
+from helpers import captured_output
 
 
 def randomString(string_length: int = 10):
@@ -76,7 +69,7 @@ class TestPager(unittest.TestCase):
         line = '12345678901234567890'  # len(line) = 20
         lines_in = [line for _ in range(3)]
         assert len(line) == 20
-        pager = Pager()
+        pager = Pager(interactive=True)
         #print("lines in")
         #print(lines_in)
         with captured_output() as (out, err):
@@ -100,13 +93,178 @@ class TestPager(unittest.TestCase):
         self.assertEqual(out.getvalue(), test_output, out.getvalue())
 
     def test_list_to_line(self):
-        pager = Pager()
         test_list = [1, 2, 3, 4]
-        l = Pager.list_to_lines([1, 2, 3, 4])
+        l = list(Pager.list_to_lines([1, 2, 3, 4]))
         self.assertEqual(len(l), len(test_list))
         self.assertEqual("[1,", l[0])
+        self.assertEqual("2,", l[1])
         self.assertEqual("4]", l[3])
+        self.assertEqual(list(Pager.list_to_lines([1])), ["[1]"])
+        self.assertEqual(list(Pager.list_to_lines([])), ["[]"])
+
+    def test_list_to_lines_lazy(self):
+        def elements():
+            for i in range(10 ** 9):
+                yield i
+
+        lines = Pager.list_to_lines(elements())
+        self.assertEqual(next(lines), "[0,")
+        self.assertEqual(next(lines), "1,")
+
+
+    def test_paginate_pages(self):
+        # 2 short lines per page (4 screen lines less a 2 line prompt)
+        pager = Pager(interactive=True, paginate_prompt="more")
+        lines_in = [f"line{i}" for i in range(5)]
+        with mock.patch("builtins.input", return_value="") as prompt:
+            with captured_output() as (out, err):
+                pager.paginate_lines(lines_in, default_terminal_cols=20, default_terminal_lines=3)
+        self.assertEqual(prompt.call_count, 2)
+        self.assertEqual(out.getvalue(),
+                         "1 : line0\n2 : line1\nmore"
+                         "3 : line2\n4 : line3\nmore"
+                         "5 : line4\n")
+
+    def test_paginate_quit(self):
+        pager = Pager(interactive=True, paginate_prompt="more")
+        lines_in = [f"line{i}" for i in range(100)]
+        with mock.patch("builtins.input", return_value="q"):
+            with captured_output() as (out, err):
+                pager.paginate_lines(lines_in, default_terminal_cols=20, default_terminal_lines=3)
+        self.assertEqual(out.getvalue(), "1 : line0\n2 : line1\nmore")
+
+    def test_paginate_wrapped_residue(self):
+        # every line wraps, nothing may be lost at the end of the input
+        pager = Pager(interactive=True, paginate_prompt="more")
+        pager.line_numbers = False
+        lines_in = ["x" * 30 for _ in range(50)]
+        with mock.patch("builtins.input", return_value=""):
+            with captured_output() as (out, err):
+                pager.paginate_lines(lines_in, default_terminal_cols=20, default_terminal_lines=10)
+        rows = out.getvalue().replace("more", "").splitlines()
+        self.assertEqual(len(rows), 100)
+        self.assertEqual("".join(rows), "x" * 1500)
+
+    @staticmethod
+    def count_paginate(lines_in):
+        """
+        Page lines_in and count the work done: rows wrapped, pages laid out.
+        """
+        pager = Pager(interactive=True, paginate_prompt="more")
+        with mock.patch("pymongoshell.pager.row_end", wraps=pager_module.row_end) as row_end, \
+                mock.patch.object(Pager, "page_geometry", autospec=True,
+                                  side_effect=Pager.page_geometry) as page_geometry, \
+                mock.patch("builtins.input", return_value=""):
+            with captured_output() as (out, err):
+                pager.paginate_lines(lines_in, default_terminal_cols=40, default_terminal_lines=24)
+        return len(out.getvalue().splitlines()), row_end.call_count, page_geometry.call_count
+
+    def test_paginate_scaling(self):
+        # Each row is wrapped once and each page laid out once, so the work
+        # done grows with the output, never with what has been seen before.
+        for count in (5000, 40000):
+            lines, rows, pages = self.count_paginate(["y" * 50 for _ in range(count)])
+            self.assertEqual(rows, count * 2)  # 50 characters make two rows
+            self.assertEqual(pages, -(-rows // 23))  # 23 rows a page and a prompt line
+            self.assertEqual(lines, rows)  # each prompt shares a line with the next row
+
+    def test_paginate_long_line_copies(self):
+        # A line much wider than the screen is split by offset: each
+        # character is copied into one row and the rest of the line is
+        # never copied again.
+        class CountingStr(str):
+            copied = 0
+
+            def __getitem__(self, item):
+                part = str.__getitem__(self, item)
+                CountingStr.copied = CountingStr.copied + len(part)
+                return part
+
+        for length in (200_000, 1_600_000):
+            CountingStr.copied = 0
+            pager = Pager(interactive=True, line_numbers=False, paginate_prompt="more")
+            with mock.patch("builtins.input", return_value=""):
+                with captured_output() as (out, err):
+                    pager.paginate_lines([CountingStr("z" * length)],
+                                         default_terminal_cols=40, default_terminal_lines=24)
+            self.assertEqual(CountingStr.copied, length)
+            rows = out.getvalue().replace("more", "").splitlines()
+            self.assertEqual(len(rows), length // 40)
+            self.assertEqual("".join(rows), "z" * length)
+
+    def test_paginate_long_line_rows(self):
+        pager = Pager(interactive=True, line_numbers=False)
+        with mock.patch("builtins.input", return_value=""):
+            with captured_output() as (out, err):
+                pager.paginate_lines(["abcdefghij" * 10, "end"],
+                                     default_terminal_cols=40, default_terminal_lines=24)
+        rows = out.getvalue().splitlines()
+        self.assertEqual(rows[:4], ["abcdefghij" * 4, "abcdefghij" * 4, "abcdefghij" * 2, "end"])
+
+    def test_not_a_terminal(self):
+        # Piped output is written in batches with no prompts
+        pager = Pager(paginate_prompt="more")
+        lines_in = [f"line{i}" for i in range(1000)]
+        with mock.patch("builtins.input") as prompt:
+            with captured_output() as (out, err):
+                with mock.patch.object(sys.stdout, "write", wraps=sys.stdout.write) as write:
+                    pager.paginate_lines(iter(lines_in), default_terminal_cols=20, default_terminal_lines=3)
+        prompt.assert_not_called()
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(out.getvalue(), "".join(f"{i} : line{i - 1}\n" for i in range(1, 1001)))
+        self.assertEqual(pager.bytes_rendered, sum(len(l) + 1 for l in lines_in))
+
+        pager.line_numbers = False
+        with captured_output() as (out, err):
+            pager.paginate_lines(["a", "", "b"])
+        self.assertEqual(out.getvalue(), "a\n\nb\n")
+
+        with mock.patch.object(sys.stdout, "isatty", return_value=True):
+            self.assertTrue(pager.is_interactive())
+        pager.interactive = False
+        with mock.patch.object(sys.stdout, "isatty", return_value=True):
+            self.assertFalse(pager.is_interactive())
+
+    def test_interrupted_output(self):
+        def lines():
+            for i in range(3):
+                yield f"line{i}"
+            raise KeyboardInterrupt
+
+        # lines already read are written, batched or not
+        for interactive in (False, True):
+            pager = Pager(paginate=False, line_numbers=False, interactive=interactive)
+            with captured_output() as (out, err):
+                pager.paginate_lines(lines())
+            self.assertEqual(out.getvalue(), "line0\nline1\nline2\nctrl-C...\n")
+
+    def test_terminal_not_batched(self):
+        # each line is on the terminal before the next is rendered
+        def lines(out):
+            for i in range(3):
+                yield f"line{i}"
+                self.assertTrue(out.getvalue().endswith(f"line{i}\n"))
+
+        pager = Pager(paginate=False, line_numbers=False, interactive=True)
+        with captured_output() as (out, err):
+            pager.paginate_lines(lines(out))
+        self.assertEqual(out.getvalue(), "line0\nline1\nline2\n")
+
+    def test_raw_documents(self):
+        docs = [{"_id": i, "name": f"name {i}"} for i in range(1000)]
+        raw_docs = [RawBSONDocument(bson.encode(d)) for d in docs]
+        pager = Pager(paginate=False)
+        self.assertEqual(list(pager.cursor_to_lines(raw_docs)),
+                         list(pager.cursor_to_lines(docs)))
 
+        pager = Pager(interactive=True, paginate_prompt="more")
+        with mock.patch("bson.decode", wraps=bson.decode) as decode:
+            with mock.patch("builtins.input", return_value="q"):
+                with captured_output() as (out, err):
+                    pager.print_cursor(raw_docs)
+        # only the first page (plus one line of look ahead) is decoded
+        self.assertLess(decode.call_count, len(raw_docs))
+        self.assertEqual(decode.call_count, len(out.getvalue().splitlines()))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+import unittest
+import threading
+from unittest import mock
+
+from pymongoshell.pager import Pager
+from pymongoshell.prefetch import Prefetcher
+
+from helpers import captured_output
+
+
+class FakeCursor:
+    """
+    Stands in for a pymongo cursor, counting how many docs have been read.
+    """
+
+    def __init__(self, count):
+        self._count = count
+        self.produced = 0
+        self.closed = False
+
+    def __iter__(self):
+        for i in range(self._count):
+            self.produced = self.produced + 1
+            yield {"i": i}
+
+    def close(self):
+        self.closed = True
+
+
+class FailingCursor(FakeCursor):
+
+    def __iter__(self):
+        yield {"i": 0}
+        raise ValueError("getMore failed")
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_order(self):
+        p = Prefetcher(FakeCursor(1000), batch_size=7)
+        self.assertEqual([d["i"] for d in p], list(range(1000)))
+        p.close()
+
+    def test_bounded(self):
+        cursor = FakeCursor(100000)
+        p = Prefetcher(cursor, batch_size=10, max_batches=2)
+        it = iter(p)
+        next(it)
+        p._thread.join(0.2)  # give the thread time to fill the queue
+        # two queued batches, one being handed over and one being built
+        self.assertLessEqual(cursor.produced, 10 * 4 + 1)
+        p.close()
+        self.assertFalse(p.is_alive())
+        self.assertTrue(cursor.closed)
+
+    def test_error(self):
+        p = Prefetcher(FailingCursor(1), batch_size=10)
+        with self.assertRaises(ValueError):
+            list(p)
+        p.close()
+
+    def test_print_cursor_quit(self):
+        pager = Pager(interactive=True, prefetch=True)
+        cursor = FakeCursor(100000)
+        threads = threading.active_count()
+        with mock.patch("builtins.input", return_value="q"):
+            with captured_output() as (out, err):
+                pager.print_cursor(cursor)
+        self.assertTrue(out.getvalue().startswith("1  : {'i': 0}"), out.getvalue())
+        self.assertTrue(cursor.closed)
+        self.assertLess(cursor.produced, 100000)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_print_cursor(self):
+        pager = Pager(prefetch=True, paginate=False)
+        with captured_output() as (out, err):
+            pager.print_cursor(FakeCursor(50))
+        self.assertEqual(len(out.getvalue().splitlines()), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
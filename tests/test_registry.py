@@ -0,0 +1,84 @@
+import threading
+import unittest
+
+from pymongoshell.registry import ClientRegistry, registry_key
+
+
+class FakeClient:
+
+    def __init__(self, uri, *args, **kwargs):
+        self.uri = uri
+        self.args = args
+        self.kwargs = kwargs
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_registry_key(self):
+        self.assertEqual(registry_key("mongodb://LocalHost/demo.zipcodes", (), {}),
+                         registry_key("mongodb://localhost:27017/test", (), {}))
+        self.assertEqual(registry_key("mongodb://b:27017,a:27017/?w=1&retryWrites=true", (), {}),
+                         registry_key("mongodb://a,b/?retryWrites=true&w=1", (), {}))
+        self.assertNotEqual(registry_key("mongodb://localhost", (), {}),
+                            registry_key("mongodb://localhost:27018", (), {}))
+        self.assertNotEqual(registry_key("mongodb://localhost", (), {"connect": False}),
+                            registry_key("mongodb://localhost", (), {"connect": True}))
+        # With credentials the database is the default authSource.
+        self.assertNotEqual(registry_key("mongodb://joe:pw@localhost/admin", (), {}),
+                            registry_key("mongodb://joe:pw@localhost/demo", (), {}))
+        self.assertNotEqual(registry_key("mongodb+srv://cluster0.example.invalid", (), {}),
+                            registry_key("mongodb://cluster0.example.invalid", (), {}))
+
+    def test_acquire_release(self):
+        registry = ClientRegistry(factory=FakeClient)
+        a = registry.acquire("mongodb://localhost/demo", serverSelectionTimeoutMS=5000)
+        b = registry.acquire("mongodb://localhost:27017", serverSelectionTimeoutMS=5000)
+        c = registry.acquire("mongodb://localhost", serverSelectionTimeoutMS=1000)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(a.kwargs, {"serverSelectionTimeoutMS": 5000})
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(registry.refcount(a), 2)
+        registry.release(a)
+        self.assertFalse(a.closed)
+        registry.release(b)
+        self.assertTrue(a.closed)
+        self.assertEqual(registry.refcount(a), 0)
+        self.assertEqual(len(registry), 1)
+        d = registry.acquire("mongodb://localhost", serverSelectionTimeoutMS=5000)
+        self.assertIsNot(a, d)
+        registry.release(c)
+        registry.release(d)
+        self.assertEqual(len(registry), 0)
+
+    def test_release_unknown(self):
+        registry = ClientRegistry(factory=FakeClient)
+        client = FakeClient("mongodb://localhost")
+        registry.release(client)
+        self.assertTrue(client.closed)
+
+    def test_threads(self):
+        registry = ClientRegistry(factory=FakeClient)
+        clients = []
+
+        def acquire():
+            clients.append(registry.acquire("mongodb://localhost"))
+
+        threads = [threading.Thread(target=acquire) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(c) for c in clients}), 1)
+        self.assertEqual(registry.refcount(clients[0]), 8)
+        for c in clients:
+            registry.release(c)
+        self.assertTrue(clients[0].closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
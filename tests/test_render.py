@@ -0,0 +1,78 @@
+import unittest
+import datetime
+import pprint
+import random
+import string
+
+from bson import ObjectId, Decimal128, Int64, SON
+
+from pymongoshell.pager import Pager
+from pymongoshell.render import DocRenderer
+
+
+def random_string(r: random.Random):
+    n = r.choice([0, 1, 5, 20, 60, 120])
+    return "".join(r.choice(string.ascii_letters + "  \n'\"é") for _ in range(n))
+
+
+def random_value(r: random.Random, depth: int = 0):
+    choice = r.randrange(14 if depth < 4 else 8)
+    if choice == 0:
+        return r.randint(-10 ** 12, 10 ** 12)
+    elif choice == 1:
+        return r.random() * 1e6
+    elif choice == 2:
+        return random_string(r)
+    elif choice == 3:
+        return ObjectId()
+    elif choice == 4:
+        return datetime.datetime(2020, 1, 2, 3, 4, 5, r.randrange(10 ** 6))
+    elif choice == 5:
+        return Decimal128(str(r.random()))
+    elif choice == 6:
+        return r.choice([None, True, False, Int64(7)])
+    elif choice == 7:
+        return bytes(r.randrange(256) for _ in range(r.choice([0, 3, 10, 90])))
+    elif choice in (8, 9, 10):
+        return {random_string(r)[:10]: random_value(r, depth + 1) for _ in range(r.randrange(8))}
+    elif choice in (11, 12):
+        return [random_value(r, depth + 1) for _ in range(r.randrange(8))]
+    else:
+        return tuple(random_value(r, depth + 1) for _ in range(r.randrange(3)))
+
+
+class TestRender(unittest.TestCase):
+
+    def assertSameAsPprint(self, obj, width=80):
+        self.assertEqual(list(DocRenderer(width).lines(obj)),
+                         pprint.pformat(obj, width=width).splitlines())
+
+    def test_simple(self):
+        self.assertSameAsPprint({})
+        self.assertSameAsPprint({"b": 1, "a": "x"})
+        self.assertSameAsPprint({"_id": ObjectId(), "list": list(range(40))})
+        self.assertSameAsPprint("a long string " * 20)
+        self.assertSameAsPprint((1,))
+
+    def test_random_documents(self):
+        r = random.Random(42)
+        for width in [20, 80, 120]:
+            for _ in range(500):
+                self.assertSameAsPprint(random_value(r), width)
+
+    def test_fallback(self):
+        self.assertSameAsPprint({"a": {"s": set(range(100))}})
+        self.assertSameAsPprint([SON(a=1)] * 30)
+        recursive = [1]
+        recursive.append(recursive)
+        self.assertSameAsPprint(recursive)
+
+    def test_dict_to_lines(self):
+        pager = Pager()
+        doc = {"_id": ObjectId(), "nested": {"a": list(range(30))}}
+        self.assertEqual(list(pager.dict_to_lines(doc)),
+                         pprint.pformat(doc).splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
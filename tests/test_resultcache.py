@@ -0,0 +1,204 @@
+import threading
+import time
+import unittest
+
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
+
+from pymongoshell.mongoclient import MongoClient
+from pymongoshell.resultcache import ResultCache, CachedCursor, RecordingCursor
+
+from helpers import captured_output
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self._docs = docs
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self._docs)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    """
+    Collection methods that count how often the server would be asked.
+    """
+
+    def __init__(self, codec_options=DEFAULT_CODEC_OPTIONS):
+        self.calls = 0
+        self.codec_options = codec_options
+
+    def find_one(self, filter=None, *args, **kwargs):
+        self.calls = self.calls + 1
+        return {"filter": filter, "calls": self.calls}
+
+    def count_documents(self, filter, **kwargs):
+        self.calls = self.calls + 1
+        return 42
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls = self.calls + 1
+        return FakeCursor([{"i": i} for i in range(kwargs.get("n", 3))])
+
+    def insert_one(self, doc):
+        self.calls = self.calls + 1
+        return None
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.col = FakeCollection()
+        self.cache = ResultCache(maxsize=3, ttl=60)
+
+    def call(self, method, *args, namespace="db.col", **kwargs):
+        return self.cache.call(namespace, getattr(self.col, method), args, kwargs)
+
+    def test_hit(self):
+        first = self.call("find_one", {"a": 1})
+        self.assertEqual(self.call("find_one", {"a": 1}), first)
+        self.assertEqual(self.col.calls, 1)
+        self.call("find_one", {"a": 2})
+        self.assertEqual(self.col.calls, 2)
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3)
+
+    def test_hit_is_a_copy(self):
+        self.call("find_one", {"a": 1})["filter"]["a"] = 99
+        self.call("find_one", {"a": 1})["calls"] = 99
+        self.assertEqual(self.call("find_one", {"a": 1}), {"filter": {"a": 1}, "calls": 1})
+
+    def test_key(self):
+        self.assertEqual(ResultCache.make_key("n", "m", ({"a": 1},), {"x": 1, "y": 2}),
+                         ResultCache.make_key("n", "m", ({"a": 1},), {"y": 2, "x": 1}))
+        # field order matters in documents (e.g. sort specs)
+        self.assertNotEqual(ResultCache.make_key("n", "m", ({"a": 1, "b": 1},), {}),
+                            ResultCache.make_key("n", "m", ({"b": 1, "a": 1},), {}))
+        self.assertIsNone(ResultCache.make_key("n", "m", (object(),), {}))
+
+    def test_key_has_codec_options(self):
+        # lazy_decode uses a collection returning RawBSONDocuments, its results
+        # mustn't be handed to a call expecting dicts or the other way round
+        raw = FakeCollection(DEFAULT_CODEC_OPTIONS.with_options(document_class=RawBSONDocument))
+        list(self.call("aggregate", [{"$match": {}}]))
+        list(self.cache.call("db.col", raw.aggregate, ([{"$match": {}}],), {}))
+        self.assertEqual((self.col.calls, raw.calls), (1, 1))
+        list(self.cache.call("db.col", raw.aggregate, ([{"$match": {}}],), {}))
+        self.assertEqual(raw.calls, 1)
+
+    def test_ttl(self):
+        self.cache.ttl = 0.01
+        self.call("count_documents", {})
+        time.sleep(0.02)
+        self.call("count_documents", {})
+        self.assertEqual(self.col.calls, 2)
+
+    def test_eviction(self):
+        for i in range(4):
+            self.call("find_one", {"i": i})
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        self.call("find_one", {"i": 0})
+        self.assertEqual(self.col.calls, 5)
+
+    def test_write_invalidates(self):
+        self.call("find_one", {})
+        self.call("find_one", {}, namespace="db.other")
+        self.call("insert_one", {"x": 1})
+        self.assertEqual(len(self.cache), 1)
+        self.call("find_one", {})
+        self.assertEqual(self.col.calls, 4)
+        self.cache.invalidate("db.")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_aggregate(self):
+        cursor = self.call("aggregate", [{"$match": {}}])
+        self.assertIsInstance(cursor, RecordingCursor)
+        self.assertEqual(len(self.cache), 0)  # not read yet
+        self.assertEqual(list(cursor), [{"i": 0}, {"i": 1}, {"i": 2}])
+        cached = self.call("aggregate", [{"$match": {}}])
+        self.assertIsInstance(cached, CachedCursor)
+        self.assertEqual(list(cached), [{"i": 0}, {"i": 1}, {"i": 2}])
+        self.assertEqual(self.col.calls, 1)
+
+    def test_aggregate_hit_is_a_copy(self):
+        list(self.call("aggregate", []))
+        cached = self.call("aggregate", [])
+        self.assertIsNot(cached, self.call("aggregate", []))
+        for doc in cached:
+            doc["i"] = 99
+        self.assertEqual(list(self.call("aggregate", [])), [{"i": 0}, {"i": 1}, {"i": 2}])
+
+    def test_put_from_another_thread(self):
+        # A prefetch thread can finish an aggregation while the shell thread reads the cache.
+        self.cache = ResultCache(maxsize=10, ttl=60)
+        cursors = [self.call("aggregate", [], n=i + 1) for i in range(50)]
+
+        def consume():
+            for cursor in cursors:
+                list(cursor)
+
+        t = threading.Thread(target=consume)
+        t.start()
+        for i in range(2000):
+            self.call("find_one", {"i": i % 20})
+        t.join()
+        self.assertEqual(len(self.cache), 10)
+
+    def test_aggregate_too_large(self):
+        list(self.call("aggregate", [], n=1001))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_aggregate_out_clears(self):
+        self.call("find_one", {}, namespace="db.other")
+        self.call("aggregate", [{"$out": "other"}])
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestClientResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self._c = MongoClient(banner=False)
+        self._c.paginate = False
+        self._col = FakeCollection()
+
+    def test_off_by_default(self):
+        self.assertFalse(self._c.result_cache)
+        self.assertIsNone(self._c.result_cache_stats)
+
+    def test_interceptor(self):
+        self._c.result_cache = True
+        find_one = self._c.interceptor(self._col.find_one)
+        insert_one = self._c.interceptor(self._col.insert_one)
+        with captured_output() as (out, err):
+            find_one({"a": 1})
+            find_one({"a": 1})
+            insert_one({"a": 1})
+            find_one({"a": 1})
+        self.assertEqual(self._col.calls, 3)
+        stats = self._c.result_cache_stats
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["invalidations"], 1)
+
+    def test_ttl(self):
+        self._c.result_cache_ttl = 5
+        self.assertFalse(self._c.result_cache)  # setting the TTL doesn't turn it on
+        self.assertEqual(self._c.result_cache_ttl, 5)
+        self._c.result_cache = True
+        self.assertEqual(self._c.result_cache_stats["ttl"], 5)
+        self._c.result_cache_ttl = 10
+        self.assertEqual(self._c.result_cache_stats["ttl"], 10)
+        self._c.result_cache = False
+        self.assertFalse(self._c.result_cache)
+        self.assertEqual(self._c.result_cache_ttl, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import os
+import tempfile
+
+from pymongoshell.pager import Pager
+from pymongoshell.sink import OutputSink, FLUSH_LINE, FLUSH_CALL, FLUSH_CLOSE
+
+from helpers import captured_output
+
+
+def read(fn: str):
+    with open(fn) as f:
+        return f.read()
+
+
+class TestSink(unittest.TestCase):
+
+    def setUp(self):
+        fd, self._name = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self._name)
+
+    def test_buffered(self):
+        sink = OutputSink(self._name, buffer_size=100, flush_policy=FLUSH_CLOSE)
+        sink.write("a" * 50)
+        self.assertEqual(read(self._name), "")
+        sink.write("b" * 50)
+        sink.flush()
+        self.assertEqual(read(self._name), "a" * 50 + "b" * 50)
+        sink.write("c")
+        sink.close()
+        self.assertTrue(sink.closed)
+        self.assertEqual(read(self._name), "a" * 50 + "b" * 50 + "c")
+        sink.close()  # closing twice is harmless
+
+    def test_flush_line(self):
+        sink = OutputSink(self._name, flush_policy=FLUSH_LINE)
+        sink.write("line\n")
+        self.assertEqual(read(self._name), "line\n")
+        sink.close()
+
+    def test_flush_call(self):
+        sink = OutputSink(self._name, flush_policy=FLUSH_CALL)
+        sink.write("line\n")
+        self.assertEqual(read(self._name), "")
+        sink.end_call()
+        self.assertEqual(read(self._name), "line\n")
+        sink.close()
+
+    def test_background(self):
+        sink = OutputSink(self._name, buffer_size=10, background=True)
+        for i in range(1000):
+            sink.write(f"{i}\n")
+        sink.end_call()
+        self.assertEqual(read(self._name).splitlines(), [str(i) for i in range(1000)])
+        sink.close()
+
+    def test_bad_policy(self):
+        with self.assertRaises(ValueError):
+            OutputSink(self._name, flush_policy="never")
+
+    def test_pager_keeps_file_open(self):
+        pager = Pager(paginate=False)
+        pager.output_file = self._name
+        sink = pager._output_file
+        with captured_output():
+            pager.paginate_lines(["one", "two"])
+            pager.paginate_lines(["three"])
+        self.assertIs(sink, pager._output_file)
+        self.assertFalse(sink.closed)
+        self.assertEqual(read(self._name).splitlines()[1:], ["one", "two", "three"])
+        pager.close()
+        self.assertTrue(sink.closed)
+        self.assertTrue(read(self._name).splitlines()[-1].startswith("# closing"))
+
+
+if __name__ == '__main__':
+    unittest.main()
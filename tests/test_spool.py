@@ -0,0 +1,122 @@
+import unittest
+from unittest import mock
+
+from pymongoshell.pager import Pager
+from pymongoshell.spool import LineSpool, SpooledLines
+
+from helpers import captured_output
+
+
+def page(pager, lines, commands, cols=20, rows=6):
+    """
+    Page lines answering the prompts with commands, then q.
+    """
+    with mock.patch("builtins.input", side_effect=list(commands) + ["q"] * 10):
+        with captured_output() as (out, err):
+            pager.paginate_lines(lines, default_terminal_cols=cols, default_terminal_lines=rows)
+    return out.getvalue().split("more")
+
+
+class TestLineSpool(unittest.TestCase):
+
+    def test_spool(self):
+        spool = LineSpool()
+        spool.append("first")
+        spool.append("東京 \udce9")  # lone surrogates survive the round trip
+        spool.append("third")
+        self.assertEqual(len(spool), 3)
+        self.assertEqual(spool[1], "東京 \udce9")
+        self.assertEqual(spool[0], "first")
+        self.assertEqual(spool[-1], "third")
+        with self.assertRaises(IndexError):
+            spool[3]
+
+        # read back through the map after it has grown
+        for i in range(1000):
+            spool.append(f"line {i}")
+        self.assertEqual(spool[500], "line 497")
+        self.assertEqual(spool[2], "third")
+        spool.close()
+        self.assertTrue(spool.closed)
+
+
+class TestSpooledLines(unittest.TestCase):
+
+    def test_pulled_lazily(self):
+        pulled = []
+        spooled = SpooledLines(iter(["a", "", "b", "c", "d"]), pulled.append)
+        self.assertEqual(spooled.get(1), "b")
+        self.assertEqual(pulled, ["a", "", "b"])
+        self.assertEqual(spooled.get(0), "a")
+        self.assertIsNone(spooled.get(10))
+        self.assertEqual(len(spooled), 4)
+        spooled.close()
+
+    def test_rows(self):
+        spooled = SpooledLines(["x" * 25, "y", "z" * 10, "w"])
+        self.assertEqual([spooled.first_row(i, 10) for i in range(5)], [1, 4, 5, 6, None])
+        self.assertEqual(spooled.position(2, 10), (0, 10, 2))
+        self.assertEqual(spooled.position(5, 10), (2, 0, 5))
+        self.assertEqual(spooled.position(99, 10), (3, 0, 6))
+        self.assertEqual(spooled.position(-3, 10), (0, 0, 1))
+        spooled.close()
+
+    def test_find(self):
+        spooled = SpooledLines(f"'n': {i}" for i in range(100))
+        self.assertEqual(spooled.find(r"'n': 4\d", 0), 40)
+        self.assertEqual(len(spooled), 41)
+        self.assertEqual(spooled.find(r"'n': 4\d", 41), 41)
+        self.assertEqual(spooled.find(r"'n': 3\d", 41, backward=True), 39)
+        self.assertIsNone(spooled.find(r"'n': 3\d", 29, backward=True))
+        self.assertIsNone(spooled.find("nothing", 0))
+        spooled.close()
+
+
+class TestNavigation(unittest.TestCase):
+
+    def setUp(self):
+        # 4 rows a page with a one line prompt
+        self.pager = Pager(interactive=True, line_numbers=False, paginate_prompt="more")
+        self.lines = [f"line{i}" for i in range(20)]
+
+    def test_back(self):
+        pages = page(self.pager, self.lines, ["", "", "b", "b", "b"], rows=5)
+        self.assertEqual(pages[0].split(), ["line0", "line1", "line2", "line3"])
+        self.assertEqual(pages[2].split(), ["line8", "line9", "line10", "line11"])
+        self.assertEqual(pages[3].split(), ["line4", "line5", "line6", "line7"])
+        self.assertEqual(pages[4].split(), ["line0", "line1", "line2", "line3"])
+        self.assertEqual(pages[5].split(), ["line0", "line1", "line2", "line3"])
+
+    def test_goto(self):
+        pages = page(self.pager, self.lines, ["g11", ":3", "g", "g99"], rows=5)
+        self.assertEqual(pages[1].split(), ["line10", "line11", "line12", "line13"])
+        self.assertEqual(pages[2].split(), ["line2", "line3", "line4", "line5"])
+        self.assertEqual(pages[3].split(), ["line0", "line1", "line2", "line3"])
+        self.assertEqual(pages[4].split(), ["line19"])
+
+    def test_goto_wrapped_rows(self):
+        self.pager.line_numbers = True
+        lines = ["a" * 30, "b" * 30, "c" * 30, "d" * 30]
+        pages = page(self.pager, lines, ["g5"], cols=20, rows=5)
+        self.assertEqual(pages[0].splitlines()[:2], ["1 : " + "a" * 16, "2 : " + "a" * 14])
+        self.assertEqual(pages[1].splitlines()[:2], ["5 : " + "c" * 15, "6 : " + "c" * 15])
+
+    def test_search(self):
+        pages = page(self.pager, self.lines, ["/line1[5-9]", "n", "?line[0-4]$", "/nothing", "/[", ""], rows=5)
+        self.assertEqual(pages[1].split()[0], "line15")
+        self.assertEqual(pages[2].split()[0], "line16")
+        self.assertEqual(pages[3].split()[0], "line4")
+        self.assertEqual(pages[4].split()[:3], ["Pattern", "not", "found:"])
+        self.assertEqual(pages[4].split()[4], "line4")
+        self.assertTrue(pages[5].startswith("Bad pattern '['"))
+        self.assertEqual(pages[6].split(), ["line8", "line9", "line10", "line11"])
+
+    def test_end_after_browsing(self):
+        # the short last page only ends the output when paging straight through
+        pages = page(self.pager, self.lines, ["g19", ""], rows=5)
+        self.assertEqual(pages[1].split(), ["line18", "line19"])
+        self.assertEqual(pages[2], "")
+
+
+if __name__ == '__main__':
+    unittest.main()
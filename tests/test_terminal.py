@@ -0,0 +1,105 @@
+import os
+import signal
+import threading
+import unittest
+from unittest import mock
+
+from pymongoshell.pager import Pager
+from pymongoshell.terminal import TerminalSize
+
+from helpers import captured_output
+
+
+@unittest.skipUnless(hasattr(signal, "SIGWINCH"), "no SIGWINCH on this platform")
+class TestTerminalSize(unittest.TestCase):
+
+    def setUp(self):
+        self.size = TerminalSize()
+
+    def tearDown(self):
+        self.size.unwatch()
+
+    def test_cached_until_resized(self):
+        with mock.patch("shutil.get_terminal_size", return_value=os.terminal_size((100, 30))) as get:
+            self.assertEqual(self.size.get(), (100, 30))
+            self.assertEqual(self.size.get(), (100, 30))
+            self.assertEqual(get.call_count, 1)
+            self.assertTrue(self.size.watching)
+
+            get.return_value = os.terminal_size((60, 20))
+            os.kill(os.getpid(), signal.SIGWINCH)
+            self.assertEqual(self.size.generation, 1)
+            self.assertEqual(self.size.get(), (60, 20))
+            self.assertEqual(get.call_count, 2)
+
+    def test_previous_handler_called(self):
+        calls = []
+        previous = signal.signal(signal.SIGWINCH, lambda signum, frame: calls.append(signum))
+        try:
+            self.size.watch()
+            os.kill(os.getpid(), signal.SIGWINCH)
+            self.assertEqual(calls, [signal.SIGWINCH])
+            self.size.unwatch()
+            self.assertFalse(self.size.watching)
+            os.kill(os.getpid(), signal.SIGWINCH)
+            self.assertEqual(calls, [signal.SIGWINCH, signal.SIGWINCH])
+        finally:
+            signal.signal(signal.SIGWINCH, previous)
+
+    def test_handler_replaced(self):
+        with mock.patch("shutil.get_terminal_size", return_value=os.terminal_size((100, 30))) as get:
+            self.size.get()
+            self.size.get()
+            self.assertEqual(get.call_count, 1)
+            previous = signal.signal(signal.SIGWINCH, signal.SIG_IGN)
+            try:
+                # resizes can't be seen any more, so read the size every time
+                self.size.get()
+                self.size.get()
+                self.assertEqual(get.call_count, 3)
+                self.size.unwatch()
+                self.assertIs(signal.getsignal(signal.SIGWINCH), signal.SIG_IGN)
+            finally:
+                signal.signal(signal.SIGWINCH, previous)
+
+    def test_environment_changed(self):
+        with mock.patch("shutil.get_terminal_size", return_value=os.terminal_size((100, 30))) as get:
+            with mock.patch.dict(os.environ, {"COLUMNS": "100"}):
+                self.size.get()
+                self.size.get()
+                self.assertEqual(get.call_count, 1)
+                os.environ["COLUMNS"] = "120"
+                self.size.get()
+                self.size.get()
+                self.assertEqual(get.call_count, 2)
+
+    def test_not_cached_off_main_thread(self):
+        sizes = []
+        with mock.patch("shutil.get_terminal_size", return_value=os.terminal_size((100, 30))) as get:
+            thread = threading.Thread(target=lambda: sizes.extend([self.size.get(), self.size.get()]))
+            thread.start()
+            thread.join()
+        self.assertEqual(sizes, [(100, 30), (100, 30)])
+        self.assertEqual(get.call_count, 2)
+        self.assertFalse(self.size.watching)
+
+    def test_paging_reads_size_once(self):
+        pager = Pager(interactive=True, line_numbers=True, paginate_prompt="more")
+        with mock.patch("pymongoshell.pager.TERMINAL_SIZE", self.size), \
+                mock.patch("shutil.get_terminal_size", return_value=os.terminal_size((20, 5))) as get, \
+                mock.patch("builtins.input", return_value=""):
+            with captured_output() as (out, err):
+                pager.paginate_lines([f"line{i}" for i in range(40)])
+                Pager.make_numbers_column(1)
+                self.assertEqual(get.call_count, 1)
+
+                # a resize reflows the next page
+                get.return_value = os.terminal_size((8, 5))
+                os.kill(os.getpid(), signal.SIGWINCH)
+                pager.paginate_lines(["abcdefghij"])
+        self.assertEqual(get.call_count, 2)
+        self.assertTrue(out.getvalue().endswith("1 : abcd\n2 : efgh\n3 : ij\n"), out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import threading
+import unittest
+from types import SimpleNamespace
+
+from pymongoshell.mongoclient import MongoClient
+from pymongoshell.wirestats import LatencyHistogram, WireStatsListener, batch_size
+
+from helpers import captured_output
+
+
+def started(name, operation_id):
+    return SimpleNamespace(command_name=name, operation_id=operation_id)
+
+
+def succeeded(name, micros, reply):
+    return SimpleNamespace(command_name=name, duration_micros=micros, reply=reply)
+
+
+def failed(name, micros, operation_id=0):
+    return SimpleNamespace(command_name=name, duration_micros=micros, operation_id=operation_id)
+
+
+class TestWireStats(unittest.TestCase):
+
+    def test_histogram_exact_small_values(self):
+        h = LatencyHistogram()
+        for v in range(1, 11):
+            h.record(v)
+        self.assertEqual(h.count, 10)
+        self.assertEqual(h.percentile(50), 5)
+        self.assertEqual(h.percentile(100), 10)
+        self.assertEqual(h.min, 1)
+        self.assertEqual(h.mean, 5.5)
+
+    def test_histogram_precision(self):
+        h = LatencyHistogram()
+        values = [int(1.07 ** i) + 100 for i in range(300)]
+        for v in values:
+            h.record(v)
+        ordered = sorted(values)
+        for p in (50, 95, 99):
+            exact = ordered[int(-(-len(values) * p // 100)) - 1]
+            self.assertLessEqual(abs(h.percentile(p) - exact) / exact, 0.035)
+        self.assertEqual(h.percentile(100), max(values))
+        self.assertLess(len(h.buckets()), len(set(values)))
+
+    def test_batch_size(self):
+        self.assertEqual(batch_size({"cursor": {"firstBatch": [1, 2]}}), 2)
+        self.assertEqual(batch_size({"cursor": {"nextBatch": []}}), 0)
+        self.assertIsNone(batch_size({"ok": 1}))
+
+    def test_listener(self):
+        listener = WireStatsListener(reply_sizes=True)
+        listener.started(started("find", 1))
+        listener.succeeded(succeeded("find", 1500, {"cursor": {"firstBatch": [{"a": 1}] * 101}, "ok": 1}))
+        for i in range(3):
+            listener.started(started("getMore", 1))
+            listener.succeeded(succeeded("getMore", 800, {"cursor": {"nextBatch": [{"a": 1}] * 100}}))
+        listener.started(started("insert", 2))
+        listener.failed(failed("insert", 300, 2))
+        listener.started(started("insert", 2))  # retry
+        listener.succeeded(succeeded("insert", 400, {"n": 1, "ok": 1}))
+
+        stats = listener.stats()
+        self.assertEqual(stats["getMore"].count, 3)
+        self.assertEqual(stats["getMore"].mean_batch_size, 100)
+        self.assertEqual(stats["getMore"].retries, 0)
+        self.assertEqual(stats["find"].batch_docs, 101)
+        self.assertGreater(stats["find"].reply_bytes, 101 * 10)
+        self.assertEqual(stats["insert"].failures, 1)
+        self.assertEqual(stats["insert"].retries, 1)
+        self.assertEqual(listener.thread_server_time(), 1500 + 3 * 800 + 300 + 400)
+
+        lines = list(listener.lines())
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("getMore"))
+
+        listener.reset()
+        self.assertEqual(listener.stats(), {})
+        self.assertEqual(list(listener.lines()), ["no commands recorded"])
+
+    def test_multi_batch_insert_not_retry(self):
+        # insert_many split into batches sends every batch with the same operation id
+        listener = WireStatsListener()
+        for _ in range(3):
+            listener.started(started("insert", 7))
+            listener.succeeded(succeeded("insert", 500, {"n": 100000, "ok": 1}))
+        stats = listener.stats()["insert"]
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.retries, 0)
+
+    def test_reply_sizes_opt_in(self):
+        listener = WireStatsListener()
+        listener.succeeded(succeeded("find", 100, {"cursor": {"firstBatch": [{"a": 1}]}}))
+        self.assertEqual(listener.stats()["find"].reply_bytes, 0)
+        self.assertIn(" - ", list(listener.lines())[1])
+        listener.reply_sizes = True
+        listener.succeeded(succeeded("find", 100, {"cursor": {"firstBatch": [{"a": 1}]}}))
+        self.assertGreater(listener.stats()["find"].reply_bytes, 0)
+        self.assertEqual(listener.stats()["find"].replies_sized, 1)
+
+    def test_thread_server_time(self):
+        listener = WireStatsListener()
+        t = threading.Thread(target=listener.succeeded, args=(succeeded("ping", 100, {"ok": 1}),))
+        t.start()
+        t.join()
+        self.assertEqual(listener.thread_server_time(), 0)
+
+    def test_client(self):
+        c = MongoClient(banner=False, wire_stats=True)
+        self.assertIn(c._wire_stats, c.client.options.event_listeners)
+        c._wire_stats.succeeded(succeeded("ping", 100, {"ok": 1}))
+        c.paginate = False
+        with captured_output() as (out, err):
+            c.wire_stats(reset=True)
+        self.assertIn("ping", out.getvalue())
+        self.assertEqual(c._wire_stats.stats(), {})
+        self.assertFalse(c.wire_reply_sizes)
+        c.wire_reply_sizes = True
+        self.assertTrue(c._wire_stats.reply_sizes)
+
+        with captured_output() as (out, err):
+            MongoClient(banner=False).wire_stats()
+        self.assertIn("wire_stats=True", out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from pymongoshell.pager import Pager
+from pymongoshell.wrap import char_width, display_width, row_end, wrap_offsets, _text_width
+
+from helpers import captured_output
+
+
+COMBINING_ACUTE = "́"
+
+
+class TestWrap(unittest.TestCase):
+
+    def test_char_width(self):
+        self.assertEqual(char_width("a"), 1)
+        self.assertEqual(char_width("東"), 2)
+        self.assertEqual(char_width("Ａ"), 2)  # fullwidth
+        self.assertEqual(char_width(COMBINING_ACUTE), 0)
+        self.assertEqual(char_width("‍"), 0)  # zero width joiner
+
+    def test_display_width(self):
+        self.assertEqual(display_width(""), 0)
+        self.assertEqual(display_width("name"), 4)
+        self.assertEqual(display_width("'名前': '東京',"), 15)
+        self.assertEqual(display_width("e" + COMBINING_ACUTE), 1)
+
+        _text_width.cache_clear()
+        for _ in range(10):
+            display_width("'都市': '大阪'")
+        info = _text_width.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 9))
+
+    def test_row_end(self):
+        self.assertEqual(row_end("abcdef", 0, 4), 4)
+        self.assertEqual(row_end("abcdef", 4, 4), 6)
+        self.assertEqual(row_end("東京大阪", 0, 5), 2)
+        self.assertEqual(row_end("東京大阪", 0, 4), 2)
+        # a wide character is never split, even if it is wider than the row
+        self.assertEqual(row_end("東京", 0, 1), 1)
+        # combining marks stay with the character before them
+        self.assertEqual(row_end("abe" + COMBINING_ACUTE + "x", 0, 3), 4)
+        self.assertEqual(row_end("abc", 0, 0), 1)
+
+    def test_wrap_offsets(self):
+        line = "abc東京def"
+        self.assertEqual(list(wrap_offsets(line, 4)), [(0, 3), (3, 5), (5, 8)])
+        self.assertEqual(list(wrap_offsets("", 4)), [])
+        for width in range(1, 12):
+            rows = [line[s:e] for s, e in wrap_offsets(line, width)]
+            self.assertEqual("".join(rows), line)
+            self.assertTrue(all(display_width(r) <= max(width, 2) for r in rows))
+
+    def test_line_to_box(self):
+        pager = Pager()
+        self.assertEqual(pager.line_to_box("x" * 10, 4), ["xxxx", "xxxx", "xx"])
+        self.assertEqual(pager.line_to_box("東京大阪名古屋", 6), ["東京大", "阪名古", "屋"])
+
+    def test_line_to_paragraph(self):
+        pager = Pager(line_numbers=True)
+        self.assertEqual(pager.line_to_paragraph("東京大阪", 9, line_number=1),
+                         ["1  : 東京", "2  : 大阪"])
+
+    def test_paginate_wide_rows(self):
+        pager = Pager(interactive=True, line_numbers=False, paginate_prompt="more")
+        line = "東京" * 30
+        with mock.patch("builtins.input", return_value=""):
+            with captured_output() as (out, err):
+                pager.paginate_lines([line, "end"], default_terminal_cols=20, default_terminal_lines=24)
+        rows = out.getvalue().splitlines()
+        self.assertEqual(rows[:3], ["東京" * 5] * 3)
+        self.assertEqual(rows[6], "end")
+        self.assertEqual("".join(rows[:6]), line)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,21 +1,10 @@
 import unittest
-import sys
-from contextlib import contextmanager
-from io import StringIO
 from datetime import datetime
 import pymongo
 
 from pymongoshell.mongoclient import MongoClient
 
-@contextmanager
-def captured_output():
-    new_out, new_err = StringIO(), StringIO()
-    old_out, old_err = sys.stdout, sys.stderr
-    try:
-        sys.stdout, sys.stderr = new_out, new_err
-        yield sys.stdout, sys.stderr
-    finally:
-        sys.stdout, sys.stderr = old_out, old_err
+from helpers import captured_output
 
 
 class TestShell(unittest.TestCase):